@@ -22,11 +22,8 @@ class CAMSAnomalyReader:
 
     def read_observations(self, query_layer, column):
 
-        rows = cams_interface.connection.query_weed_location_layer(query_layer)
-        cams_items = []
-        for featureRow in rows.features:
-            cams_items.append(featureRow.attributes[column])
-        return cams_items
+        rows = cams_interface.connection.scan_weed_location_layer(query_layer, out_fields=column)
+        return [row[column] for row in rows]
 
     def get_features_with_iNat_URL(self):
         query = "iNatURL LIKE 'https://www.inaturalist.org/observations%'"
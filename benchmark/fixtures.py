@@ -0,0 +1,190 @@
+#  ====================================================================
+#  Copyright 2026 EcoNet.NZ
+#
+#  Licensed under the Apache License, Version 2.0 (the "License");
+#  you may not use this file except in compliance with the License.
+#  You may obtain a copy of the License at
+#
+#      http://www.apache.org/licenses/LICENSE-2.0
+#
+#  Unless required by applicable law or agreed to in writing, software
+#  distributed under the License is distributed on an "AS IS" BASIS,
+#  WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+#  See the License for the specific language governing permissions and
+#  limitations under the License.
+#  ====================================================================
+
+"""
+iNaturalist search result pages for the benchmarks, stored as one JSON file per page in the format returned by
+the iNaturalist observations endpoint.
+
+Pages are either synthesised from the ObservationFactory used by the feature tests, with a realistic mix of
+observation fields and photos, or recorded from the live iNaturalist API. Either way they are replayed offline.
+"""
+
+import datetime
+import glob
+import json
+import logging
+import os
+import random
+
+import pyinaturalist
+
+from features.support.observation_factory import ObservationFactory
+from inat_to_cams import config
+
+DEFAULT_FIXTURE_DIRECTORY = os.path.join('benchmark', 'fixtures')
+PAGE_SIZE = 200
+# Bump when synthesise_observation changes, so that previously synthesised fixtures are not reused
+SYNTHESIS_VERSION = 1
+
+BENCHMARK_USER = pyinaturalist.User(id=999999, login='benchmark_user')
+STATUS_UPDATES = [None, None, 'Alive / Regrowth', 'Dead / Not Present', 'Duplicate']
+TREATMENTS = [None, None, 'Cut and paint', 'Pulled or dug', 'Spray leaves']
+
+
+def synthesised_directory(directory, count):
+    return os.path.join(directory, f'synthesised_v{SYNTHESIS_VERSION}_{count}')
+
+
+def recorded_directory(directory):
+    return os.path.join(directory, 'recorded')
+
+
+def page_files(directory):
+    return sorted(glob.glob(os.path.join(directory, 'page_*.json')))
+
+
+def fixture_count(directory):
+    files = page_files(directory)
+    if not files:
+        return 0
+    with open(files[0], encoding='utf-8') as page_file:
+        return json.load(page_file)['total_results']
+
+
+def write_page(directory, page_number, total_results, results):
+    page = {'total_results': total_results, 'page': page_number, 'per_page': PAGE_SIZE, 'results': results}
+    with open(os.path.join(directory, f'page_{page_number:05}.json'), 'w', encoding='utf-8') as page_file:
+        json.dump(page, page_file, default=str)
+
+
+def synthesise_fixtures(directory, count, seed=0):
+    """Write count synthesised observations to directory, unless they are already there"""
+    if fixture_count(directory) == count:
+        return directory
+    logging.warning(f'Synthesising {count} benchmark observations in {directory}')
+    os.makedirs(directory, exist_ok=True)
+    for stale_file in page_files(directory):
+        os.remove(stale_file)
+
+    taxon_ids = sorted(int(taxon_id) for taxon_id in config.taxon_mapping)
+    rng = random.Random(seed)
+    results = []
+    page_number = 1
+    for index in range(count):
+        results.append(synthesise_observation(index, rng, taxon_ids).to_dict())
+        if len(results) == PAGE_SIZE:
+            write_page(directory, page_number, count, results)
+            page_number += 1
+            results = []
+    if results:
+        write_page(directory, page_number, count, results)
+    return directory
+
+
+def synthesise_observation(index, rng, taxon_ids):
+    observed_on = datetime.datetime(2023, 1, 1, 12, 0, tzinfo=datetime.timezone(datetime.timedelta(hours=12))) + datetime.timedelta(hours=index)
+    updated_at = observed_on + datetime.timedelta(days=rng.randint(0, 30))
+
+    taxon = pyinaturalist.Taxon(id=rng.choice(taxon_ids), name='Benchmark taxon', preferred_common_name='benchmark weed')
+    taxon.ancestor_ids = [48460, 47126, taxon.id]
+
+    ofvs = [field_value('Location details', f'Benchmark site {index}')]
+    if rng.random() < 0.5:
+        ofvs.append(field_value('Height (m)', str(rng.randint(1, 10))))
+        ofvs.append(field_value('Area in square meters', str(rng.randint(1, 500))))
+        ofvs.append(field_value('Effort to control', f'{rng.randint(1, 5)} - benchmark effort'))
+    status_update = rng.choice(STATUS_UPDATES)
+    if status_update:
+        ofvs.append(field_value('Status update', status_update))
+        ofvs.append(field_value('Date of status update', (observed_on + datetime.timedelta(days=7)).date().isoformat()))
+    treatment = rng.choice(TREATMENTS)
+    if treatment:
+        ofvs.append(field_value('How treated', treatment))
+        ofvs.append(field_value('Date controlled', (observed_on + datetime.timedelta(days=3)).date().isoformat()))
+
+    photos = [pyinaturalist.Photo(id=index * 10 + i, url=f'https://static.inaturalist.org/photos/{index * 10 + i}/square.jpg',
+                                  attribution='(c) benchmark_user, some rights reserved (CC BY)')
+              for i in range(rng.randint(0, 3))]
+
+    return ObservationFactory(id=1_000_000 + index,
+                              taxon=taxon,
+                              observed_on=observed_on.isoformat(),
+                              updated_at=updated_at.isoformat(),
+                              location=(-41.0 - rng.random(), 174.0 + rng.random()),
+                              positional_accuracy=rng.randint(3, 100),
+                              quality_grade=rng.choice(['casual', 'needs_id', 'research']),
+                              description=rng.choice([None, 'Seen on the <b>benchmark</b> walk']),
+                              user=BENCHMARK_USER,
+                              ofvs=ofvs,
+                              photos=photos)
+
+
+def field_value(name, value):
+    # Set the user so that the translator never needs to look up usernames from the iNaturalist API
+    return pyinaturalist.ObservationFieldValue(name=name, value=value, user_id=BENCHMARK_USER.id, user=BENCHMARK_USER)
+
+
+def record_fixtures(directory, count, place_ids, taxon_ids):
+    """Record up to count observations from the live iNaturalist API, a page at a time"""
+    logging.warning(f'Recording up to {count} iNaturalist observations in {directory}')
+    os.makedirs(directory, exist_ok=True)
+    for stale_file in page_files(directory):
+        os.remove(stale_file)
+
+    # id_above paging avoids the 10,000 result limit on page numbers
+    last_id = 0
+    recorded = 0
+    page_number = 1
+    while recorded < count:
+        response = pyinaturalist.get_observations(place_id=place_ids, taxon_id=taxon_ids, geo=True, geoprivacy='open',
+                                                  order_by='id', order='asc', id_above=last_id, per_page=PAGE_SIZE)
+        results = response['results'][:count - recorded]
+        if not results:
+            break
+        write_page(directory, page_number, min(count, response['total_results']), results)
+        recorded += len(results)
+        last_id = results[-1]['id']
+        page_number += 1
+    return recorded
+
+
+def replay_observations(directory, limit=None):
+    """Parse the observations from the fixture pages in directory, as the iNaturalist client does for search results"""
+    observations = []
+    for file_name in page_files(directory):
+        with open(file_name, encoding='utf-8') as page_file:
+            observations.extend(pyinaturalist.Observation.from_json_list(json.load(page_file)))
+        if limit and len(observations) >= limit:
+            return observations[:limit]
+    return observations
+
+
+class ReplayPaginator:
+    """Returns replayed observations a page at a time, like the paginator returned by an iNaturalist client search"""
+
+    def __init__(self, observations, per_page=200):
+        self.observations = observations
+        self.per_page = per_page
+        self.offset = 0
+
+    @property
+    def exhausted(self):
+        return self.offset >= len(self.observations)
+
+    def next_page(self):
+        page = self.observations[self.offset:self.offset + self.per_page]
+        self.offset += len(page)
+        return page
@@ -0,0 +1,439 @@
+#  ====================================================================
+#  Copyright 2026 EcoNet.NZ
+#
+#  Licensed under the Apache License, Version 2.0 (the "License");
+#  you may not use this file except in compliance with the License.
+#  You may obtain a copy of the License at
+#
+#      http://www.apache.org/licenses/LICENSE-2.0
+#
+#  Unless required by applicable law or agreed to in writing, software
+#  distributed under the License is distributed on an "AS IS" BASIS,
+#  WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+#  See the License for the specific language governing permissions and
+#  limitations under the License.
+#  ====================================================================
+
+"""
+An in-memory stand-in for the CAMS feature service, for running the sync pipeline offline.
+
+LocalCamsConnection is a CamsConnection whose layer and table are LocalFeatureEntity objects. These support
+the subset of the arcgis FeatureLayer / Table API used by the readers and writers (query and edit_features),
+including the SQL where clauses they build, and count every call so that benchmarks can report CAMS calls
+per observation. Equality lookups on the key fields are indexed so that the stand-in stays fast at scale.
+"""
+
+import collections
+import datetime
+import re
+import threading
+import uuid
+
+from inat_to_cams import cams_interface, config
+
+INDEXED_FIELDS = ['OBJECTID', 'GlobalID', 'iNatRef', 'GUID_visits', 'iNatURL']
+
+
+class LocalFeature:
+    def __init__(self, attributes, geometry=None):
+        self.attributes = attributes
+        self.geometry = geometry
+
+    def __repr__(self):
+        return f'LocalFeature({self.attributes}, {self.geometry})'
+
+
+class LocalFeatureSet:
+    object_id_field_name = 'OBJECTID'
+
+    def __init__(self, features):
+        self.features = features
+
+    def __bool__(self):
+        return bool(self.features)
+
+    def __iter__(self):
+        return iter(self.features)
+
+    def __len__(self):
+        return len(self.features)
+
+
+class LocalFeatureEntity:
+    """A feature layer or table held in memory"""
+
+    def __init__(self, name, field_names, max_record_count=2000):
+        self.name = name
+        self.field_names = ['OBJECTID', 'GlobalID'] + [field for field in field_names if field not in ('OBJECTID', 'GlobalID')]
+        self.canonical_names = {field.lower(): field for field in self.field_names}
+        self.properties = {'name': name, 'maxRecordCount': max_record_count, 'fields': []}
+        self.rows = {}
+        self.indexes = {field: collections.defaultdict(set) for field in INDEXED_FIELDS}
+        self.next_object_id = 1
+        self.call_counts = collections.Counter()
+        self.lock = threading.RLock()
+
+    def canonical_name(self, name):
+        return self.canonical_names.get(name.lower(), name)
+
+    def query(self, where='1=1', out_fields='*', order_by_fields=None, return_count_only=False, returnIdsOnly=False,
+              return_ids_only=False, result_record_count=None, return_all_records=True, return_geometry=True,
+              out_sr=None, **kwargs):
+        with self.lock:
+            self.call_counts['query'] += 1
+            object_ids = self.matching_object_ids(parse_where(where or '1=1'))
+
+            if return_count_only:
+                return len(object_ids)
+
+            object_ids = sorted(object_ids)
+            if order_by_fields and 'desc' in order_by_fields.lower():
+                object_ids.reverse()
+
+            if returnIdsOnly or return_ids_only:
+                return LocalFeatureSet([LocalFeature({'OBJECTID': object_id}) for object_id in object_ids])
+
+            if result_record_count and not return_all_records:
+                object_ids = object_ids[:result_record_count]
+
+            fields = self.output_fields(out_fields)
+            features = []
+            for object_id in object_ids:
+                row = self.rows[object_id]
+                attributes = {field: row['attributes'].get(field) for field in fields}
+                geometry = dict(row['geometry']) if return_geometry and row['geometry'] else None
+                features.append(LocalFeature(attributes, geometry))
+            return LocalFeatureSet(features)
+
+    def output_fields(self, out_fields):
+        if not out_fields or out_fields == '*':
+            return self.field_names
+        if isinstance(out_fields, str):
+            out_fields = out_fields.split(',')
+        return [self.canonical_name(field.strip()) for field in out_fields]
+
+    def edit_features(self, adds=None, updates=None, deletes=None, **kwargs):
+        with self.lock:
+            self.call_counts['edit_features'] += 1
+            results = {'addResults': [], 'updateResults': [], 'deleteResults': []}
+            for feature in adds or []:
+                results['addResults'].append(self.add(feature))
+            for feature in updates or []:
+                results['updateResults'].append(self.update(feature))
+            for object_id in deletes or []:
+                results['deleteResults'].append(self.delete(int(object_id)))
+            return results
+
+    def delete_features(self, where=None, **kwargs):
+        with self.lock:
+            self.call_counts['delete_features'] += 1
+            object_ids = self.matching_object_ids(parse_where(where or '1=1'))
+            return {'deleteResults': [self.delete(object_id) for object_id in object_ids]}
+
+    def add(self, feature):
+        object_id = self.next_object_id
+        self.next_object_id += 1
+        global_id = '{' + str(uuid.uuid4()).upper() + '}'
+        attributes = {field: None for field in self.field_names}
+        attributes.update(self.as_stored_attributes(feature.get('attributes', {})))
+        attributes['OBJECTID'] = object_id
+        attributes['GlobalID'] = global_id
+        self.rows[object_id] = {'attributes': attributes, 'geometry': feature.get('geometry')}
+        self.index(object_id)
+        return {'success': True, 'objectId': object_id, 'globalId': global_id}
+
+    def update(self, feature):
+        attributes = self.as_stored_attributes(feature.get('attributes', {}))
+        object_id = attributes.pop('OBJECTID', None)
+        if object_id not in self.rows:
+            return {'success': False, 'objectId': object_id, 'error': {'description': f'Object {object_id} not found'}}
+        attributes.pop('GlobalID', None)
+        self.unindex(object_id)
+        self.rows[object_id]['attributes'].update(attributes)
+        if feature.get('geometry'):
+            self.rows[object_id]['geometry'] = feature['geometry']
+        self.index(object_id)
+        return {'success': True, 'objectId': object_id}
+
+    def delete(self, object_id):
+        if object_id not in self.rows:
+            return {'success': False, 'objectId': object_id}
+        self.unindex(object_id)
+        del self.rows[object_id]
+        return {'success': True, 'objectId': object_id}
+
+    def as_stored_attributes(self, attributes):
+        # The arcgis API sends dates to the server as epoch milliseconds
+        stored = {}
+        for name, value in attributes.items():
+            if isinstance(value, datetime.datetime):
+                value = int(value.timestamp() * 1000)
+            stored[self.canonical_name(name)] = value
+        if 'OBJECTID' in stored and stored['OBJECTID'] is not None:
+            stored['OBJECTID'] = int(stored['OBJECTID'])
+        return stored
+
+    def index(self, object_id):
+        attributes = self.rows[object_id]['attributes']
+        for field, index in self.indexes.items():
+            if field in attributes:
+                index[index_key(attributes[field])].add(object_id)
+
+    def unindex(self, object_id):
+        attributes = self.rows[object_id]['attributes']
+        for field, index in self.indexes.items():
+            if field in attributes:
+                index[index_key(attributes[field])].discard(object_id)
+
+    def matching_object_ids(self, condition):
+        candidates = self.indexed_candidates(condition)
+        if candidates is None:
+            candidates = self.rows.keys()
+        return {object_id for object_id in candidates if evaluate(condition, self.rows[object_id]['attributes'], self.canonical_name)}
+
+    def indexed_candidates(self, condition):
+        # Use an index for a top-level equality or IN condition on an indexed field, or for any such conjunct of an AND
+        kind = condition[0]
+        if kind == 'compare' and condition[1] == '=':
+            field = self.canonical_name(condition[2])
+            if field in self.indexes:
+                return set(self.indexes[field].get(index_key(condition[3]), ()))
+        elif kind == 'in' and not condition[3]:
+            field = self.canonical_name(condition[1])
+            if field in self.indexes:
+                candidates = set()
+                for value in condition[2]:
+                    candidates.update(self.indexes[field].get(index_key(value), ()))
+                return candidates
+        elif kind == 'and':
+            for operand in condition[1:]:
+                candidates = self.indexed_candidates(operand)
+                if candidates is not None:
+                    return candidates
+        return None
+
+    def clear(self):
+        with self.lock:
+            self.rows.clear()
+            for index in self.indexes.values():
+                index.clear()
+            self.next_object_id = 1
+
+
+class LocalCamsConnection(cams_interface.CamsConnection):
+    """A CamsConnection to an in-memory copy of the CAMS schema, with no network access"""
+
+    def __init__(self):
+        self.layer = LocalFeatureEntity('WeedLocations', schema_field_names('WeedLocations') + ['audit_log'])
+        self.table = LocalFeatureEntity('Visits_Table', schema_field_names('Visits_Table'))
+        self.item = LocalItem(self.layer, self.table)
+        self.test_schema = [self.item.title]
+        self.scan_page_size = cams_interface.DEFAULT_SCAN_PAGE_SIZE
+
+    def call_counts(self):
+        counts = collections.Counter()
+        for entity in (self.layer, self.table):
+            for call, count in entity.call_counts.items():
+                counts[f'{entity.name}.{call}'] += count
+        return counts
+
+    def reset_call_counts(self):
+        self.layer.call_counts.clear()
+        self.table.call_counts.clear()
+
+
+class LocalItem:
+    type = 'Feature Service'
+    title = 'Local stand-in for CAMS'
+
+    def __init__(self, layer, table):
+        self.layers = [layer]
+        self.tables = [table]
+
+
+def schema_field_names(entity):
+    return [field['name'] for field in config.cams_schema[entity].values()]
+
+
+def index_key(value):
+    return str(value).strip('{}').lower() if value is not None else None
+
+
+# A small parser and evaluator for the SQL where clauses built by the readers and writers.
+# Conditions are tuples: ('and', ...), ('or', ...), ('not', condition), ('compare', operator, field, value),
+# ('in', field, values, negated), ('like', field, pattern, negated), ('null', field, negated), ('true',)
+
+TOKEN_PATTERN = re.compile(r"""\s*(?:
+    (?P<string>'(?:[^']|'')*')
+    |(?P<number>-?\d+(?:\.\d+)?)
+    |(?P<operator><>|>=|<=|!=|=|<|>)
+    |(?P<punctuation>[(),])
+    |(?P<word>[A-Za-z_][A-Za-z_0-9]*)
+    )""", re.VERBOSE)
+
+
+def parse_where(where):
+    tokens = tokenize(where)
+    parser = WhereParser(tokens)
+    condition = parser.parse_or()
+    if parser.position != len(tokens):
+        raise ValueError(f'Unsupported where clause: {where}')
+    return condition
+
+
+def tokenize(where):
+    tokens = []
+    position = 0
+    where = where.strip()
+    while position < len(where):
+        match = TOKEN_PATTERN.match(where, position)
+        if not match or match.end() == position:
+            raise ValueError(f'Unsupported where clause: {where}')
+        position = match.end()
+        kind = match.lastgroup
+        text = match.group(kind)
+        if kind == 'string':
+            tokens.append(('value', text[1:-1].replace("''", "'")))
+        elif kind == 'number':
+            tokens.append(('value', float(text) if '.' in text else int(text)))
+        elif kind == 'word' and text.upper() in ('AND', 'OR', 'NOT', 'IN', 'LIKE', 'IS', 'NULL'):
+            tokens.append(('keyword', text.upper()))
+        else:
+            tokens.append((kind, text))
+    return tokens
+
+
+class WhereParser:
+    def __init__(self, tokens):
+        self.tokens = tokens
+        self.position = 0
+
+    def peek(self, offset=0):
+        index = self.position + offset
+        return self.tokens[index] if index < len(self.tokens) else (None, None)
+
+    def take(self):
+        token = self.peek()
+        self.position += 1
+        return token
+
+    def accept(self, kind, text=None):
+        token_kind, token_text = self.peek()
+        if token_kind == kind and (text is None or token_text == text):
+            self.position += 1
+            return True
+        return False
+
+    def parse_or(self):
+        operands = [self.parse_and()]
+        while self.accept('keyword', 'OR'):
+            operands.append(self.parse_and())
+        return operands[0] if len(operands) == 1 else ('or', *operands)
+
+    def parse_and(self):
+        operands = [self.parse_not()]
+        while self.accept('keyword', 'AND'):
+            operands.append(self.parse_not())
+        return operands[0] if len(operands) == 1 else ('and', *operands)
+
+    def parse_not(self):
+        if self.accept('keyword', 'NOT'):
+            return ('not', self.parse_not())
+        return self.parse_term()
+
+    def parse_term(self):
+        if self.accept('punctuation', '('):
+            condition = self.parse_or()
+            if not self.accept('punctuation', ')'):
+                raise ValueError('Unbalanced parentheses in where clause')
+            return condition
+
+        kind, text = self.take()
+        if kind == 'value':
+            # eg 1=1
+            operator_kind, operator = self.take()
+            _, other = self.take()
+            return ('true',) if compare(text, operator, other) else ('not', ('true',))
+        if kind != 'word':
+            raise ValueError(f'Unexpected token {text} in where clause')
+        field = text
+
+        negated = self.accept('keyword', 'NOT')
+        if self.accept('keyword', 'IN'):
+            self.accept('punctuation', '(')
+            values = []
+            while not self.accept('punctuation', ')'):
+                value_kind, value = self.take()
+                if value_kind == 'value':
+                    values.append(value)
+            return ('in', field, values, negated)
+        if self.accept('keyword', 'LIKE'):
+            _, pattern = self.take()
+            return ('like', field, pattern, negated)
+        if self.accept('keyword', 'IS'):
+            is_not = self.accept('keyword', 'NOT')
+            self.accept('keyword', 'NULL')
+            return ('null', field, is_not)
+
+        operator_kind, operator = self.take()
+        if operator_kind != 'operator':
+            raise ValueError(f'Expected an operator after {field} in where clause')
+        _, value = self.take()
+        return ('compare', operator, field, value)
+
+
+def evaluate(condition, attributes, canonical_name):
+    kind = condition[0]
+    if kind == 'true':
+        return True
+    if kind == 'and':
+        return all(evaluate(operand, attributes, canonical_name) for operand in condition[1:])
+    if kind == 'or':
+        return any(evaluate(operand, attributes, canonical_name) for operand in condition[1:])
+    if kind == 'not':
+        return not evaluate(condition[1], attributes, canonical_name)
+    if kind == 'compare':
+        _, operator, field, value = condition
+        return compare(attributes.get(canonical_name(field)), operator, value)
+    if kind == 'in':
+        _, field, values, negated = condition
+        actual = index_key(attributes.get(canonical_name(field)))
+        return (actual in {index_key(value) for value in values}) != negated
+    if kind == 'like':
+        _, field, pattern, negated = condition
+        actual = attributes.get(canonical_name(field))
+        regex = '^' + re.escape(pattern).replace('%', '.*').replace('_', '.') + '$'
+        return (actual is not None and re.match(regex, str(actual)) is not None) != negated
+    if kind == 'null':
+        _, field, negated = condition
+        return (attributes.get(canonical_name(field)) is None) != negated
+    raise ValueError(f'Unknown condition {condition}')
+
+
+def compare(actual, operator, value):
+    if actual is None:
+        return False
+    if isinstance(value, str) and not isinstance(actual, str):
+        # eg OBJECTID='123'
+        try:
+            value = type(actual)(value)
+        except ValueError:
+            actual = str(actual)
+    elif isinstance(actual, str) and not isinstance(value, str):
+        value = str(value)
+    if isinstance(actual, str) and isinstance(value, str) and operator in ('=', '<>', '!='):
+        # GlobalIDs may or may not be wrapped in braces and differ in case
+        actual, value = index_key(actual), index_key(value)
+    if operator == '=':
+        return actual == value
+    if operator in ('<>', '!='):
+        return actual != value
+    if operator == '>':
+        return actual > value
+    if operator == '>=':
+        return actual >= value
+    if operator == '<':
+        return actual < value
+    if operator == '<=':
+        return actual <= value
+    raise ValueError(f'Unknown operator {operator}')
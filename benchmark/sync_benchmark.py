@@ -0,0 +1,259 @@
+#  ====================================================================
+#  Copyright 2026 EcoNet.NZ
+#
+#  Licensed under the Apache License, Version 2.0 (the "License");
+#  you may not use this file except in compliance with the License.
+#  You may obtain a copy of the License at
+#
+#      http://www.apache.org/licenses/LICENSE-2.0
+#
+#  Unless required by applicable law or agreed to in writing, software
+#  distributed under the License is distributed on an "AS IS" BASIS,
+#  WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+#  See the License for the specific language governing permissions and
+#  limitations under the License.
+#  ====================================================================
+
+"""
+Offline end-to-end benchmark of sync_updated_observations.
+
+Replays fixture pages of iNaturalist search results through the real reader, translator and writer against an
+in-memory CAMS (see local_cams). Each scale runs in its own process so that peak RSS is measured per scale.
+Each run makes three passes over the same observations:
+
+* create: CAMS is empty, so every observation creates a weed location and visit
+* unchanged: the sync state, including the feature hashes, is reset and the same observations are synced again,
+  so every observation is read back from CAMS and compared
+* skipped: the time of last update is reset but the feature hashes are kept, so every observation is skipped
+  without reading CAMS, which is the common case in the scheduled runs
+"""
+
+import collections
+import contextlib
+import datetime
+import functools
+import json
+import logging
+import multiprocessing
+import os
+import resource
+import sys
+import tempfile
+import time
+
+DEFAULT_SCALES = [100, 1_000, 10_000, 50_000]
+PASSES = ['create', 'unchanged', 'skipped']
+# Passes that start without the feature hashes saved by the previous pass
+PASSES_WITHOUT_HASHES = ['create', 'unchanged']
+PERCENTILES = [50, 90, 99]
+BENCHMARK_CONFIG_NAME = 'Benchmark'
+
+
+class StageTimer:
+    """Records the latency of each call to the wrapped pipeline stages"""
+
+    def __init__(self):
+        self.latencies = collections.defaultdict(list)
+
+    @contextlib.contextmanager
+    def instrument(self, stages):
+        # stages is a list of (stage name, owner, attribute name) of functions to time
+        originals = []
+        for stage, owner, attribute in stages:
+            original = owner.__dict__[attribute]
+            originals.append((owner, attribute, original))
+            setattr(owner, attribute, self.timed(stage, original))
+        try:
+            yield self
+        finally:
+            for owner, attribute, original in reversed(originals):
+                setattr(owner, attribute, original)
+
+    def timed(self, stage, original):
+        is_static = isinstance(original, staticmethod)
+        function = original.__func__ if is_static else original
+        latencies = self.latencies[stage]
+
+        @functools.wraps(function)
+        def wrapper(*args, **kwargs):
+            start = time.perf_counter()
+            try:
+                return function(*args, **kwargs)
+            finally:
+                latencies.append(time.perf_counter() - start)
+
+        return staticmethod(wrapper) if is_static else wrapper
+
+    def reset(self):
+        # The wrappers hold on to their stage's list, so empty the lists rather than replacing them
+        for latencies in self.latencies.values():
+            latencies.clear()
+
+    def summary(self):
+        return {stage: latency_summary(latencies) for stage, latencies in self.latencies.items() if latencies}
+
+
+def latency_summary(latencies):
+    ordered = sorted(latencies)
+    summary = {'calls': len(ordered), 'total_seconds': round(sum(ordered), 3)}
+    for percentile in PERCENTILES:
+        summary[f'p{percentile}_ms'] = round(percentile_of(ordered, percentile) * 1000, 3)
+    return summary
+
+
+def percentile_of(ordered, percentile):
+    if not ordered:
+        return 0.0
+    # Nearest-rank percentile
+    rank = max(1, -(-percentile * len(ordered) // 100))
+    return ordered[rank - 1]
+
+
+def peak_rss_mb():
+    # ru_maxrss is in kilobytes on Linux and bytes on macOS
+    peak = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    return round(peak / (1024 * 1024 if sys.platform == 'darwin' else 1024), 1)
+
+
+def run_scale(scale, fixture_directory, log_level):
+    """Runs both passes at one scale in the current process and returns the results"""
+    logging.basicConfig(level=log_level, format='%(asctime)s %(levelname)s %(message)s', datefmt='%Y-%m-%d %H:%M:%S', force=True)
+
+    from benchmark import fixtures, local_cams
+    from inat_to_cams import cams_interface, cams_reader, cams_writer, config, inaturalist_reader, metrics, summary_logger, \
+        synchronise_inat_to_cams, translator
+
+    connection = local_cams.LocalCamsConnection()
+    cams_interface.use_connection(connection)
+
+    state_directory = tempfile.mkdtemp(prefix='inat_to_cams_benchmark_')
+    state = synchronise_inat_to_cams.synchroniser.state
+    state.path = os.path.join(state_directory, 'sync_state.json')
+    config.sync_configuration = {
+        BENCHMARK_CONFIG_NAME: {'file_prefix': 'benchmark', 'taxon_ids': list(config.taxon_mapping), 'place_ids': ['6803']}
+    }
+
+    def replay_search(place_ids, taxon_ids, time_of_previous_update):
+        observations = fixtures.replay_observations(fixture_directory, limit=scale)
+        # Match the updated_since filter applied by iNaturalist
+        return fixtures.ReplayPaginator([observation for observation in observations if observation.updated_at > time_of_previous_update])
+
+    original_search = inaturalist_reader.INatReader.__dict__['search_matching_observations_updated_since']
+    inaturalist_reader.INatReader.search_matching_observations_updated_since = staticmethod(replay_search)
+
+    timer = StageTimer()
+    stages = [
+        ('fetch_page', inaturalist_reader.INatReader, 'fetch_page'),
+        ('flatten', inaturalist_reader.INatReader, 'flatten'),
+        ('translate', translator.INatToCamsTranslator, 'translate'),
+        ('read_cams', cams_reader.CamsReader, 'read_observation'),
+        ('write_observation', cams_writer.CamsWriter, 'write_observation_over'),
+        ('write_feature', cams_writer.CamsWriter, 'write_feature'),
+        ('write_visit', cams_writer.CamsWriter, 'write_weed_visit'),
+    ]
+
+    results = {'scale': scale, 'passes': {}}
+    try:
+        with timer.instrument(stages):
+            for pass_name in PASSES:
+                # Start each pass from the beginning of the fixtures
+                if pass_name in PASSES_WITHOUT_HASHES:
+                    with contextlib.suppress(FileNotFoundError):
+                        os.remove(state.path)
+                else:
+                    with state.locked():
+                        state.configs.clear()
+                        state.commit()
+                summary_logger.log_header_written = False
+                timer.reset()
+                connection.reset_call_counts()
+                metrics.reset()
+
+                start = time.perf_counter()
+                counts = synchronise_inat_to_cams.synchroniser.sync_updated_observations()
+                elapsed = time.perf_counter() - start
+
+                observation_count = counts[BENCHMARK_CONFIG_NAME]
+                call_counts = connection.call_counts()
+                total_calls = sum(call_counts.values())
+                results['passes'][pass_name] = {
+                    'observations': observation_count,
+                    'seconds': round(elapsed, 3),
+                    'observations_per_second': round(observation_count / elapsed, 1) if elapsed else None,
+                    'cams_calls': dict(call_counts),
+                    'cams_calls_per_observation': round(total_calls / observation_count, 2) if observation_count else None,
+                    'stages': timer.summary(),
+                    'metrics': metrics.snapshot(),
+                }
+    finally:
+        inaturalist_reader.INatReader.search_matching_observations_updated_since = original_search
+
+    results['weed_locations'] = len(connection.layer.rows)
+    results['weed_visits'] = len(connection.table.rows)
+    results['peak_rss_mb'] = peak_rss_mb()
+    return results
+
+
+def run_scale_in_subprocess(scale, fixture_directory, log_level):
+    # A fresh interpreter per scale, so that peak RSS and caches are not carried over from smaller scales
+    context = multiprocessing.get_context('spawn')
+    with context.Pool(1) as pool:
+        return pool.apply(run_scale, (scale, fixture_directory, log_level))
+
+
+def run(scales, fixture_directory, log_level=logging.WARNING):
+    results = {
+        'run_at': datetime.datetime.now().isoformat(timespec='seconds'),
+        'python': sys.version.split()[0],
+        'fixtures': fixture_directory,
+        'scales': [],
+    }
+    for scale in scales:
+        logging.warning(f'Benchmarking {scale} observations')
+        results['scales'].append(run_scale_in_subprocess(scale, fixture_directory, log_level))
+    return results
+
+
+def format_report(results):
+    lines = [f"Sync benchmark {results['run_at']} (Python {results['python']}, fixtures {results['fixtures']})", '']
+    for scale_results in results['scales']:
+        lines.append(f"## {scale_results['scale']} observations (peak RSS {scale_results['peak_rss_mb']} MB, "
+                     f"{scale_results['weed_locations']} weed locations and {scale_results['weed_visits']} visits in CAMS)")
+        for pass_name, pass_results in scale_results['passes'].items():
+            lines.append(f"{pass_name}: {pass_results['observations']} observations in {pass_results['seconds']}s, "
+                         f"{pass_results['observations_per_second']} obs/s, "
+                         f"{pass_results['cams_calls_per_observation']} CAMS calls/obs")
+            lines.append(f"    {'stage':<18}{'calls':>8}{'total s':>10}" + ''.join(f"{f'p{p} ms':>10}" for p in PERCENTILES))
+            for stage, stage_results in pass_results['stages'].items():
+                lines.append(f"    {stage:<18}{stage_results['calls']:>8}{stage_results['total_seconds']:>10}"
+                             + ''.join(f"{stage_results[f'p{p}_ms']:>10}" for p in PERCENTILES))
+        lines.append('')
+    return '\n'.join(lines)
+
+
+def compare_with_baseline(results, baseline, tolerance):
+    """Returns a description of each pass whose throughput has dropped by more than tolerance (a fraction)"""
+    baseline_passes = {(scale_results['scale'], pass_name): pass_results
+                       for scale_results in baseline['scales']
+                       for pass_name, pass_results in scale_results['passes'].items()}
+    regressions = []
+    for scale_results in results['scales']:
+        for pass_name, pass_results in scale_results['passes'].items():
+            previous = baseline_passes.get((scale_results['scale'], pass_name))
+            if not previous or not previous['observations_per_second'] or not pass_results['observations_per_second']:
+                continue
+            change = pass_results['observations_per_second'] / previous['observations_per_second'] - 1
+            if change < -tolerance:
+                regressions.append(f"{scale_results['scale']} observations, {pass_name} pass: "
+                                   f"{previous['observations_per_second']} -> {pass_results['observations_per_second']} obs/s ({change:+.0%})")
+    return regressions
+
+
+def load_results(path):
+    with open(path, encoding='utf-8') as results_file:
+        return json.load(results_file)
+
+
+def save_results(results, path):
+    with open(path, 'w', encoding='utf-8') as results_file:
+        json.dump(results, results_file, indent=2)
@@ -13,115 +13,154 @@
 #  See the License for the specific language governing permissions and
 #  limitations under the License.
 #  ====================================================================
-import logging
+import datetime
+from typing import Optional
+
+from inat_to_cams.record import Record, stable_hash
+
 FLOAT_DELTA = 1e-9
+# Decimal places of the coordinates included in the content hash, in line with FLOAT_DELTA
+COORDINATE_PLACES = 9
 
 
-class CamsFeature:
+class Geolocation:
+    """A WGS84 point, held as plain floats rather than an arcgis.geometry.Point"""
+    __slots__ = ('x', 'y', 'wkid')
 
-    def __init__(self, geolocation, weed_location, latest_weed_visit):
-        self.geolocation = geolocation
-        self.weed_location = weed_location
-        self.latest_weed_visit = latest_weed_visit        
+    def __init__(self, x, y, wkid=4326):
+        self.x = x
+        self.y = y
+        self.wkid = wkid
+
+    @classmethod
+    def from_geometry(cls, geometry):
+        # eg the geometry of a feature read from CAMS
+        if not geometry:
+            return None
+        return cls(geometry['x'], geometry['y'], geometry.get('spatialReference', {}).get('wkid', 4326))
+
+    def as_geometry(self):
+        # The geometry for an edit_features add or update
+        return {'x': self.x, 'y': self.y, 'spatialReference': {'wkid': self.wkid}}
 
     def __eq__(self, other):
-        if type(other) is type(self):
-            geolocation_comparison = abs(self.geolocation['x'] - other.geolocation['x']) < FLOAT_DELTA and abs(self.geolocation['y'] - other.geolocation['y'])<FLOAT_DELTA
-            weed_location_comparison = self.weed_location == other.weed_location
-            latest_weed_visit_comparison = self.latest_weed_visit == other.latest_weed_visit
-            return geolocation_comparison and weed_location_comparison and latest_weed_visit_comparison
- 
-        return False
+        return type(other) is type(self) and self.x == other.x and self.y == other.y and self.wkid == other.wkid
 
     def __hash__(self):
-        return hash(tuple(sorted(self.__dict__.items())))
+        return hash((self.x, self.y, self.wkid))
 
     def __str__(self):
-        return str(self.__dict__)
+        return str(self.as_geometry())
 
     def __repr__(self):
-        return str(self.__dict__)
+        return str(self.as_geometry())
 
 
-class WeedLocation:
+class CamsFeature:
+    __slots__ = ('geolocation', 'weed_location', 'latest_weed_visit')
 
-    def __init__(self):
-        self.object_id = None
-        self.global_id = None
-        self.date_first_observed = None
-        self.species = None
-        self.data_source = None
-        self.location_details = None
-        self.iNaturalist_longitude = None
-        self.iNaturalist_latitude = None
-        self.effort_to_control = None
-        self.current_status = None
-        self.external_url = None
-        self.image_urls = None
-        self.image_attribution = None
-        self.location_accuracy = None
-        self.audit_log = None
-        self.other_weed_details = None
+    def __init__(self, geolocation, weed_location, latest_weed_visit):
+        self.geolocation = geolocation
+        self.weed_location = weed_location
+        self.latest_weed_visit = latest_weed_visit
+
+    def geolocation_equals(self, other):
+        return abs(self.geolocation.x - other.geolocation.x) < FLOAT_DELTA and abs(self.geolocation.y - other.geolocation.y) < FLOAT_DELTA
 
     def __eq__(self, other):
         if type(other) is type(self):
-            ignore_keys = ['object_id', 'global_id', 'audit_log', "current_status", "effort_to_control"]
-            ka = set(self.__dict__).difference(ignore_keys)
-            kb = set(other.__dict__).difference(ignore_keys)
-            return ka == kb and all(self.__dict__[k] == other.__dict__[k] for k in ka)
+            return self.geolocation_equals(other) and self.weed_location == other.weed_location and self.latest_weed_visit == other.latest_weed_visit
+
         return False
 
+    @property
+    def content_hash(self):
+        # Not cached, since the weed location and visit can be changed in place. They cache their own hashes.
+        coordinates = (round(self.geolocation.x, COORDINATE_PLACES), round(self.geolocation.y, COORDINATE_PLACES)) if self.geolocation else None
+        return stable_hash((coordinates, content_hash_of(self.weed_location), content_hash_of(self.latest_weed_visit)))
+
+    def changed_fields(self, other):
+        """Returns the changed fields compared with other, with the weed location and visit fields qualified by
+        their attribute, eg ['geolocation', 'weed_location.species', 'latest_weed_visit.height']"""
+        if type(other) is not type(self):
+            return list(self.__slots__)
+        changed = [] if self.geolocation_equals(other) else ['geolocation']
+        for attribute in ('weed_location', 'latest_weed_visit'):
+            value, other_value = getattr(self, attribute), getattr(other, attribute)
+            if isinstance(value, Record):
+                changed.extend(f'{attribute}.{field}' for field in value.changed_fields(other_value))
+            elif value != other_value:
+                changed.append(attribute)
+        return changed
+
     def __hash__(self):
-        return hash(tuple(sorted(self.__dict__.items())))
+        return hash(self.content_hash)
 
     def __str__(self):
-        return str(self.__dict__)
+        return str({attribute: getattr(self, attribute) for attribute in self.__slots__})
 
     def __repr__(self):
-        return str(self.__dict__)
+        return str(self)
 
 
-class WeedVisit:
-
-    def __init__(self):
-        self.object_id = None
-        self.height = None
-        self.area = None
-        self.radius_surveyed = None
-        self.observation_quality = None
-        self.site_difficulty = None
-        self.date_visit_made = None
-        self.follow_up_date = None
-        self.phenology = None
-        self.visit_status = None
-
-        self.treated = None
-        self.how_treated = None
-        self.treatment_substance = None
-        self.treatment_details = None
-
-        self.external_id = None
-        self.external_url = None
-        self.notes = None
-        
-        # New fields for tracking updates
-        self.recorded_by_user_id = None
-        self.recorded_by_username = None
-        self.recorded_date = None
+def content_hash_of(value):
+    return value.content_hash if isinstance(value, Record) else stable_hash(value)
 
-    def __eq__(self, other):
-        if type(other) is type(self):
-            ignore_keys = ['object_id']
-            ka = set(self.__dict__).difference(ignore_keys)
-            kb = set(other.__dict__).difference(ignore_keys)
-            return ka == kb and all(self.__dict__[k] == other.__dict__[k] for k in ka)
-        return False
 
-    def __hash__(self):
-        return hash(tuple(sorted(self.__dict__.items())))
+class WeedLocation(Record):
+    __slots__ = ('object_id', 'global_id', 'date_first_observed', 'species', 'data_source', 'location_details',
+                 'iNaturalist_longitude', 'iNaturalist_latitude', 'effort_to_control', 'current_status', 'external_url',
+                 'image_urls', 'image_attribution', 'location_accuracy', 'audit_log', 'other_weed_details')
+    IGNORED_FIELDS = frozenset({'object_id', 'global_id', 'audit_log', 'current_status', 'effort_to_control'})
 
-    def __str__(self):
-        return str(self.__dict__)
+    def __init__(self):
+        self.object_id: Optional[int] = None
+        self.global_id: Optional[str] = None
+        self.date_first_observed: Optional[datetime.datetime] = None
+        self.species: Optional[str] = None
+        self.data_source: Optional[str] = None
+        self.location_details: Optional[str] = None
+        self.iNaturalist_longitude: Optional[float] = None
+        self.iNaturalist_latitude: Optional[float] = None
+        self.effort_to_control: Optional[int] = None
+        self.current_status: Optional[str] = None
+        self.external_url: Optional[str] = None
+        self.image_urls: Optional[str] = None
+        self.image_attribution: Optional[str] = None
+        self.location_accuracy: Optional[int] = None
+        self.audit_log: Optional[str] = None
+        self.other_weed_details: Optional[str] = None
+
+
+class WeedVisit(Record):
+    __slots__ = ('object_id', 'height', 'area', 'radius_surveyed', 'observation_quality', 'site_difficulty',
+                 'date_visit_made', 'follow_up_date', 'phenology', 'visit_status', 'treated', 'how_treated',
+                 'treatment_substance', 'treatment_details', 'external_id', 'external_url', 'notes',
+                 'recorded_by_user_id', 'recorded_by_username', 'recorded_date')
+    IGNORED_FIELDS = frozenset({'object_id'})
 
-    def __repr__(self):
-        return str(self.__dict__)
+    def __init__(self):
+        self.object_id: Optional[int] = None
+        self.height: Optional[float] = None
+        self.area: Optional[float] = None
+        self.radius_surveyed: Optional[float] = None
+        self.observation_quality: Optional[str] = None
+        self.site_difficulty: Optional[str] = None
+        self.date_visit_made: Optional[datetime.datetime] = None
+        self.follow_up_date: Optional[datetime.datetime] = None
+        self.phenology: Optional[str] = None
+        self.visit_status: Optional[str] = None
+
+        self.treated: Optional[str] = None
+        self.how_treated: Optional[str] = None
+        self.treatment_substance: Optional[str] = None
+        self.treatment_details: Optional[str] = None
+
+        self.external_id: Optional[str] = None
+        self.external_url: Optional[str] = None
+        self.notes: Optional[str] = None
+        
+        # New fields for tracking updates
+        self.recorded_by_user_id: Optional[int] = None
+        self.recorded_by_username: Optional[str] = None
+        self.recorded_date: Optional[datetime.datetime] = None
@@ -14,18 +14,22 @@
 #  limitations under the License.
 #  ====================================================================
 
+import json
 import logging
 import os
 
 import arcgis
 from retry import retry
 
-from inat_to_cams import config, setup_logging
+from inat_to_cams import config, metrics, setup_logging
+from inat_to_cams.record import stable_hash
+
+DEFAULT_SCAN_PAGE_SIZE = 2000
 
 
 class CamsConnection:
 
-    @retry(delay=5, tries=3)
+    @retry(delay=5, tries=3, logger=metrics.cams_retry_logger)
     def __init__(self):
         print(f"Connecting to {os.environ['ARCGIS_URL']}")
         # self.gis = arcgis.GIS(profile='econet')
@@ -44,7 +48,6 @@ class CamsConnection:
         print("Connected")
 
         setup_logging.SetupLogging()
-        logging.basicConfig(level=logging.INFO, format='%(asctime)s %(levelname)s %(message)s', datefmt='%Y-%m-%d %H:%M:%S', force=True)
         logging.info(f"Successfully logged in to {self.item.type} '{self.item.title}' as '{self.gis.properties.user.username}'")
 
         self.layer = self.item.layers[0]
@@ -59,51 +62,122 @@ class CamsConnection:
         assert actual_table_name == expected_table_name, f'Expected table name to be {expected_table_name} but found {actual_table_name}'
 
         self.test_schema = ['iNat_to_CAMS_Dev', 'XXX Nigel_Updated_EasyEditor_DEV - clone of CAMS Weeds (FL_BASE ALL)' ]
+        self.scan_page_size = DEFAULT_SCAN_PAGE_SIZE
 
     def is_test_schema(self):
         return self.item.title in self.test_schema or 'clone of CAMS Weeds (FL_BASE ALL)' in self.item.title
 
-    @retry(delay=5, tries=3)
+    @retry(delay=5, tries=3, logger=metrics.cams_retry_logger)
     def query_weed_visits_table(self, query_table):
-        return self.table.query(where=query_table, order_by_fields='OBJECTID')
+        with metrics.span('cams_request', entity='Visits_Table', operation='query'):
+            return self.table.query(where=query_table, order_by_fields='OBJECTID')
 
-    @retry(delay=5, tries=3)
+    @retry(delay=5, tries=3, logger=metrics.cams_retry_logger)
     def query_weed_visits_table_ids(self, query_table):
-        return self.table.query(where=query_table, order_by_fields='OBJECTID', returnIdsOnly=True)
+        with metrics.span('cams_request', entity='Visits_Table', operation='query_ids'):
+            return self.table.query(where=query_table, order_by_fields='OBJECTID', returnIdsOnly=True)
 
-    @retry(delay=5, tries=3)
+    @retry(delay=5, tries=3, logger=metrics.cams_retry_logger)
     def query_weed_location_layer(self, query_layer):
-        return self.layer.query(where=query_layer)
+        with metrics.span('cams_request', entity='WeedLocations', operation='query'):
+            return self.layer.query(where=query_layer)
 
-    @retry(delay=5, tries=3)
+    @retry(delay=5, tries=3, logger=metrics.cams_retry_logger)
     def query_weed_location_layer_limit_records(self, query_layer, max_record_count):
-        return self.layer.query(where=query_layer, result_record_count=max_record_count, return_all_records=False)
-
-    @retry(delay=5, tries=3)
+        with metrics.span('cams_request', entity='WeedLocations', operation='query'):
+            return self.layer.query(where=query_layer, result_record_count=max_record_count, return_all_records=False)
+
+    def scan_weed_location_layer(self, query_layer, out_fields='*', page_size=None):
+        return self.scan(self.layer, query_layer, out_fields, page_size)
+
+    def scan_weed_visits_table(self, query_table, out_fields='*', page_size=None):
+        return self.scan(self.table, query_table, out_fields, page_size)
+
+    def scan(self, entity, where='1=1', out_fields='*', page_size=None):
+        # Yields the attributes of each matching row in OBJECTID order, holding at most a few pages in memory.
+        # Pages are read using keyset paging (OBJECTID > last OBJECTID read).
+        page_size = min(page_size or self.scan_page_size, entity.properties.get('maxRecordCount') or self.scan_page_size)
+        if out_fields != '*':
+            fields = out_fields.split(',') if isinstance(out_fields, str) else list(out_fields)
+            if 'OBJECTID' not in fields:
+                fields.insert(0, 'OBJECTID')
+            out_fields = ','.join(fields)
+
+        last_object_id = None
+        while True:
+            page_where = where if last_object_id is None else f'({where}) AND OBJECTID > {last_object_id}'
+            rows = self.query_page(entity, page_where, out_fields, page_size)
+            yield from rows
+            if len(rows) < page_size:
+                return
+            last_object_id = rows[-1]['OBJECTID']
+
+    @retry(delay=5, tries=3, logger=metrics.cams_retry_logger)
+    def query_page(self, entity, where, out_fields, page_size):
+        with metrics.span('cams_request', entity=entity.properties.get('name'), operation='query_page'):
+            feature_set = entity.query(where=where, out_fields=out_fields, order_by_fields='OBJECTID ASC',
+                                       result_record_count=page_size, return_all_records=False, return_geometry=False)
+        return [feature.attributes for feature in feature_set.features]
+
+    @retry(delay=5, tries=3, logger=metrics.cams_retry_logger)
     def query_weed_location_layer_wgs84(self, query_layer):
-        results = self.layer.query(where=query_layer, out_sr=4326)
+        with metrics.span('cams_request', entity='WeedLocations', operation='query'):
+            results = self.layer.query(where=query_layer, out_sr=4326)
         #logging.info(f"Found Location Layer sgs84 {results}")
         return results
 
-    @retry(delay=5, tries=3)
+    @retry(delay=5, tries=3, logger=metrics.cams_retry_logger)
     def add_weed_location_layer_row(self, new_layer_row):
-        results = self.layer.edit_features(adds=new_layer_row)
+        results = self.edit_features(self.layer, 'add', new_layer_row)
         assert len(results['addResults']) == 1
         assert results['addResults'][0]['success'], f"Error writing WeedLocation {results['addResults'][0]}"
         return results['addResults'][0]['globalId'], results['addResults'][0]['objectId']
 
-    @retry(delay=5, tries=3)
+    @retry(delay=5, tries=3, logger=metrics.cams_retry_logger)
     def update_weed_location_layer_row(self, new_layer_row):
-        results = self.layer.edit_features(updates=new_layer_row)
+        results = self.edit_features(self.layer, 'update', new_layer_row)
         assert len(results['updateResults']) == 1
         assert results['updateResults'][0]['success'], f"Error writing WeedLocation {results['updateResults'][0]}"
 
+    @retry(delay=5, tries=3, logger=metrics.cams_retry_logger)
+    def update_weed_location_layer_rows(self, new_layer_rows):
+        results = self.edit_features(self.layer, 'update', new_layer_rows)
+        assert len(results['updateResults']) == len(new_layer_rows)
+        return results['updateResults']
+
+    def add_weed_visits_table_row(self, new_table_row):
+        results = self.edit_features(self.table, 'add', new_table_row)
+        assert len(results['addResults']) == 1
+        assert results['addResults'][0]['success'], f"Error writing WeedVisits {results['addResults'][0]}"
+        return results['addResults'][0]['objectId']
+
+    def update_weed_visits_table_row(self, new_table_row):
+        results = self.edit_features(self.table, 'update', new_table_row)
+        assert len(results['updateResults']) == 1
+        assert results['updateResults'][0]['success'], f"Error writing WeedVisits {results['updateResults'][0]}"
+
+    @retry(delay=5, tries=3, logger=metrics.cams_retry_logger)
+    def edit_rows(self, entity_name, operation, rows):
+        # Writes many WeedLocations or Visits_Table rows in one request, returning the result for each row in order
+        entity = self.layer if entity_name == 'WeedLocations' else self.table
+        results = self.edit_features(entity, operation, rows)[f'{operation}Results']
+        assert len(results) == len(rows)
+        return results
+
+    def edit_features(self, entity, operation, rows):
+        entity_name = entity.properties.get('name')
+        with metrics.span('cams_request', entity=entity_name, operation=operation):
+            results = entity.edit_features(**{f'{operation}s': rows})
+        metrics.increment('cams_rows_written', len(rows), entity=entity_name, operation=operation)
+        metrics.increment('cams_bytes_written', len(json.dumps(rows, default=str)), entity=entity_name)
+        return results
+
     def delete_visit_rows_with_object_id_gt(self, object_id):
         query = f"OBJECTID > {object_id}"
         self.delete_table_rows_if_allowed(query)
 
 
-    @retry(delay=5, tries=3)
+    @retry(delay=5, tries=3, logger=metrics.cams_retry_logger)
     def delete_table_rows_if_allowed(self, query):
         logging.info(f'Deleting table rows where {query}')
         if self.is_test_schema():
@@ -117,7 +191,7 @@ class CamsConnection:
         query = f"OBJECTID > {object_id}"
         self.delete_layer_rows_if_allowed(query)
 
-    @retry(delay=5, tries=3)
+    @retry(delay=5, tries=3, logger=metrics.cams_retry_logger)
     def delete_layer_rows_if_allowed(self, query):
         logging.info(f'Deleting layer rows where {query}')
         if self.is_test_schema():
@@ -165,7 +239,7 @@ class CamsConnection:
         self.delete_table_rows_if_allowed(query_table_rows)
         return len(inat_refs)
 
-    @retry(delay=5, tries=3)
+    @retry(delay=5, tries=3, logger=metrics.cams_retry_logger)
     def visits_row_count(self, inat_id):
         query = f"iNatRef='{inat_id}'"
         row_count = self.table.query(where=query, return_count_only=True)
@@ -180,7 +254,7 @@ class CamsConnection:
         logging.info(f'Reading visits row {row.features[index].attributes}')
         return row.features[index].attributes
 
-    @retry(delay=5, tries=3)
+    @retry(delay=5, tries=3, logger=metrics.cams_retry_logger)
     def visits_row_count_with_same_locations_feature_as_visits_row(self, inat_id):
         query = f"iNatRef='{inat_id}'"
         row = self.query_weed_visits_table(query)
@@ -189,7 +263,7 @@ class CamsConnection:
         logging.info(f'Global id {global_id}')
         return self.table.query(where=f"GUID_visits='{global_id}'", return_count_only=True)
 
-    @retry(delay=5, tries=3)
+    @retry(delay=5, tries=3, logger=metrics.cams_retry_logger)
     def get_feature_global_id(self, inat_id):
         query = f"iNatRef='{inat_id}'"
         row = self.query_weed_visits_table(query)
@@ -215,46 +289,108 @@ class CamsConnection:
 
 
 class CamsSchemaComparator:
+    """Checks that the CAMS feature layer and table have the fields, types, lengths and coded values we expect.
+
+    Given the sync state, the fingerprint of each entity's expected schema and actual field definitions is stored
+    once verified, and the comparison is skipped while the fingerprint is unchanged.
+    """
+
+    def __init__(self, state=None):
+        self.state = state
+        self.updated = False
+
     def compare(self, schema_entity):
         if schema_entity == 'WeedLocations':
-            cams_entity = connection.layer
+            cams_entity = get_connection().layer
         elif schema_entity == 'Visits_Table':
-            cams_entity = connection.table
+            cams_entity = get_connection().table
         else:
             raise ValueError(f'schema_entity {schema_entity} not known')
 
-        for key in config.cams_schema[schema_entity]:
-            schema_field = config.cams_schema[schema_entity][key]
-            expected_name = schema_field['name']
-            expected_type = f"esriFieldType{schema_field['type']}"
-            expected_values = ''
-            if expected_name == 'SpeciesDropDown':
-                expected_values = config.taxon_mapping.values()
-            elif 'values' in schema_field:
-                expected_values = list(schema_field['values'].values())
+        expected_fields = self.expected_fields(schema_entity)
+        actual_fields = {field['name']: self.field_definition(field) for field in cams_entity.properties.fields}
+        field_hashes = {name: stable_hash(definition) for name, definition in actual_fields.items()}
+        fingerprint = stable_hash((expected_fields, sorted(field_hashes.items())))
+
+        verified = self.state.schema_fingerprint(schema_entity) if self.state else None
+        if verified and verified['fingerprint'] == fingerprint:
+            logging.info(f"Actual '{schema_entity}' schema is unchanged since it was last verified")
+            return
+        if verified:
+            self.log_drift(schema_entity, verified['fields'], field_hashes)
 
-            fields = [x for x in cams_entity.properties.fields if x.name == expected_name]
-            assert len(fields) == 1, \
-                f"Expected CAMS '{schema_entity}' schema to have a field with name '{expected_name}'"
-            actual_field = fields[0]
+        mismatches = [mismatch for expected_field in expected_fields
+                      for mismatch in self.field_mismatches(schema_entity, expected_field, actual_fields.get(expected_field[0]))]
+        assert not mismatches, '\n'.join(mismatches)
 
-            assert actual_field['type'] == expected_type, \
-                f"Expected CAMS '{schema_entity}' field '{schema_field['name']}' to have type '{expected_type}' but found type '{actual_field['type']}'"
+        logging.info(f"Actual '{schema_entity}' schema matches expected schema")
+        if self.state:
+            self.state.set_schema_fingerprint(schema_entity, {'fingerprint': fingerprint, 'fields': field_hashes})
+            self.updated = True
+
+    @staticmethod
+    def expected_fields(schema_entity):
+        expected_fields = []
+        for schema_field in config.cams_schema[schema_entity].values():
+            expected_type = f"esriFieldType{schema_field['type']}"
+            expected_length = schema_field['length'] if expected_type == 'esriFieldTypeString' else None
+            expected_values = ()
+            if schema_field['name'] == 'SpeciesDropDown':
+                expected_values = tuple(config.taxon_mapping.values())
+            elif 'values' in schema_field:
+                expected_values = tuple(schema_field['values'].values())
+            expected_fields.append((schema_field['name'], expected_type, expected_length, expected_values))
+        return tuple(expected_fields)
+
+    @staticmethod
+    def field_definition(field):
+        coded_values = ()
+        if field['domain'] and 'codedValues' in field['domain']:
+            coded_values = tuple(coded_value['code'] for coded_value in field['domain']['codedValues'])
+        return field['type'], field.get('length'), coded_values
+
+    @staticmethod
+    def field_mismatches(schema_entity, expected_field, actual_field):
+        expected_name, expected_type, expected_length, expected_values = expected_field
+        if actual_field is None:
+            return [f"Expected CAMS '{schema_entity}' schema to have a field with name '{expected_name}'"]
+
+        actual_type, actual_length, actual_values = actual_field
+        mismatches = []
+        if actual_type != expected_type:
+            mismatches.append(f"Expected CAMS '{schema_entity}' field '{expected_name}' to have type '{expected_type}' but found type '{actual_type}'")
+        if expected_length is not None and actual_length != expected_length:
+            mismatches.append(f"Expected CAMS '{schema_entity}' field '{expected_name}' to have length '{expected_length}' but found length '{actual_length}'")
+        missing_values = [value for value in expected_values if value not in actual_values]
+        if missing_values:
+            mismatches.append(f"Expected CAMS '{schema_entity}' field '{expected_name}' to include values '{missing_values}' but found values '{list(actual_values)}'")
+        return mismatches
+
+    @staticmethod
+    def log_drift(schema_entity, verified_hashes, field_hashes):
+        drifted = sorted(name for name in verified_hashes.keys() | field_hashes.keys()
+                         if verified_hashes.get(name) != field_hashes.get(name))
+        if drifted:
+            logging.warning(f"CAMS '{schema_entity}' fields changed since the schema was last verified: {', '.join(drifted)}")
+        else:
+            logging.info(f"Expected '{schema_entity}' schema changed since it was last verified")
 
-            if expected_type == 'esriFieldTypeString':
-                expected_length = schema_field['length']
-                assert actual_field['length'] == expected_length, \
-                    f"Expected CAMS '{schema_entity}' field '{schema_field['name']}' to have length '{expected_length}' but found length '{actual_field['length']}'"
 
-            actual_values = ""
-            if actual_field['domain'] and 'codedValues' in actual_field['domain']:
-                coded_values = actual_field['domain']['codedValues']
-                actual_values = list(map(lambda x: x['code'], coded_values))
+def get_connection():
+    # Connect to CAMS on first use rather than on import, so that use_connection() can be called before anything connects
+    if 'connection' not in globals():
+        use_connection(CamsConnection())
+    return connection
 
-            assert set(expected_values).issubset(set(actual_values)), \
-                f"Expected CAMS '{schema_entity}' field '{schema_field['name']}' to include values '{expected_values}' but found values '{actual_values}'"
 
-        logging.info(f"Actual '{schema_entity}' schema matches expected schema")
+def use_connection(new_connection):
+    # Replaces the connection used by the readers and writers, eg with the local stand-in used by the benchmarks
+    global connection
+    connection = new_connection
 
 
-connection = CamsConnection()
+def __getattr__(name):
+    # Called for cams_interface.connection until a connection has been made
+    if name == 'connection':
+        return get_connection()
+    raise AttributeError(f"module '{__name__}' has no attribute '{name}'")
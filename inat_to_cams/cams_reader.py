@@ -17,11 +17,24 @@
 import logging
 from datetime import datetime
 
-from inat_to_cams import cams_interface, cams_feature, config
+from inat_to_cams import cams_interface, cams_feature, config, metrics
+
+# iNaturalist ids or GlobalIDs in each CAMS query made by read_observations, keeping the where clause short
+IDS_PER_QUERY = 200
+
+
+def as_sql_list(values):
+    return ', '.join(f"'{value}'" for value in values)
+
+
+def as_guid_key(guid):
+    # GlobalIDs may be written with or without braces and in either case
+    return guid.strip('{}').upper()
 
 
 class CamsReader:
 
+    @metrics.timed('sync_stage', stage='read_observation')
     def read_observation(self, inat_id):
         query_table = f"iNatRef='{inat_id}'"
         row_ids = cams_interface.connection.query_weed_visits_table_ids(query_table)
@@ -33,73 +46,115 @@ class CamsReader:
             # Extract OBJECTID from each feature
             object_ids = [feature.attributes[row_ids.object_id_field_name] for feature in row_ids.features]
         
-        logging.info(f'Found {len(object_ids)} object_ids: {object_ids}')
+        logging.debug('Found %d object_ids: %s', len(object_ids), object_ids)
             
         if not object_ids:
-            logging.info(f'No existing CAMS feature found for iNaturalist id {inat_id}')
+            logging.debug('No existing CAMS feature found for iNaturalist id %s', inat_id)
             return None
 
-        logging.info(f'Found existing CAMS feature with {len(object_ids)} visit rows for iNaturalist id {inat_id}')
+        logging.debug('Found existing CAMS feature with %d visit rows for iNaturalist id %s', len(object_ids), inat_id)
 
         latest_object_id = object_ids[-1]
         location_guid = None
 
         query_table = f"OBJECTID='{latest_object_id}'"
-        logging.info(f'Reading CAMS visits rows where {query_table}')
+        logging.debug('Reading CAMS visits rows where %s', query_table)
         visit_table_row = cams_interface.connection.query_weed_visits_table(query_table).features[0]
-        logging.info(f'Found visit table row {visit_table_row}')
-        visit = cams_feature.WeedVisit()
-        cams_schema_config = config.cams_schema_config
-        visit.object_id = visit_table_row.attributes['OBJECTID']
-        visit.external_id = visit_table_row.attributes['iNatRef']
-        visit.external_url = visit_table_row.attributes['iNaturalistURL']
-        visit.date_visit_made = self.as_datetime(visit_table_row.attributes['DateCheck'])
-        visit.height = visit_table_row.attributes['Height']
-        visit.area = visit_table_row.attributes['Area']
-        visit.radius_surveyed = visit_table_row.attributes['CheckedNearbyRadius']
-        visit.site_difficulty = cams_schema_config.cams_field_key('Visits_Table', 'Site difficulty', visit_table_row.attributes['SiteDifficulty'])
-        visit.follow_up_date = visit_table_row.attributes['DateForReturnVisit']
-        visit.phenology = cams_schema_config.cams_field_key('Visits_Table', 'Plant phenology->most common flowering/fruiting reproductive stage', visit_table_row.attributes['Flowering'])
-        visit.treated = cams_schema_config.cams_field_key('Visits_Table', 'Treated', visit_table_row.attributes['Treated'])
-        visit.how_treated = cams_schema_config.cams_field_key('Visits_Table', 'How treated', visit_table_row.attributes['HowTreated'])
-        visit.treatment_substance = cams_schema_config.cams_field_key('Visits_Table', 'Treatment substance', visit_table_row.attributes['TreatmentSubstance'])
-        visit.treatment_details = visit_table_row.attributes['TreatmentDetails']
-        visit.visit_status = cams_schema_config.cams_field_key('Visits_Table', 'WeedVisitStatus', visit_table_row.attributes['WeedVisitStatus'])
-        visit.observation_quality = cams_schema_config.cams_field_key('Visits_Table', 'ObservationQuality', visit_table_row.attributes['ObservationQuality'])
-        visit.notes = visit_table_row.attributes['Notes']
-        visit.recorded_by_user_id = visit_table_row.attributes.get('RecordedByUserId')
-        visit.recorded_by_username = visit_table_row.attributes.get('RecordedByUserName')
-        visit.recorded_date = self.as_datetime(visit_table_row.attributes['RecordedDate']) if visit_table_row.attributes.get('RecordedDate') else None
+        logging.debug('Found visit table row %s', visit_table_row)
+        visit = self.as_weed_visit(visit_table_row.attributes)
 
         guid = visit_table_row.attributes['GUID_visits']
 
         query_layer = f"GlobalID='{guid}'"
-        logging.info(f'Reading CAMS feature layer row where {query_layer}')
+        logging.debug('Reading CAMS feature layer row where %s', query_layer)
         rows = cams_interface.connection.query_weed_location_layer_wgs84(query_layer)
         
         for featureRow in rows.features:
-            location = cams_feature.WeedLocation()
-            logging.info(f'Found layer row {featureRow}')
-
-            location.object_id = featureRow.attributes['OBJECTID']
-            location.global_id = guid
-            location.date_first_observed = self.as_datetime(featureRow.attributes['DateDiscovered'])
-            location.species = featureRow.attributes['SpeciesDropDown']
-            location.data_source = featureRow.attributes['SiteSource']
-            location.location_details = featureRow.attributes['LocationInfo']
-            location.effort_to_control = featureRow.attributes['Urgency']
-            location.iNaturalist_longitude = featureRow.attributes['iNatLongitude']
-            location.iNaturalist_latitude = featureRow.attributes['iNatLatitude']
-            location.current_status = cams_schema_config.cams_field_key('WeedLocations', 'CurrentStatus', featureRow.attributes['ParentStatusWithDomain'])
-            location.image_urls = featureRow.attributes['ImageURLs']
-            location.image_attribution = featureRow.attributes['ImageAttribution']
-            location.location_accuracy = featureRow.attributes['LocationAccuracy']
-            location.audit_log = featureRow.attributes['audit_log']
-
-            # Temporarily until updated from weed visit by database trigger
-            location.external_url = featureRow.attributes['iNatURL']
-
-        return cams_feature.CamsFeature(featureRow.geometry, location, visit)
+            logging.debug('Found layer row %s', featureRow)
+            location = self.as_weed_location(featureRow.attributes, guid)
+
+        return cams_feature.CamsFeature(cams_feature.Geolocation.from_geometry(featureRow.geometry), location, visit)
+
+    @metrics.timed('sync_stage', stage='read_observations')
+    def read_observations(self, inat_ids):
+        # Reads the CAMS features for many iNaturalist ids at once, as read_observation does for one, returning them
+        # by iNaturalist id. Ids without a CAMS feature are left out.
+        visit_rows = {}
+        inat_ids = [str(inat_id) for inat_id in inat_ids]
+        for start in range(0, len(inat_ids), IDS_PER_QUERY):
+            query_table = f"iNatRef IN ({as_sql_list(inat_ids[start:start + IDS_PER_QUERY])})"
+            for row in cams_interface.connection.query_weed_visits_table(query_table).features:
+                # In OBJECTID order, so the latest visit is kept
+                visit_rows[row.attributes['iNatRef']] = row
+        logging.debug('Found existing CAMS features for %d of %d iNaturalist ids', len(visit_rows), len(inat_ids))
+
+        guids = list({row.attributes['GUID_visits'] for row in visit_rows.values()})
+        location_rows = {}
+        for start in range(0, len(guids), IDS_PER_QUERY):
+            query_layer = f"GlobalID IN ({as_sql_list(guids[start:start + IDS_PER_QUERY])})"
+            for row in cams_interface.connection.query_weed_location_layer_wgs84(query_layer).features:
+                location_rows[as_guid_key(row.attributes['GlobalID'])] = row
+
+        features = {}
+        for inat_id, visit_row in visit_rows.items():
+            guid = visit_row.attributes['GUID_visits']
+            location_row = location_rows.get(as_guid_key(guid))
+            if location_row is None:
+                logging.warning(f'No CAMS weed location found for the visit for iNaturalist id {inat_id}')
+                continue
+            features[inat_id] = cams_feature.CamsFeature(cams_feature.Geolocation.from_geometry(location_row.geometry),
+                                                         self.as_weed_location(location_row.attributes, guid),
+                                                         self.as_weed_visit(visit_row.attributes))
+        return features
+
+    def as_weed_visit(self, attributes):
+        visit = cams_feature.WeedVisit()
+        cams_schema_config = config.cams_schema_config
+        visit.object_id = attributes['OBJECTID']
+        visit.external_id = attributes['iNatRef']
+        visit.external_url = attributes['iNaturalistURL']
+        visit.date_visit_made = self.as_datetime(attributes['DateCheck'])
+        visit.height = attributes['Height']
+        visit.area = attributes['Area']
+        visit.radius_surveyed = attributes['CheckedNearbyRadius']
+        visit.site_difficulty = cams_schema_config.cams_field_key('Visits_Table', 'Site difficulty', attributes['SiteDifficulty'])
+        visit.follow_up_date = attributes['DateForReturnVisit']
+        visit.phenology = cams_schema_config.cams_field_key('Visits_Table', 'Plant phenology->most common flowering/fruiting reproductive stage', attributes['Flowering'])
+        visit.treated = cams_schema_config.cams_field_key('Visits_Table', 'Treated', attributes['Treated'])
+        visit.how_treated = cams_schema_config.cams_field_key('Visits_Table', 'How treated', attributes['HowTreated'])
+        visit.treatment_substance = cams_schema_config.cams_field_key('Visits_Table', 'Treatment substance', attributes['TreatmentSubstance'])
+        visit.treatment_details = attributes['TreatmentDetails']
+        visit.visit_status = cams_schema_config.cams_field_key('Visits_Table', 'WeedVisitStatus', attributes['WeedVisitStatus'])
+        visit.observation_quality = cams_schema_config.cams_field_key('Visits_Table', 'ObservationQuality', attributes['ObservationQuality'])
+        visit.notes = attributes['Notes']
+        visit.recorded_by_user_id = attributes.get('RecordedByUserId')
+        visit.recorded_by_username = attributes.get('RecordedByUserName')
+        visit.recorded_date = self.as_datetime(attributes['RecordedDate']) if attributes.get('RecordedDate') else None
+
+        return visit
+
+    def as_weed_location(self, attributes, guid):
+        cams_schema_config = config.cams_schema_config
+        location = cams_feature.WeedLocation()
+        location.object_id = attributes['OBJECTID']
+        location.global_id = guid
+        location.date_first_observed = self.as_datetime(attributes['DateDiscovered'])
+        location.species = attributes['SpeciesDropDown']
+        location.data_source = attributes['SiteSource']
+        location.location_details = attributes['LocationInfo']
+        location.effort_to_control = attributes['Urgency']
+        location.iNaturalist_longitude = attributes['iNatLongitude']
+        location.iNaturalist_latitude = attributes['iNatLatitude']
+        location.current_status = cams_schema_config.cams_field_key('WeedLocations', 'CurrentStatus', attributes['ParentStatusWithDomain'])
+        location.image_urls = attributes['ImageURLs']
+        location.image_attribution = attributes['ImageAttribution']
+        location.location_accuracy = attributes['LocationAccuracy']
+        location.audit_log = attributes['audit_log']
+        location.other_weed_details = attributes.get('OtherWeedDetails')
+
+        # Temporarily until updated from weed visit by database trigger
+        location.external_url = attributes['iNatURL']
+        return location
 
     def as_datetime(self, date_field):
         naive_datetime = datetime.fromtimestamp(date_field // 1000)
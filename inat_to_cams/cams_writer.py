@@ -16,17 +16,37 @@
 
 from datetime import datetime
 import logging
-from inat_to_cams import cams_interface, cams_reader, config, summary_logger
+from inat_to_cams import cams_interface, cams_reader, config, metrics, summary_logger
+
+
+# The WeedLocations fields written by write_feature, with the WeedLocation attribute holding each value
+LOCATION_FIELDS = [
+    ('Date First Observed', 'date_first_observed'),
+    ('Species', 'species'),
+    ('DataSource', 'data_source'),
+    ('Location details', 'location_details'),
+    ('Effort to control', 'effort_to_control'),
+    ('CurrentStatus', 'current_status'),
+    ('iNaturalistURL', 'external_url'),
+    ('Image URLs', 'image_urls'),
+    ('Image Attribution', 'image_attribution'),
+    ('Location Accuracy', 'location_accuracy'),
+    ('Other Weed Details', 'other_weed_details'),
+]
 
 
 class CamsWriter:
-    def __init__(self):
-        self.cams = cams_interface.connection
+    def __init__(self, connection=None):
+        # Another connection can be given to change how the rows are written, eg BatchedWrites
+        self.cams = connection or cams_interface.connection
 
     def write_observation(self, cams_feature, dry_run=False):
-        reader = cams_reader.CamsReader()
+        existing_feature = cams_reader.CamsReader().read_observation(cams_feature.latest_weed_visit.external_id)
+        return self.write_observation_over(cams_feature, existing_feature, dry_run)
+
+    def write_observation_over(self, cams_feature, existing_feature, dry_run=False):
+        # Writes the feature given the existing CAMS feature (or None) already read for its iNaturalist id
         inat_id = cams_feature.latest_weed_visit.external_id
-        existing_feature = reader.read_observation(inat_id)
 
         # Check if the latest visit record was created in CAMS. If so, we shouldn't update the visit record.
         update_visit_record = True
@@ -40,15 +60,17 @@ class CamsWriter:
                     date_str = existing_feature.weed_location.audit_log[:10]
                     # Parse the date string into a datetime object
                     rollover_date = datetime.strptime(date_str, '%Y-%m-%d')
-                    logging.info(f'Found rollover date in audit_log: {rollover_date}')
+                    logging.debug('Found rollover date in audit_log: %s', rollover_date)
                 except Exception as e:
-                    logging.info(f'Could not parse rollover date from audit_log: {e}')
+                    logging.debug('Could not parse rollover date from audit_log: %s', e)
             
             # Check if either the existing CAMS visit date or the rollover date is more recent than the iNat visit date
-            logging.info(f'DEBUG: Comparing dates - existing CAMS visit: {existing_feature.latest_weed_visit.date_visit_made}, rollover: {rollover_date}, new iNat visit: {cams_feature.latest_weed_visit.date_visit_made}')
+            logging.debug('Comparing dates - existing CAMS visit: %s, rollover: %s, new iNat visit: %s',
+                          existing_feature.latest_weed_visit.date_visit_made, rollover_date, cams_feature.latest_weed_visit.date_visit_made)
             if existing_feature.latest_weed_visit.date_visit_made > cams_feature.latest_weed_visit.date_visit_made or \
                (rollover_date is not None and rollover_date > cams_feature.latest_weed_visit.date_visit_made):
-                logging.info(f'Preserving CAMS status - visit date: {existing_feature.latest_weed_visit.date_visit_made}, rollover date: {rollover_date}, iNat date: {cams_feature.latest_weed_visit.date_visit_made}')
+                logging.debug('Preserving CAMS status - visit date: %s, rollover date: %s, iNat date: %s',
+                              existing_feature.latest_weed_visit.date_visit_made, rollover_date, cams_feature.latest_weed_visit.date_visit_made)
                 # Preserve the existing status and effort_to_control values
                 cams_feature.weed_location.current_status = existing_feature.weed_location.current_status
                 cams_feature.weed_location.effort_to_control = existing_feature.weed_location.effort_to_control
@@ -57,7 +79,8 @@ class CamsWriter:
                 update_visit_record = False
 
             if existing_feature == cams_feature:
-                logging.info('No relevant updates to observation')
+                self.log_outcome(cams_feature, 'No relevant updates', update_visit_record)
+                metrics.increment('sync_events', event='unchanged', config=summary_logger.config_name)
                 return
 
             #weed_geolocation_modified = existing_feature.geolocation != cams_feature.geolocation
@@ -65,37 +88,40 @@ class CamsWriter:
 
             weed_location_modified = existing_feature.weed_location != cams_feature.weed_location
             weed_visit_modified = existing_feature.latest_weed_visit != cams_feature.latest_weed_visit and update_visit_record
-            logging.info('Updating existing feature')
-            logging.info(f'Weed geolocation modified? : {weed_geolocation_modified}')
-            logging.info(f'Weed location modified? : {weed_location_modified}')
-            logging.info(f'Weed visit modified? : {weed_visit_modified}')
+            logging.debug('Updating existing feature: geolocation modified? %s, location modified? %s, visit modified? %s',
+                          weed_geolocation_modified, weed_location_modified, weed_visit_modified)
         else:
-            logging.info('Creating new feature')
+            logging.debug('Creating new feature')
             weed_geolocation_modified = True
             weed_location_modified = True
             weed_visit_modified = True
 
-        feature_written = False
-        if weed_geolocation_modified or weed_location_modified:
-            global_id, object_id = self.write_feature(cams_feature, inat_id, existing_feature, dry_run, weed_geolocation_modified)
-            feature_written = True
-        else:
+        if existing_feature:
             global_id = existing_feature.weed_location.global_id
             object_id = existing_feature.weed_location.object_id
-
-        if weed_visit_modified and update_visit_record:
-            new_weed_visit_record = self.write_weed_visit(cams_feature, existing_feature, global_id, object_id, dry_run)
-
-            if not feature_written:
-                # write the feature as well as the visit so we don't have to wait for the visit status to be synced to the parent weed instance (currently via a webhook)
-                self.write_feature(cams_feature, inat_id, existing_feature, dry_run, weed_geolocation_modified)  
+            # Write the visit first, so that the status it gives the weed location is written in the same update as
+            # any other changes, rather than waiting for it to be synced to the parent weed location (currently via a webhook)
+            if weed_visit_modified:
+                new_weed_visit_record = self.write_weed_visit(cams_feature, existing_feature, global_id, object_id, dry_run)
+            else:
+                new_weed_visit_record = False
+            if weed_geolocation_modified or weed_location_modified or weed_visit_modified:
+                self.write_feature(cams_feature, inat_id, existing_feature, dry_run, weed_geolocation_modified)
         else:
-            new_weed_visit_record = False
+            global_id, object_id = self.write_feature(cams_feature, inat_id, existing_feature, dry_run, weed_geolocation_modified)
+            new_weed_visit_record = self.write_weed_visit(cams_feature, existing_feature, global_id, object_id, dry_run)
 
-        self.write_summary_log(cams_feature, existing_feature, object_id, new_weed_visit_record, weed_geolocation_modified, weed_location_modified, weed_visit_modified)
+        description = self.write_summary_log(cams_feature, existing_feature, object_id, new_weed_visit_record, weed_geolocation_modified, weed_location_modified, weed_visit_modified)
+        self.log_outcome(cams_feature, f'{description} (object id {object_id})', update_visit_record)
 
         return global_id
 
+    def log_outcome(self, cams_feature, description, update_visit_record):
+        # The one line logged at INFO for each observation; set LOG_LEVEL=DEBUG for the details
+        preserved = '' if update_visit_record else ', CAMS status preserved'
+        logging.info(f'iNaturalist observation {cams_feature.latest_weed_visit.external_id} '
+                     f'({cams_feature.weed_location.species}, {cams_feature.weed_location.current_status}): {description}{preserved}')
+
     def write_summary_log(self, cams_feature, existing_feature, object_id, new_weed_visit_record, weed_geolocation_modified, weed_location_modified, weed_visit_modified):
         if not summary_logger.log_header_written:
             summary_logger.write_log_header()
@@ -103,8 +129,9 @@ class CamsWriter:
         if not summary_logger.config_name:
             summary_logger.write_config_name()
             summary_logger.config_name_written = True
-        summary_logger.write_summary_log(cams_feature, object_id, existing_feature, new_weed_visit_record, weed_geolocation_modified, weed_location_modified, weed_visit_modified)
+        return summary_logger.write_summary_log(cams_feature, object_id, existing_feature, new_weed_visit_record, weed_geolocation_modified, weed_location_modified, weed_visit_modified)
 
+    @metrics.timed('sync_stage', stage='write_weed_visit')
     def write_weed_visit(self, cams_feature, existing_feature, global_id, object_id, dry_run):
         weed_visit = cams_feature.latest_weed_visit
         new_data = [{
@@ -140,85 +167,64 @@ class CamsWriter:
         new_weed_visit_record = True
         # Determine whether to create a new visit record if controlled or updated after previous visit
         if existing_feature:
-            logging.info(f'New weed visit date: {weed_visit.date_visit_made}')
-            logging.info(f'Existing weed visit date: {existing_feature.latest_weed_visit.date_visit_made}')
-            logging.info(f'Dates equal? {weed_visit.date_visit_made == existing_feature.latest_weed_visit.date_visit_made}')
+            logging.debug('New weed visit date: %s, existing weed visit date: %s', weed_visit.date_visit_made, existing_feature.latest_weed_visit.date_visit_made)
             if weed_visit.date_visit_made == existing_feature.latest_weed_visit.date_visit_made:
                 new_weed_visit_record = False
 
         if not dry_run:
             if new_weed_visit_record:
-                logging.info(f'Adding CAMS Weed_Visits table row: {new_data}')
-                results = self.cams.table.edit_features(adds=new_data)
-                assert len(results['addResults']) == 1
-                assert results['addResults'][0]['success'], f"Error writing WeedVisits {results['addResults'][0]}"
+                logging.debug('Adding CAMS Weed_Visits table row: %s', new_data)
+                self.cams.add_weed_visits_table_row(new_data)
             else:
-                logging.info(f'Updating CAMS Weed_Visits table row: {new_data}')
+                logging.debug('Updating CAMS Weed_Visits table row: %s', new_data)
                 new_data[0]['attributes']['objectId'] = existing_feature.latest_weed_visit.object_id
-                results = self.cams.table.edit_features(updates=new_data)
-                assert len(results['updateResults']) == 1
-                assert results['updateResults'][0]['success'], f"Error writing WeedVisits {results['updateResults'][0]}"
+                self.cams.update_weed_visits_table_row(new_data)
         return new_weed_visit_record
 
+    @metrics.timed('sync_stage', stage='write_feature')
     def write_feature(self, cams_feature, inat_id, existing_feature, dry_run, write_geolocation):
         global_id = None
-        logging.info(f'Writing feature to CAMS with iNaturalist id {inat_id} geometry: {cams_feature.geolocation}')
+        logging.debug('Writing feature to CAMS with iNaturalist id %s geometry: %s', inat_id, cams_feature.geolocation)
         new_layer_row = [{            
             'attributes': {
             }
         }]
-        fields = [
-            ('Date First Observed', cams_feature.weed_location.date_first_observed),
-            ('Species', cams_feature.weed_location.species),
-            ('DataSource', cams_feature.weed_location.data_source),
-            ('Location details', cams_feature.weed_location.location_details),          
-            ('Effort to control', cams_feature.weed_location.effort_to_control),
-            ('CurrentStatus', cams_feature.weed_location.current_status),
-            ('iNaturalistURL', cams_feature.weed_location.external_url),
-            ('Image URLs', cams_feature.weed_location.image_urls),
-            ('Image Attribution', cams_feature.weed_location.image_attribution),
-            ('Location Accuracy', cams_feature.weed_location.location_accuracy)
-        ]
-        
-        if cams_feature.weed_location.other_weed_details:
-            fields.append(('Other Weed Details', cams_feature.weed_location.other_weed_details))
-            
+        weed_location = cams_feature.weed_location
+        if existing_feature:
+            # Only send the attributes that differ from the existing row
+            attributes = weed_location.changed_fields(existing_feature.weed_location, [attribute for _, attribute in LOCATION_FIELDS])
+        else:
+            attributes = [attribute for _, attribute in LOCATION_FIELDS]
+        fields = [(field_name, getattr(weed_location, attribute)) for field_name, attribute in LOCATION_FIELDS
+                  if attribute in attributes and (attribute != 'other_weed_details' or weed_location.other_weed_details)]
+
         if write_geolocation:
-            fields.append(('iNaturalist Longitude', cams_feature.weed_location.iNaturalist_longitude))
-            fields.append(('iNaturalist Latitude', cams_feature.weed_location.iNaturalist_latitude))
-            new_layer_row[0]['geometry']=cams_feature.geolocation           
-            logging.info(f'Weed geolocation has been modified in iNaturalist')
+            fields.append(('iNaturalist Longitude', weed_location.iNaturalist_longitude))
+            fields.append(('iNaturalist Latitude', weed_location.iNaturalist_latitude))
+            new_layer_row[0]['geometry']=cams_feature.geolocation.as_geometry()           
+            logging.debug('Weed geolocation has been modified in iNaturalist')
 
         if not existing_feature:
             fields.append(('GeoPrivacy', 'Open'))
             fields.append(('LandOwnership', 'NotAvailable'))
 
         [self.add_field(new_layer_row[0], 'WeedLocations', field) for field in fields]
-        if not dry_run:
-            if existing_feature:
-                global_id = existing_feature.weed_location.global_id
-                object_id = existing_feature.weed_location.object_id
+        if existing_feature:
+            global_id = existing_feature.weed_location.global_id
+            object_id = existing_feature.weed_location.object_id
+            if not fields:
+                logging.debug('CAMS WeedLocations layer row %s is already up to date', object_id)
+            elif not dry_run:
                 new_layer_row[0]['attributes']['objectId'] = object_id
-                logging.info(f'Updating CAMS WeedLocations layer: {new_layer_row}')
-                cams_interface.connection.update_weed_location_layer_row(new_layer_row)
-            else:
-                logging.info(f'Adding CAMS WeedLocations layer: {new_layer_row}')
-                global_id, object_id = cams_interface.connection.add_weed_location_layer_row(new_layer_row)
+                logging.debug('Updating CAMS WeedLocations layer: %s', new_layer_row)
+                self.cams.update_weed_location_layer_row(new_layer_row)
+        elif not dry_run:
+            logging.debug('Adding CAMS WeedLocations layer: %s', new_layer_row)
+            global_id, object_id = self.cams.add_weed_location_layer_row(new_layer_row)
+        else:
+            object_id = None
         return global_id, object_id
 
-    def get_observation_value(self, observation, key):
-        if observation.ofvs:
-            list_val = [x for x in observation.ofvs if x.name == key]
-            if list_val:
-                return list_val[0].value
-        return None
-
-    def get_observation_value_as_date(self, observation, key):
-        value = self.get_observation_value(observation, key)
-        if value:
-            return datetime.fromisoformat(value)
-        return None
-
     def add_attribute_if_not_none(self, entity, name, value):
         if value:
             entity[0]['attributes'][name] = value
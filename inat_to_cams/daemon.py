@@ -0,0 +1,109 @@
+#  ====================================================================
+#  Copyright 2026 EcoNet.NZ
+#
+#  Licensed under the Apache License, Version 2.0 (the "License");
+#  you may not use this file except in compliance with the License.
+#  You may obtain a copy of the License at
+#
+#      http://www.apache.org/licenses/LICENSE-2.0
+#
+#  Unless required by applicable law or agreed to in writing, software
+#  distributed under the License is distributed on an "AS IS" BASIS,
+#  WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+#  See the License for the specific language governing permissions and
+#  limitations under the License.
+#  ====================================================================
+
+import logging
+import signal
+import time
+
+from inat_to_cams import config, metrics, metrics_textfile, summary_logger
+
+DEFAULT_MIN_INTERVAL_SECONDS = 120
+DEFAULT_MAX_INTERVAL_SECONDS = 3600
+BACKOFF_FACTOR = 2
+
+
+class ConfigSchedule:
+    """When to next poll a sync configuration for updated observations"""
+
+    def __init__(self, config_name, min_interval, max_interval, now):
+        self.config_name = config_name
+        self.min_interval = min_interval
+        self.max_interval = max_interval
+        self.interval = min_interval
+        self.next_poll = now
+
+    def polled(self, found_changes, now):
+        # Poll again soon while observations are being updated, and back off while they aren't
+        if found_changes:
+            self.interval = self.min_interval
+        else:
+            self.interval = min(self.max_interval, self.interval * BACKOFF_FACTOR)
+        self.next_poll = now + self.interval
+
+
+class SyncDaemon:
+    """Keeps syncing in one process, reusing the CAMS connection, polling each configuration on its own schedule.
+
+    On SIGTERM or SIGINT, the observation being synced is finished and the sync state is committed before stopping.
+    """
+
+    def __init__(self, synchroniser, min_interval=DEFAULT_MIN_INTERVAL_SECONDS, max_interval=DEFAULT_MAX_INTERVAL_SECONDS):
+        self.synchroniser = synchroniser
+        self.stopping = synchroniser.stopping
+        now = time.monotonic()
+        self.schedules = [ConfigSchedule(config_name, min_interval, max_interval, now) for config_name in config.sync_configuration]
+
+    def stop(self, signal_number, frame):
+        logging.info(f'Received {signal.Signals(signal_number).name}, stopping once the sync state is committed')
+        self.stopping.set()
+
+    def run(self):
+        signal.signal(signal.SIGTERM, self.stop)
+        signal.signal(signal.SIGINT, self.stop)
+        logging.info(f'Sync daemon polling {len(self.schedules)} configurations')
+        while not self.stopping.is_set():
+            now = time.monotonic()
+            due = [schedule for schedule in self.schedules if schedule.next_poll <= now]
+            if due:
+                self.poll(due)
+            else:
+                # Wakes as soon as a stop is requested
+                self.stopping.wait(min(schedule.next_poll for schedule in self.schedules) - now)
+        logging.info('Sync daemon stopped')
+
+    def poll(self, schedules):
+        metrics.reset()
+        config_names = [schedule.config_name for schedule in schedules]
+        try:
+            observation_counts = self.synchroniser.sync_updated_observations(config_names)
+        except Exception:
+            # Uncommitted changes to the sync state are discarded, so the failed configurations continue from their
+            # last checkpoint once backed off
+            logging.exception(f"Error syncing {', '.join(config_names)}")
+            now = time.monotonic()
+            for schedule in schedules:
+                metrics.increment('poll_errors', config=schedule.config_name)
+                schedule.polled(False, now)
+                metrics.set_gauge('poll_interval_seconds', schedule.interval, config=schedule.config_name)
+                logging.info(f"Retrying '{schedule.config_name}' in {schedule.interval} seconds")
+        else:
+            self.polled(schedules, observation_counts)
+
+        summary_logger.flush()
+        try:
+            metrics_textfile.write_textfile(metrics.snapshot())
+        except OSError as e:
+            logging.error(f'Could not write metrics textfile: {e}')
+
+    def polled(self, schedules, observation_counts):
+        now = time.monotonic()
+        for schedule in schedules:
+            # Observations skipped as unchanged are updates we don't sync, so don't count as activity
+            synced = observation_counts.get(schedule.config_name, 0) - \
+                metrics.counter_value('observations_skipped_unchanged', config=schedule.config_name)
+            schedule.polled(synced > 0, now)
+            metrics.set_gauge('poll_interval_seconds', schedule.interval, config=schedule.config_name)
+            logging.info(f"Synced {synced} observations for '{schedule.config_name}', next poll in {schedule.interval} seconds")
@@ -0,0 +1,75 @@
+#  ====================================================================
+#  Copyright 2026 EcoNet.NZ
+#
+#  Licensed under the Apache License, Version 2.0 (the "License");
+#  you may not use this file except in compliance with the License.
+#  You may obtain a copy of the License at
+#
+#      http://www.apache.org/licenses/LICENSE-2.0
+#
+#  Unless required by applicable law or agreed to in writing, software
+#  distributed under the License is distributed on an "AS IS" BASIS,
+#  WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+#  See the License for the specific language governing permissions and
+#  limitations under the License.
+#  ====================================================================
+
+import datetime
+
+from inat_to_cams.record import stable_hash
+
+# Bump when the writer changes what it writes for the same translated feature, or the hashes are stored differently,
+# so that every observation is compared with CAMS again rather than skipped
+VERSION = 2
+# Hashes are kept for observations updated within this long before the latest time of last update of any configuration
+RETENTION = datetime.timedelta(days=180)
+# Visit fields that change with every iNaturalist update, even when nothing we map has changed
+VOLATILE_VISIT_FIELDS = frozenset({'recorded_date'})
+
+
+def feature_hash(cams_feature):
+    # All fields are hashed, not just those compared with CAMS, since a newly translated feature has no CAMS ids
+    # and eg effort to control is still written with a new visit. The geolocation is left out since it is derived
+    # from the iNaturalist coordinates in the weed location.
+    location, visit = cams_feature.weed_location, cams_feature.latest_weed_visit
+    return stable_hash((tuple(getattr(location, field) for field in location.FIELDS),
+                        tuple(getattr(visit, field) for field in visit.FIELDS if field not in VOLATILE_VISIT_FIELDS)))
+
+
+class FeatureHashes:
+    """The content hash of the translated CamsFeature for each iNaturalist id, as at the last time it was
+    successfully written to (or found unchanged in) CAMS. Stored with the rest of the sync state (see sync_state).
+
+    If an updated observation translates to the same hash, nothing we map has changed, eg it was faved or commented
+    on, so the synchroniser can skip it without reading it from CAMS.
+    """
+
+    def __init__(self, hashes=None):
+        # [content hash, time the observation was last updated in UTC] by iNaturalist id
+        self.hashes = hashes if hashes is not None else {}
+
+    def is_unchanged(self, inat_id, content_hash):
+        entry = self.hashes.get(str(inat_id))
+        return entry is not None and entry[0] == content_hash
+
+    def record(self, inat_id, content_hash, updated_at):
+        self.hashes[str(inat_id)] = [content_hash, as_utc(updated_at)]
+
+    def forget(self, inat_id):
+        self.hashes.pop(str(inat_id), None)
+
+    def prune(self, updated_before):
+        """Drops the hashes of observations last updated before updated_before, so the hashes don't grow without
+        limit. Observations not updated for a long time rarely are again, and are compared with CAMS if they are.
+        Returns the number of hashes dropped."""
+        cutoff = as_utc(updated_before)
+        stale_ids = [inat_id for inat_id, (_, updated_at) in self.hashes.items() if updated_at < cutoff]
+        for inat_id in stale_ids:
+            del self.hashes[inat_id]
+        return len(stale_ids)
+
+
+def as_utc(timestamp):
+    # ISO 8601 in UTC, so that the times can be compared as strings
+    timestamp = timestamp or datetime.datetime.now(datetime.timezone.utc)
+    return timestamp.astimezone(datetime.timezone.utc).isoformat(timespec='seconds')
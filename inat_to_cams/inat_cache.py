@@ -0,0 +1,193 @@
+#  ====================================================================
+#  Copyright 2026 EcoNet.NZ
+#
+#  Licensed under the Apache License, Version 2.0 (the "License");
+#  you may not use this file except in compliance with the License.
+#  You may obtain a copy of the License at
+#
+#      http://www.apache.org/licenses/LICENSE-2.0
+#
+#  Unless required by applicable law or agreed to in writing, software
+#  distributed under the License is distributed on an "AS IS" BASIS,
+#  WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+#  See the License for the specific language governing permissions and
+#  limitations under the License.
+#  ====================================================================
+
+import datetime
+import logging
+import os
+import re
+import threading
+import time
+import urllib.parse
+
+import pyinaturalist
+import requests
+import requests_cache
+
+from inat_to_cams import metrics
+
+DEFAULT_FILE = 'inat_cache.sqlite'
+DEFAULT_MAX_MB = 200
+
+# How long responses are kept for each type of endpoint, matched in order. Observations change often, but are
+# revalidated before a cached response is used (see INatCacheSession.is_stale), so can be kept for longer.
+EXPIRE_AFTER = {
+    'api.inaturalist.org/v*/observations*': datetime.timedelta(days=1),
+    'api.inaturalist.org/v*/users*': datetime.timedelta(days=1),
+    'api.inaturalist.org/v*/taxa*': datetime.timedelta(days=7),
+    '*': datetime.timedelta(minutes=30),
+}
+
+OBSERVATIONS_URL_PATTERN = re.compile(r'^https://api\.inaturalist\.org/v1/observations(?:/(?P<ids>[\d,]+))?$')
+# Parameters that select a page of the results rather than which observations match, so are not part of a revalidation
+PAGING_PARAMETERS = ('page', 'per_page', 'id_above', 'id_below', 'order', 'order_by', 'only_id', 'updated_since')
+# Comma separated parameters whose order doesn't change the results
+LIST_PARAMETERS = ('id', 'not_id', 'taxon_id', 'without_taxon_id', 'place_id', 'project_id')
+# Observations updated shortly before a response was cached may not have been in iNaturalist's search index yet
+REVALIDATION_MARGIN = datetime.timedelta(minutes=5)
+# How long a successful revalidation is relied on for the other pages of the same search
+REVALIDATION_SECONDS = 60
+# Responses saved between checks of the cache size
+TRIM_INTERVAL = 500
+
+ACCESS_TIMES_SCHEMA = 'CREATE TABLE IF NOT EXISTS access_times (key TEXT PRIMARY KEY, accessed REAL NOT NULL)'
+
+
+def cache_path():
+    return os.environ.get('INAT_CACHE_FILE', DEFAULT_FILE)
+
+
+def max_size_bytes():
+    return int(float(os.environ.get('INAT_CACHE_MAX_MB', DEFAULT_MAX_MB)) * 1024 * 1024)
+
+
+def normalised_value(name, value):
+    # The same ids or taxa in a different order are the same request
+    return ','.join(sorted(value.split(','))) if name in LIST_PARAMETERS else value
+
+
+def create_key(request, **kwargs):
+    # requests-cache already sorts the parameters
+    url = urllib.parse.urlsplit(request.url)
+    params = [(name, normalised_value(name, value))
+              for name, value in urllib.parse.parse_qsl(url.query, keep_blank_values=True)]
+    normalised_request = request.copy()
+    normalised_request.url = urllib.parse.urlunsplit(url._replace(query=urllib.parse.urlencode(params)))
+    return requests_cache.create_key(normalised_request, **kwargs)
+
+
+def revalidation_params(url):
+    # The parameters selecting the observations requested, or None if the response is not revalidated
+    url = urllib.parse.urlsplit(url)
+    match = OBSERVATIONS_URL_PATTERN.match(f'{url.scheme}://{url.netloc}{url.path}')
+    if not match:
+        return None
+    params = {name: normalised_value(name, value) for name, value in urllib.parse.parse_qsl(url.query)
+              if name not in PAGING_PARAMETERS}
+    if match.group('ids'):
+        params['id'] = normalised_value('id', match.group('ids'))
+    return params
+
+
+class INatCacheSession(pyinaturalist.ClientSession):
+    """pyinaturalist's session, caching the iNaturalist responses in a local SQLite file so that repeated runs, such
+    as migrations, anomaly checks and reruns after a failure, mostly read from disk.
+
+    Cached observations are only used if a request for the same observations updated since the response was cached
+    finds none. The least recently used responses are evicted once the cache is larger than INAT_CACHE_MAX_MB.
+    Cache hits and misses are counted in the run metrics.
+    """
+
+    def __init__(self, cache_file=None, max_size=None, **kwargs):
+        super().__init__(cache_file=cache_file or cache_path(), cache_control=False, key_fn=create_key, **kwargs)
+        # Set directly, since pyinaturalist adds any patterns given after its own catch-all pattern
+        self.settings.urls_expire_after = EXPIRE_AFTER
+        self.max_size = max_size or max_size_bytes()
+        self.hooks['response'].append(self.record_access)
+        self.revalidation_lock = threading.Lock()
+        # The time each search was last found to be unchanged, and the earliest time it was unchanged since
+        self.revalidated = {}
+        self.saved = 0
+        with self.cache.responses.connection(commit=True) as connection:
+            connection.execute(ACCESS_TIMES_SCHEMA)
+        self.trim()
+
+    def send(self, request, **kwargs):
+        if not isinstance(request, requests.PreparedRequest):
+            request = self.prepare_request(request)
+        if not kwargs.get('force_refresh') and request.method == 'GET' and self.is_stale(request):
+            kwargs['force_refresh'] = True
+        return super().send(request, **kwargs)
+
+    def is_stale(self, request):
+        params = revalidation_params(request.url)
+        if params is None:
+            return False
+        cached_response = self.cache.get_response(self.cache.create_key(request))
+        if cached_response is None or cached_response.is_expired:
+            # Fetched from iNaturalist anyway
+            return False
+
+        since = cached_response.created_at - REVALIDATION_MARGIN
+        search = urllib.parse.urlencode(sorted(params.items()))
+        with self.revalidation_lock:
+            revalidated = self.revalidated.get(search)
+        if revalidated and time.monotonic() - revalidated[0] < REVALIDATION_SECONDS and revalidated[1] <= since:
+            return False
+
+        if self.count_updated_since(params, since):
+            metrics.increment('inat_cache', result='stale')
+            return True
+        metrics.increment('inat_cache', result='revalidated')
+        with self.revalidation_lock:
+            if revalidated and time.monotonic() - revalidated[0] < REVALIDATION_SECONDS:
+                since = min(since, revalidated[1])
+            self.revalidated[search] = (time.monotonic(), since)
+        return False
+
+    def count_updated_since(self, params, since):
+        # Only the total is needed, so no observations are returned. Sent without the session hooks and never cached.
+        request = requests.Request('GET', f'{pyinaturalist.constants.API_V1}/observations', headers=self.headers,
+                                   params={**params, 'updated_since': since.isoformat(), 'per_page': 0}).prepare()
+        with metrics.span('inat_request', endpoint='revalidate'):
+            response = super().send(request, expire_after=requests_cache.DO_NOT_CACHE)
+        response.raise_for_status()
+        return response.json()['total_results']
+
+    def record_access(self, response, *args, **kwargs):
+        if not hasattr(response, 'from_cache'):
+            # Hooks also run on the response before it is cached
+            return
+        from_cache = response.from_cache
+        metrics.increment('inat_cache', result='hit' if from_cache else 'miss')
+        cache_key = getattr(response, 'cache_key', None)
+        if not cache_key:
+            return
+        with self.cache.responses.connection(commit=True) as connection:
+            connection.execute('INSERT OR REPLACE INTO access_times (key, accessed) VALUES (?, ?)', (cache_key, time.time()))
+        if not from_cache:
+            self.saved += 1
+            if self.saved % TRIM_INTERVAL == 0:
+                self.trim()
+
+    def trim(self):
+        # Evicts expired responses, then the least recently used until the cache fits within its maximum size
+        self.cache.delete(expired=True, vacuum=False)
+        with self.cache.responses.connection() as connection:
+            rows = connection.execute('SELECT responses.key, LENGTH(responses.value) FROM responses '
+                                      'LEFT JOIN access_times ON access_times.key = responses.key '
+                                      'ORDER BY COALESCE(access_times.accessed, 0) DESC').fetchall()
+        total_size = 0
+        evicted = []
+        for key, size in rows:
+            total_size += size or 0
+            if total_size > self.max_size:
+                evicted.append(key)
+        if evicted:
+            self.cache.responses.bulk_delete(evicted)
+            logging.info(f'Evicted {len(evicted)} least recently used responses from the iNaturalist cache')
+            metrics.increment('inat_cache_evicted', len(evicted))
+        with self.cache.responses.connection(commit=True) as connection:
+            connection.execute('DELETE FROM access_times WHERE key NOT IN (SELECT key FROM responses)')
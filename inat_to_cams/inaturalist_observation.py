@@ -14,48 +14,71 @@
 #  limitations under the License.
 #  ====================================================================
 
+import datetime
+from typing import List, Optional
+
+from inat_to_cams.record import Record
+
+
 class iNatPoint:
+    __slots__ = ('x', 'y')
+
     def __init__(self, x, y):
         self.x = x
         self.y = y
 
+    def __eq__(self, other):
+        return type(other) is type(self) and self.x == other.x and self.y == other.y
+
+    def __hash__(self):
+        return hash((self.x, self.y))
+
     def __str__(self):
         return f"{self.x},{self.y}"
 
+    def __repr__(self):
+        return f"iNatPoint({self.x}, {self.y})"
+
+
+class iNatObservation(Record):
+    __slots__ = ('id', 'location', 'location_accuracy', 'location_details', 'description', 'quality_grade', 'height',
+                 'area', 'radius_surveyed', 'observed_on', 'taxon_lineage', 'taxon_name', 'taxon_preferred_common_name',
+                 'phenology', 'image_urls', 'image_attribution', 'effort_to_control', 'site_difficulty', 'follow_up_date',
+                 'treated', 'how_treated', 'treatment_substance', 'treatment_details', 'date_controlled', 'status_update',
+                 'date_of_status_update', 'recorded_by_user_id', 'recorded_by_username', 'recorded_date')
 
-class iNatObservation:
     def __init__(self):
-        self.id = None
-        self.location = None
-        self.location_accuracy = None
-        self.location_details = None
-        self.description = None
-        self.quality_grade = None
-        self.height = None
-        self.area = None
-        self.radius_surveyed = None
-        self.observed_on = None
-        self.taxon_lineage = None
-        self.taxon_name = None
-        self.taxon_preferred_common_name = None
-        self.phenology = None
-        self.image_urls = None
-        self.image_attribution = None
-
-        self.effort_to_control = None
-        self.site_difficulty = None
-        self.follow_up_date = None
-
-        self.treated = None
-        self.how_treated = None
-        self.treatment_substance = None
-        self.treatment_details = None
-        self.date_controlled = None
-
-        self.status_update = None
-        self.date_of_status_update = None
+        self.id: Optional[int] = None
+        self.location: Optional[iNatPoint] = None
+        self.location_accuracy: Optional[int] = None
+        self.location_details: Optional[str] = None
+        self.description: Optional[str] = None
+        self.quality_grade: Optional[str] = None
+        self.height: Optional[str] = None
+        self.area: Optional[str] = None
+        self.radius_surveyed: Optional[str] = None
+        self.observed_on: Optional[str] = None
+        self.taxon_lineage: Optional[List[int]] = None
+        self.taxon_name: Optional[str] = None
+        self.taxon_preferred_common_name: Optional[str] = None
+        self.phenology: Optional[str] = None
+        self.image_urls: Optional[str] = None
+        self.image_attribution: Optional[str] = None
+
+        self.effort_to_control: Optional[str] = None
+        self.site_difficulty: Optional[str] = None
+        self.follow_up_date = None  # String from 'Date for next visit' or datetime from legacy 'Follow-up (YYYY-MM)'
+
+        self.treated: Optional[str] = None
+        self.how_treated: Optional[str] = None
+        self.treatment_substance: Optional[str] = None
+        self.treatment_details: Optional[str] = None
+        self.date_controlled: Optional[str] = None
+
+        self.status_update: Optional[str] = None
+        self.date_of_status_update: Optional[str] = None
         
         # New fields for tracking updates
-        self.recorded_by_user_id = None  # User ID (integer)
-        self.recorded_by_username = None  # Username (string)
-        self.recorded_date = None  # DateTime with time component
\ No newline at end of file
+        self.recorded_by_user_id: Optional[int] = None
+        self.recorded_by_username: Optional[str] = None
+        self.recorded_date: Optional[datetime.datetime] = None  # DateTime with time component
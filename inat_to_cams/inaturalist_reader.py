@@ -16,110 +16,116 @@
 
 import datetime
 import logging
+import threading
 
 import pyinaturalist
 import re
+import requests
 
 from retry import retry
 
-from inat_to_cams import inaturalist_observation, exceptions
+from inat_to_cams import inat_cache, inaturalist_observation, exceptions, metrics
 from inat_to_cams.translator import INatToCamsTranslator
 
 
+TIMEZONE_PATTERN = re.compile(r'.*\+\d{2}:\d{2}')
+
+# Settings for the iNaturalist client shared by the run. iNaturalist asks for no more than about one request per
+# second, and the pool is large enough for the migration workers to each keep a connection alive.
+POOL_SIZE = 10
+REQUEST_TIMEOUT_SECONDS = 60
+REQUESTS_PER_SECOND = 1
+REQUESTS_PER_MINUTE = 60
+
+shared_client = None
+shared_client_lock = threading.Lock()
+
+
+def as_text(value):
+    return value
+
+
+def as_date_text(value):
+    # Dates may be parsed to datetimes or left as strings. Either way, drop any timezone offset.
+    if not value:
+        return None
+    formatted_date = value.isoformat() if hasattr(value, 'isoformat') else str(value)
+    if TIMEZONE_PATTERN.match(formatted_date):
+        return formatted_date[0:-6]
+    return formatted_date
+
+
+def as_follow_up_date(value):
+    if value and value != '(undef.)':
+        return INatToCamsTranslator().as_local_datetime(value + '-01')
+    return None
+
+
+def value_if(expected, result):
+    return lambda value: result if value == expected else None
+
+
+# The observation fields copied to an iNatObservation by flatten, as (attribute, observation field, conversion).
+# MAINTAINER NOTE: flatten only reads observation fields listed here or in LEGACY_OBSERVATION_FIELDS,
+# which also define TRACKED_OBSERVATION_FIELDS for RecordedBy tracking.
+OBSERVATION_FIELDS = [
+    ('location_details', 'Location details', as_text),
+    ('height', 'Height (m)', as_text),
+    ('area', 'Area in square meters', as_text),
+    ('radius_surveyed', 'Radius (m) of area surveyed', as_text),
+    ('phenology', 'Plant phenology->most common flowering/fruiting reproductive stage', as_text),
+    ('effort_to_control', 'Effort to control', as_text),
+    ('site_difficulty', 'Site difficulty', as_text),
+    ('date_controlled', 'Date controlled', as_date_text),
+    ('date_of_status_update', 'Date of status update', as_date_text),
+    ('how_treated', 'How treated', as_text),
+    ('treated', 'Treated ?', as_text),
+    ('status_update', 'Status update', as_text),
+    ('treatment_substance', 'Treatment substance', as_text),
+    ('treatment_details', 'Treatment details', as_text),
+    ('follow_up_date', 'Date for next visit', as_text),
+]
+
+# Observation fields from older projects, in order of precedence. Each is only used if the attribute has not
+# already been set from OBSERVATION_FIELDS or an earlier legacy field, and then replaces it with the converted value,
+# which is None when the legacy field is absent or doesn't match.
+LEGACY_OBSERVATION_FIELDS = [
+    # WMANZ
+    ('follow_up_date', 'Follow-up (YYYY-MM)', as_follow_up_date),
+    # OMB Wellington
+    ('treated', 'Is the pest controlled?', value_if('yes', 'Yes')),
+    ('treated', 'dead or alive?', value_if('dead', 'Yes')),
+    ('area', 'Adult Area', as_text),
+    ('area', 'area of infestation (m2)', as_text),
+    ('site_difficulty', 'Professional assistance required', value_if('yes', '5 Professional skills required (eg rope access)')),
+    ('phenology', 'fruiting', value_if('yes', 'mature fruit')),
+    ('phenology', 'Flowering', value_if('yes', 'flowers')),
+]
+
+
+def observation_field_values(observation):
+    # Index the observation field values by name in one pass. As before, the first value wins if a field is repeated.
+    values = {}
+    for ofv in observation.ofvs or []:
+        values.setdefault(ofv.name, ofv.value)
+    return values
+
+
 class INatReader:
-    # Centralized registry of observation fields processed by this project
-    # MAINTAINER NOTE: When adding new observation fields to the project,
-    # add them to this set to ensure they are included in RecordedBy tracking
-    TRACKED_OBSERVATION_FIELDS = {
-        # Current observation fields (from get_observation_value calls)
-        'Location details',
-        'Height (m)', 
-        'Area in square meters',
-        'Radius (m) of area surveyed',
-        'Plant phenology->most common flowering/fruiting reproductive stage',
-        'Effort to control',
-        'Site difficulty', 
-        'How treated',
-        'Treated ?',
-        'Status update',
-        'Treatment substance',
-        'Treatment details',
-        'Date for next visit',
-        
-        # Current date observation fields (from get_date_observation_value calls)
-        'Date controlled',
-        'Date of status update',
-        
-        # Legacy fields (for backward compatibility)
-        'Follow-up (YYYY-MM)',
-        'Is the pest controlled?',
-        'dead or alive?',
-        'Adult Area',
-        'area of infestation (m2)',
-        'Professional assistance required',
-        'fruiting',
-        'Flowering',
-    }
-    
-    
+    # Maximum number of observation ids that the iNaturalist observations endpoint accepts in a single request
+    IDS_PER_REQUEST = 200
 
-    @staticmethod
-    def validate_tracked_fields():
-        """Validation method to ensure all observation fields used in the code are tracked
-        
-        This method should be called during testing to ensure the TRACKED_OBSERVATION_FIELDS
-        set includes all fields that are actually being processed by get_observation_value
-        and get_date_observation_value calls.
-        
-        MAINTAINER NOTE: If this validation fails, you need to add the missing field(s)
-        to TRACKED_OBSERVATION_FIELDS.
-        
-        Returns:
-            tuple: (bool, set, set) - (is_complete, missing_fields, extra_fields)
-        """
-        # Fields that should be tracked based on current code usage
-        expected_fields = {
-            # From get_observation_value calls in flatten()
-            'Location details', 'Height (m)', 'Area in square meters',
-            'Radius (m) of area surveyed', 
-            'Plant phenology->most common flowering/fruiting reproductive stage',
-            'Effort to control', 'Site difficulty', 'How treated', 'Treated ?',
-            'Status update', 'Treatment substance', 'Treatment details',
-            'Date for next visit',
-            
-            # From get_date_observation_value calls in flatten()
-            'Date controlled', 'Date of status update',
-            
-            # Legacy fields used in flatten()
-            'Follow-up (YYYY-MM)', 'Is the pest controlled?', 'dead or alive?',
-            'Adult Area', 'area of infestation (m2)', 
-            'Professional assistance required', 'fruiting', 'Flowering'
-        }
-        
-        tracked_fields = INatReader.TRACKED_OBSERVATION_FIELDS
-        missing_fields = expected_fields - tracked_fields
-        extra_fields = tracked_fields - expected_fields
-        
-        is_complete = len(missing_fields) == 0
-        
-        if missing_fields:
-            logging.error(f"Missing fields in TRACKED_OBSERVATION_FIELDS: {missing_fields}")
-        if extra_fields:
-            logging.warning(f"Extra fields in TRACKED_OBSERVATION_FIELDS: {extra_fields}")
-        if is_complete and not extra_fields:
-            logging.info("All observation fields are properly tracked")
-        
-        return is_complete, missing_fields, extra_fields
+    # Centralized registry of observation fields processed by this project, used for RecordedBy tracking
+    TRACKED_OBSERVATION_FIELDS = {field for _, field, _ in OBSERVATION_FIELDS + LEGACY_OBSERVATION_FIELDS}
 
     @staticmethod
+    @metrics.timed('sync_stage', stage='flatten')
     def flatten(observation):
-        # Debug: Log observation field values
-        if hasattr(observation, 'ofvs') and observation.ofvs:
-            logging.info(f'DEBUG: Observation {observation.id} has {len(observation.ofvs)} observation field values')
-            for ofv in observation.ofvs:
-                logging.info(f'DEBUG: OFV: name={ofv.name}, value={ofv.value}')
-        else:
-            logging.info(f'DEBUG: Observation {observation.id} has no observation field values')
+        if logging.getLogger().isEnabledFor(logging.DEBUG):
+            ofvs = observation.ofvs or []
+            logging.debug('Observation %s has %d observation field values', observation.id, len(ofvs))
+            for ofv in ofvs:
+                logging.debug('OFV: name=%s, value=%s', ofv.name, ofv.value)
         
         if observation.location is None:
             logging.exception(f'Skipping observation {observation.id} since it has no location set')
@@ -127,7 +133,7 @@ class INatReader:
 
         date_observed = observation.observed_on
         if not date_observed:
-            logging.info('No observation date found, using creation date instead')
+            logging.debug('No observation date found for %s, using creation date instead', observation.id)
             date_observed = observation.created_at
 
         if not date_observed:
@@ -142,7 +148,6 @@ class INatReader:
         inat_observation.id = observation.id
         inat_observation.location = inaturalist_observation.iNatPoint(observation.location[1], observation.location[0])
         inat_observation.location_accuracy = observation.positional_accuracy
-        inat_observation.location_details = INatReader.get_observation_value(observation, 'Location details')
         inat_observation.taxon_lineage = observation.taxon.ancestor_ids
         
         # Add taxon name information for unmapped taxa
@@ -153,9 +158,6 @@ class INatReader:
             
         inat_observation.description = observation.description
         inat_observation.quality_grade = observation.quality_grade
-        inat_observation.height = INatReader.get_observation_value(observation, 'Height (m)')
-        inat_observation.area = INatReader.get_observation_value(observation, 'Area in square meters')
-        inat_observation.radius_surveyed = INatReader.get_observation_value(observation, 'Radius (m) of area surveyed')
         inat_observation.observed_on = date_observed.isoformat()[0:-6]
         if observation.photos:
             # Get the URLs and attribution
@@ -166,59 +168,12 @@ class INatReader:
             inat_observation.image_urls = ",".join(photo_urls)
             inat_observation.image_attribution = observation.photos[0].attribution
 
-        inat_observation.phenology = INatReader.get_observation_value(observation, 'Plant phenology->most common flowering/fruiting reproductive stage')
-
-        inat_observation.effort_to_control = INatReader.get_observation_value(observation, 'Effort to control')
-        inat_observation.site_difficulty = INatReader.get_observation_value(observation, 'Site difficulty')
-
-        inat_observation.date_controlled = INatReader.get_date_observation_value(observation, 'Date controlled')
-        logging.info(f'DEBUG: date_controlled from observation fields: {inat_observation.date_controlled}')
-        inat_observation.date_of_status_update = INatReader.get_date_observation_value(observation, 'Date of status update')
-        logging.info(f'DEBUG: date_of_status_update from observation fields: {inat_observation.date_of_status_update}')
-        inat_observation.how_treated = INatReader.get_observation_value(observation, 'How treated')
-        inat_observation.treated = INatReader.get_observation_value(observation, 'Treated ?')
-        inat_observation.status_update = INatReader.get_observation_value(observation, 'Status update')
-        inat_observation.treatment_substance = INatReader.get_observation_value(observation, 'Treatment substance')
-        inat_observation.treatment_details = INatReader.get_observation_value(observation, 'Treatment details')
-
-        inat_observation.follow_up_date = INatReader.get_observation_value(observation, 'Date for next visit')
-
-        # Legacy WMANZ observation fields
-        if not inat_observation.follow_up_date:
-            follow_up = INatReader.get_observation_value(observation, 'Follow-up (YYYY-MM)')
-            if follow_up and follow_up != '(undef.)':
-                inat_observation.follow_up_date = INatToCamsTranslator().as_local_datetime(follow_up + '-01')
-            else:
-                inat_observation.follow_up_date = None
-
-        # Legacy OMB Wellington observation fields
-        if not inat_observation.treated:
-            controlled = INatReader.get_observation_value(observation, 'Is the pest controlled?')
-            if controlled and controlled == 'yes':
-                inat_observation.treated = 'Yes'
-            if not inat_observation.treated:
-                dead_or_alive = INatReader.get_observation_value(observation, 'dead or alive?')
-                if dead_or_alive and dead_or_alive == 'dead':
-                    inat_observation.treated = 'Yes'
-
-        if not inat_observation.area:
-            inat_observation.area = INatReader.get_observation_value(observation, 'Adult Area')
-            if not inat_observation.area:
-                inat_observation.area = INatReader.get_observation_value(observation, 'area of infestation (m2)')
-
-        if not inat_observation.site_difficulty:
-            professional_assistance = INatReader.get_observation_value(observation, 'Professional assistance required')
-            if professional_assistance and professional_assistance == 'yes':
-                inat_observation.site_difficulty = '5 Professional skills required (eg rope access)'
-
-        if not inat_observation.phenology:
-            fruiting = INatReader.get_observation_value(observation, 'fruiting')
-            if fruiting and fruiting == 'yes':
-                inat_observation.phenology = 'mature fruit'
-            if not inat_observation.phenology:
-                flowering = INatReader.get_observation_value(observation, 'Flowering')
-                if flowering and flowering == 'yes':
-                    inat_observation.phenology = 'flowers'
+        field_values = observation_field_values(observation)
+        for attribute, field, convert in OBSERVATION_FIELDS:
+            setattr(inat_observation, attribute, convert(field_values.get(field)))
+        for attribute, field, convert in LEGACY_OBSERVATION_FIELDS:
+            if not getattr(inat_observation, attribute):
+                setattr(inat_observation, attribute, convert(field_values.get(field)))
 
         # Add RecordedDate (RecordedBy is now handled in translator)
         if hasattr(observation, 'updated_at') and observation.updated_at:
@@ -232,44 +187,22 @@ class INatReader:
 
     @staticmethod
     def get_observation_value(observation, key):
-        # MAINTAINER NOTE: When adding a new field here, also add it to TRACKED_OBSERVATION_FIELDS
-        # to ensure it's included in RecordedBy tracking
-        if observation.ofvs:
-            list_val = [x for x in observation.ofvs if x.name == key]
-            if list_val:
-                return list_val[0].value
-        return None
+        return observation_field_values(observation).get(key)
 
     @staticmethod
     def get_date_observation_value(observation, key):
-        # MAINTAINER NOTE: When adding a new date field here, also add it to TRACKED_OBSERVATION_FIELDS
-        # to ensure it's included in RecordedBy tracking
-        date = INatReader.get_observation_value(observation, key)
-        if date:
-            logging.info(f'DEBUG get_date_observation_value: key={key}, value={date}, type={type(date)}')
-            # Handle both datetime objects and string values
-            if hasattr(date, 'isoformat'):
-                formatted_date = date.isoformat()
-                logging.info(f'DEBUG get_date_observation_value: after isoformat()={formatted_date}')
-            else:
-                formatted_date = str(date)
-                logging.info(f'DEBUG get_date_observation_value: after str()={formatted_date}')
-            
-            timezone_pattern = re.compile(r'.*\+\d{2}:\d{2}')
-
-            if timezone_pattern.match(formatted_date):
-                result = formatted_date[0:-6]
-                logging.info(f'DEBUG get_date_observation_value: stripped timezone, result={result}')
-                return result
-            else:
-                logging.info(f'DEBUG get_date_observation_value: no timezone, result={formatted_date}')
-                return formatted_date
+        return as_date_text(INatReader.get_observation_value(observation, key))
 
     @staticmethod
-    @retry(delay=5, tries=3)
+    @retry(delay=5, tries=3, logger=metrics.inat_retry_logger)
     def get_matching_observations_updated_since(place_ids, taxon_ids, time_of_previous_update):
-        client = pyinaturalist.iNatClient()
-        observations = client.observations.search(
+        return INatReader.fetch_all_pages(INatReader.search_matching_observations_updated_since(place_ids, taxon_ids, time_of_previous_update))
+
+    @staticmethod
+    def search_matching_observations_updated_since(place_ids, taxon_ids, time_of_previous_update):
+        # Returns a paginator, so that the pages can be fetched as they are needed
+        client = INatReader.client()
+        return client.observations.search(
             updated_since=time_of_previous_update + datetime.timedelta(seconds=1),
             taxon_id=taxon_ids,
             place_id=place_ids,
@@ -277,13 +210,17 @@ class INatReader:
             geoprivacy='open',
             page='all',
             per_page=200
-        ).all()
-        return observations
+        )
 
     @staticmethod
-    @retry(delay=5, tries=3)
+    @retry(delay=5, tries=3, logger=metrics.inat_retry_logger)
     def get_project_observations_updated_since(place_ids, project_id, time_of_previous_update, not_taxon_ids=None):
-        client = pyinaturalist.iNatClient()
+        return INatReader.fetch_all_pages(INatReader.search_project_observations_updated_since(place_ids, project_id, time_of_previous_update, not_taxon_ids))
+
+    @staticmethod
+    def search_project_observations_updated_since(place_ids, project_id, time_of_previous_update, not_taxon_ids=None):
+        # Returns a paginator, so that the pages can be fetched as they are needed
+        client = INatReader.client()
         params = {
             'updated_since': time_of_previous_update + datetime.timedelta(seconds=1),
             'project_id': project_id,
@@ -298,14 +235,72 @@ class INatReader:
         if not_taxon_ids:
             params['without_taxon_id'] = not_taxon_ids
 
-        observations = client.observations.search(**params).all()
-        return observations
+        return client.observations.search(**params)
 
     @staticmethod
-    @retry(delay=5, tries=3)
+    @retry(delay=5, tries=3, logger=metrics.inat_retry_logger)
     def get_observation_with_id(observation_id):
-        client = pyinaturalist.iNatClient()
-        observation = client.observations(observation_id)
+        client = INatReader.client()
+        with metrics.span('inat_request', endpoint='observation'):
+            observation = client.observations(observation_id)
         if not observation:
             raise ValueError(f'Observation with id {observation_id} not found')
         return observation
+
+    @staticmethod
+    def get_observations_with_ids(observation_ids):
+        # Observations that no longer exist in iNaturalist are not returned, so callers should check for missing ids
+        unique_ids = list(dict.fromkeys(observation_ids))
+        observations = []
+        for i in range(0, len(unique_ids), INatReader.IDS_PER_REQUEST):
+            observations.extend(INatReader.get_observations_page_with_ids(unique_ids[i:i + INatReader.IDS_PER_REQUEST]))
+        return observations
+
+    @staticmethod
+    @retry(delay=5, tries=3, logger=metrics.inat_retry_logger)
+    def get_observations_page_with_ids(observation_ids):
+        with metrics.span('inat_request', endpoint='observations_by_id'):
+            response = pyinaturalist.get_observations(id=observation_ids, per_page=len(observation_ids), session=INatReader.client().session)
+        return pyinaturalist.Observation.from_json_list(response)
+
+    @staticmethod
+    def client():
+        # Shared by the run, so that connections are kept alive and the response cache and rate limits apply across calls
+        global shared_client
+        with shared_client_lock:
+            if shared_client is None:
+                shared_client = INatReader.new_client()
+            return shared_client
+
+    @staticmethod
+    def new_client():
+        session = inat_cache.INatCacheSession(timeout=REQUEST_TIMEOUT_SECONDS, per_second=REQUESTS_PER_SECOND,
+                                              per_minute=REQUESTS_PER_MINUTE)
+        # Replaces the default adapter to enlarge the connection pool, keeping pyinaturalist's retries
+        session.mount('https://', requests.adapters.HTTPAdapter(pool_connections=POOL_SIZE, pool_maxsize=POOL_SIZE,
+                                                                max_retries=session.retries))
+        session.hooks['response'].append(INatReader.count_response_bytes)
+        return pyinaturalist.iNatClient(session=session)
+
+    @staticmethod
+    def count_response_bytes(response, *args, **kwargs):
+        # Hooks run on a response both before and after it is cached, so only count it once, and not when read from the cache
+        if getattr(response, 'from_cache', None) is False:
+            metrics.increment('inat_bytes_read', len(response.content))
+
+    @staticmethod
+    @retry(delay=5, tries=3, logger=metrics.inat_retry_logger)
+    def fetch_page(paginator):
+        # The paginator only moves on once a page has been fetched, so a failed request can be retried on its own
+        with metrics.span('inat_request', endpoint='observations'):
+            return paginator.next_page()
+
+    @staticmethod
+    def fetch_all_pages(paginator):
+        # Equivalent to paginator.all(), but timing each page request
+        observations = []
+        while not paginator.exhausted:
+            with metrics.span('inat_request', endpoint='observations'):
+                page = paginator.next_page()
+            observations.extend(page)
+        return observations
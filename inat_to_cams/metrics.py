@@ -0,0 +1,137 @@
+#  ====================================================================
+#  Copyright 2026 EcoNet.NZ
+#
+#  Licensed under the Apache License, Version 2.0 (the "License");
+#  you may not use this file except in compliance with the License.
+#  You may obtain a copy of the License at
+#
+#      http://www.apache.org/licenses/LICENSE-2.0
+#
+#  Unless required by applicable law or agreed to in writing, software
+#  distributed under the License is distributed on an "AS IS" BASIS,
+#  WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+#  See the License for the specific language governing permissions and
+#  limitations under the License.
+#  ====================================================================
+
+import contextlib
+import functools
+import logging
+import threading
+import time
+
+# Timings, counters and gauges for the current run, keyed by (name, labels) where labels is a sorted tuple of (label, value)
+timings = {}
+counters = {}
+gauges = {}
+run_started = time.monotonic()
+lock = threading.Lock()
+
+
+def as_key(name, labels):
+    return name, tuple(sorted((label, str(value)) for label, value in labels.items()))
+
+
+@contextlib.contextmanager
+def span(name, **labels):
+    # Times the enclosed block, eg with metrics.span('cams_request', operation='query'):
+    start = time.perf_counter()
+    try:
+        yield
+    finally:
+        record_timing(name, time.perf_counter() - start, **labels)
+
+
+def timed(name, **labels):
+    # Decorator version of span
+    def decorator(function):
+        @functools.wraps(function)
+        def wrapper(*args, **kwargs):
+            with span(name, **labels):
+                return function(*args, **kwargs)
+        return wrapper
+    return decorator
+
+
+def record_timing(name, seconds, **labels):
+    key = as_key(name, labels)
+    with lock:
+        timing = timings.get(key)
+        if timing is None:
+            timings[key] = {'count': 1, 'total_seconds': seconds, 'max_seconds': seconds}
+        else:
+            timing['count'] += 1
+            timing['total_seconds'] += seconds
+            timing['max_seconds'] = max(timing['max_seconds'], seconds)
+
+
+def increment(name, amount=1, **labels):
+    key = as_key(name, labels)
+    with lock:
+        counters[key] = counters.get(key, 0) + amount
+
+
+def counter_value(name, **labels):
+    with lock:
+        return counters.get(as_key(name, labels), 0)
+
+
+def set_gauge(name, value, **labels):
+    key = as_key(name, labels)
+    with lock:
+        gauges[key] = value
+
+
+def reset():
+    global run_started
+    with lock:
+        timings.clear()
+        counters.clear()
+        gauges.clear()
+        run_started = time.monotonic()
+
+
+def snapshot():
+    with lock:
+        return {
+            'run_seconds': round(time.monotonic() - run_started, 3),
+            'timings': [{'name': name, 'labels': dict(labels), 'count': timing['count'],
+                         'total_seconds': round(timing['total_seconds'], 4), 'max_seconds': round(timing['max_seconds'], 4)}
+                        for (name, labels), timing in sorted(timings.items())],
+            'counters': [{'name': name, 'labels': dict(labels), 'value': value}
+                         for (name, labels), value in sorted(counters.items())],
+            'gauges': [{'name': name, 'labels': dict(labels), 'value': value}
+                       for (name, labels), value in sorted(gauges.items())],
+        }
+
+
+def log_summary():
+    run_metrics = snapshot()
+    logging.info('-' * 80)
+    logging.info(f"Run metrics ({run_metrics['run_seconds']} seconds):")
+    for timing in run_metrics['timings']:
+        mean_ms = 1000 * timing['total_seconds'] / timing['count']
+        logging.info(f"* {describe(timing):<60}{timing['count']:>8} calls{timing['total_seconds']:>10.2f}s total"
+                     f"{mean_ms:>10.1f}ms mean{1000 * timing['max_seconds']:>10.1f}ms max")
+    for counter in run_metrics['counters'] + run_metrics['gauges']:
+        logging.info(f"* {describe(counter):<60}{counter['value']:>8}")
+    return run_metrics
+
+
+def describe(metric):
+    labels = ','.join(f'{label}={value}' for label, value in metric['labels'].items())
+    return f"{metric['name']}{{{labels}}}" if labels else metric['name']
+
+
+class RetryLogger:
+    # Passed as the logger to @retry so that retries are counted as well as logged
+    def __init__(self, target):
+        self.target = target
+
+    def warning(self, message, *args):
+        increment('retries', target=self.target)
+        logging.warning(message, *args)
+
+
+cams_retry_logger = RetryLogger('cams')
+inat_retry_logger = RetryLogger('inat')
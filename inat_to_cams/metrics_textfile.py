@@ -0,0 +1,155 @@
+#  ====================================================================
+#  Copyright 2026 EcoNet.NZ
+#
+#  Licensed under the Apache License, Version 2.0 (the "License");
+#  you may not use this file except in compliance with the License.
+#  You may obtain a copy of the License at
+#
+#      http://www.apache.org/licenses/LICENSE-2.0
+#
+#  Unless required by applicable law or agreed to in writing, software
+#  distributed under the License is distributed on an "AS IS" BASIS,
+#  WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+#  See the License for the specific language governing permissions and
+#  limitations under the License.
+#  ====================================================================
+
+import logging
+import os
+import time
+
+import prometheus_client
+
+DEFAULT_TEXTFILE = 'inat_to_cams.prom'
+PREFIX = 'inat_to_cams'
+
+
+def textfile_path():
+    return os.environ.get('METRICS_TEXTFILE', DEFAULT_TEXTFILE)
+
+
+def write_textfile(run_metrics, path=None):
+    # Writes the metrics of the last run for the node_exporter textfile collector.
+    # write_to_textfile writes to a temporary file and renames it, so the collector never reads a partial file.
+    path = path or textfile_path()
+    registry = build_registry(run_metrics, time.time())
+    directory = os.path.dirname(path)
+    if directory:
+        os.makedirs(directory, exist_ok=True)
+    prometheus_client.write_to_textfile(path, registry)
+    logging.info(f'Wrote run metrics to {path}')
+
+
+# The run counters for each configuration that the observations gauge is derived from
+OBSERVATION_COUNTERS = ('observations_fetched', 'observations_unique', 'observations_invalid',
+                        'observations_skipped_unchanged')
+# The run counters exported as they are, by counter name: the gauge name, its description and its labels
+COUNTER_GAUGES = {
+    'sync_events': ('sync_events', 'Changes written to CAMS in the last run, as in sync_history.md', ['config', 'event']),
+    'retries': ('retries', 'Retried requests in the last run', ['target']),
+    'cams_rows_written': ('cams_rows_written', 'Rows written to CAMS in the last run', ['entity', 'operation']),
+    'inat_cache': ('inat_cache_requests', 'iNaturalist requests by cache result in the last run', ['result']),
+    'poll_errors': ('poll_errors', 'Failed syncs in the last daemon poll', ['config']),
+}
+
+
+def build_registry(run_metrics, now):
+    registry = prometheus_client.CollectorRegistry()
+    add_run_info(registry, run_metrics, now)
+    add_counters(registry, run_metrics['counters'])
+    add_timings(registry, run_metrics['timings'])
+    add_gauges(registry, run_metrics['gauges'], now)
+    return registry
+
+
+def gauge(registry, name, documentation, labelnames=()):
+    return prometheus_client.Gauge(f'{PREFIX}_{name}', documentation, labelnames, registry=registry)
+
+
+def add_run_info(registry, run_metrics, now):
+    gauge(registry, 'last_run_timestamp_seconds', 'Time the last sync run completed').set(now)
+    gauge(registry, 'last_run_duration_seconds', 'Duration of the last sync run').set(run_metrics['run_seconds'])
+
+
+def add_counters(registry, counters):
+    observations = gauge(registry, 'observations', 'Observations in the last run by configuration and outcome',
+                         ['config', 'outcome'])
+    gauges = {name: gauge(registry, *definition) for name, definition in COUNTER_GAUGES.items()}
+    bytes_transferred = gauge(registry, 'bytes', 'Bytes read from iNaturalist and written to CAMS in the last run',
+                              ['api', 'direction', 'entity'])
+
+    counts_by_config = {}
+    for counter in counters:
+        name, labels, value = counter['name'], counter['labels'], counter['value']
+        if name in OBSERVATION_COUNTERS:
+            counts_by_config.setdefault(labels['config'], {})[name] = value
+        elif name in gauges:
+            gauges[name].labels(**labels).set(value)
+        elif name == 'inat_bytes_read':
+            bytes_transferred.labels(api='inat', direction='read', entity='').set(value)
+        elif name == 'cams_bytes_written':
+            bytes_transferred.labels(api='cams', direction='written', entity=labels['entity']).set(value)
+        elif name == 'inat_cache_evicted':
+            gauge(registry, 'inat_cache_evicted', 'Responses evicted from the iNaturalist cache in the last run').set(value)
+
+    for config_name, counts in counts_by_config.items():
+        add_observation_counts(observations.labels, config_name, counts)
+
+
+def add_observation_counts(observations, config_name, counts):
+    fetched = counts.get('observations_fetched', 0)
+    unique = counts.get('observations_unique', 0)
+    invalid = counts.get('observations_invalid', 0)
+    unchanged = counts.get('observations_skipped_unchanged', 0)
+    observations(config=config_name, outcome='fetched').set(fetched)
+    # Observations already synced by an earlier configuration in the same run
+    observations(config=config_name, outcome='skipped_duplicate').set(fetched - unique)
+    observations(config=config_name, outcome='skipped_invalid').set(invalid)
+    # Translated to the same feature as when last synced, so not read from CAMS
+    observations(config=config_name, outcome='skipped_unchanged').set(unchanged)
+    observations(config=config_name, outcome='synced').set(unique - invalid - unchanged)
+
+
+def add_timings(registry, timings):
+    requests = gauge(registry, 'requests', 'Requests in the last run', ['api', 'entity', 'operation'])
+    request_seconds = gauge(registry, 'request_seconds', 'Total time spent on requests in the last run',
+                            ['api', 'entity', 'operation'])
+    request_max_seconds = gauge(registry, 'request_max_seconds', 'Slowest request in the last run',
+                                ['api', 'entity', 'operation'])
+    stage_seconds = gauge(registry, 'stage_seconds', 'Total time spent in each sync stage in the last run', ['stage'])
+    stage_calls = gauge(registry, 'stage_calls', 'Calls to each sync stage in the last run', ['stage'])
+    fetch_seconds = gauge(registry, 'inat_fetch_seconds',
+                          'Time spent fetching observations for each configuration in the last run', ['config'])
+
+    for timing in timings:
+        name, labels = timing['name'], timing['labels']
+        if name in ('cams_request', 'inat_request'):
+            api = name.split('_')[0]
+            request_labels = {'api': api, 'entity': labels.get('entity', ''),
+                              'operation': labels.get('operation', labels.get('endpoint', ''))}
+            requests.labels(**request_labels).set(timing['count'])
+            request_seconds.labels(**request_labels).set(timing['total_seconds'])
+            request_max_seconds.labels(**request_labels).set(timing['max_seconds'])
+        elif name == 'sync_stage':
+            stage_seconds.labels(stage=labels['stage']).set(timing['total_seconds'])
+            stage_calls.labels(stage=labels['stage']).set(timing['count'])
+        elif name == 'inat_fetch':
+            fetch_seconds.labels(config=labels['config']).set(timing['total_seconds'])
+
+
+def add_gauges(registry, gauges, now):
+    watermark = gauge(registry, 'watermark_timestamp_seconds', 'Time of last update synced for each configuration', ['config'])
+    watermark_lag = gauge(registry, 'watermark_lag_seconds', 'Time since the last update synced for each configuration',
+                          ['config'])
+    poll_interval = None
+    for metric in gauges:
+        if metric['name'] == 'watermark_timestamp_seconds':
+            config_name = metric['labels']['config']
+            watermark.labels(config=config_name).set(metric['value'])
+            watermark_lag.labels(config=config_name).set(max(0.0, now - metric['value']))
+        elif metric['name'] == 'poll_interval_seconds':
+            # Only in daemon mode
+            if poll_interval is None:
+                poll_interval = gauge(registry, 'poll_interval_seconds', 'Current polling interval for each configuration',
+                                      ['config'])
+            poll_interval.labels(config=metric['labels']['config']).set(metric['value'])
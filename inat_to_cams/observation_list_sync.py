@@ -0,0 +1,205 @@
+#  ====================================================================
+#  Copyright 2026 EcoNet.NZ
+#
+#  Licensed under the Apache License, Version 2.0 (the "License");
+#  you may not use this file except in compliance with the License.
+#  You may obtain a copy of the License at
+#
+#      http://www.apache.org/licenses/LICENSE-2.0
+#
+#  Unless required by applicable law or agreed to in writing, software
+#  distributed under the License is distributed on an "AS IS" BASIS,
+#  WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+#  See the License for the specific language governing permissions and
+#  limitations under the License.
+#  ====================================================================
+
+import collections
+import logging
+
+from inat_to_cams import cams_interface, cams_reader, cams_writer, exceptions, feature_hashes, inaturalist_reader, \
+    summary_logger, translator
+
+# Observations fetched, read from CAMS and written together. The most iNaturalist returns for one request.
+BATCH_SIZE = inaturalist_reader.INatReader.IDS_PER_REQUEST
+# Rows in each edit_features request
+EDIT_BATCH_SIZE = 100
+# The queued edits are written in this order, so that visits are written before their weed locations as for a
+# single observation
+EDIT_ORDER = (('Visits_Table', 'add'), ('Visits_Table', 'update'), ('WeedLocations', 'update'))
+
+CREATED = 'created'
+UPDATED = 'updated'
+UNCHANGED = 'unchanged'
+NOT_FOUND = 'not found'
+INVALID = 'invalid'
+SKIPPED = 'skipped'
+FAILED = 'failed'
+
+
+class BatchedWrites:
+    """Stands in for the CAMS connection given to CamsWriter, queuing the rows written for existing features so that
+    flush can write them with a few edit_features requests rather than one or two per observation.
+
+    Each row queued is tagged with inat_id, which the caller sets before writing each observation.
+    """
+
+    def __init__(self, connection):
+        self.connection = connection
+        self.inat_id = None
+        self.queued = {edit: [] for edit in EDIT_ORDER}
+
+    def add_weed_visits_table_row(self, rows):
+        self.queue(('Visits_Table', 'add'), rows)
+
+    def update_weed_visits_table_row(self, rows):
+        self.queue(('Visits_Table', 'update'), rows)
+
+    def update_weed_location_layer_row(self, rows):
+        self.queue(('WeedLocations', 'update'), rows)
+
+    def queue(self, edit, rows):
+        self.queued[edit].extend((self.inat_id, row) for row in rows)
+
+    def flush(self):
+        # Returns the reason each observation whose rows could not all be written failed, by iNaturalist id
+        failures = {}
+        for edit in EDIT_ORDER:
+            # An observation's weed location isn't updated if its visit failed
+            queued = [(inat_id, row) for inat_id, row in self.queued[edit] if inat_id not in failures]
+            self.queued[edit] = []
+            for start in range(0, len(queued), EDIT_BATCH_SIZE):
+                batch = queued[start:start + EDIT_BATCH_SIZE]
+                try:
+                    results = self.connection.edit_rows(*edit, [row for _, row in batch])
+                except Exception as e:
+                    logging.exception(f'Error writing {len(batch)} {edit[0]} rows')
+                    results = [{'success': False, 'error': str(e)} for _ in batch]
+                for (inat_id, _), result in zip(batch, results):
+                    if not result.get('success'):
+                        failures.setdefault(inat_id, f'{edit[1]} {edit[0]} row: {result.get("error")}')
+        return failures
+
+
+class BatchedWriter(cams_writer.CamsWriter):
+    """Writes through BatchedWrites, holding back the summary log row for each observation until write_summary_logs
+    is called once its rows have been written."""
+
+    def __init__(self, writes):
+        super().__init__(writes)
+        self.summaries = {}
+
+    def write_summary_log(self, cams_feature, existing_feature, object_id, *modified):
+        self.summaries[self.cams.inat_id] = (cams_feature, existing_feature, object_id, *modified)
+        return ', '.join(description for _, description in summary_logger.sync_events(existing_feature, *modified))
+
+    def write_summary_logs(self, failures):
+        for inat_id, summary in self.summaries.items():
+            if inat_id not in failures:
+                super().write_summary_log(*summary)
+        self.summaries = {}
+
+
+class ObservationListSync:
+    """Syncs a list of iNaturalist observations, eg to re-sync them after a fix, a batch at a time: fetching the
+    observations 200 per request, reading their existing CAMS features with a few queries, and writing the changes to
+    existing features in batched edit_features requests. New features are written one at a time, since each visit
+    needs the GlobalID of its new weed location.
+
+    Changes are logged to the summary log once they have been written. The outcome for each id is kept in outcomes,
+    and the feature hashes of the observations written are recorded in the sync state. If a batch can't be fetched,
+    translated or read from CAMS, its observations fail and the next batch is synced.
+    """
+
+    def __init__(self, synchroniser):
+        self.state = synchroniser.state
+        self.outcomes = {}
+
+    def run(self, observation_ids):
+        observation_ids = list(dict.fromkeys(observation_ids))
+        for start in range(0, len(observation_ids), BATCH_SIZE):
+            self.sync_batch(observation_ids[start:start + BATCH_SIZE])
+        return {observation_id: self.outcomes[observation_id] for observation_id in observation_ids}
+
+    def sync_batch(self, observation_ids):
+        try:
+            observations = inaturalist_reader.INatReader.get_observations_with_ids(observation_ids)
+        except Exception as e:
+            logging.exception(f'Error fetching {len(observation_ids)} observations')
+            self.fail(observation_ids, e)
+            return
+        found_ids = {observation.id for observation in observations}
+        for observation_id in observation_ids:
+            if observation_id not in found_ids:
+                self.outcomes[observation_id] = (NOT_FOUND, None)
+
+        flattened = self.flatten(observations)
+        try:
+            cams_features = translator.INatToCamsTranslator().translate_many(flattened)
+            existing_features = cams_reader.CamsReader().read_observations(
+                [cams_feature.latest_weed_visit.external_id for cams_feature in cams_features if cams_feature])
+        except Exception as e:
+            logging.exception(f'Error translating or reading the CAMS features of {len(flattened)} observations')
+            self.fail([observation.id for _, observation in flattened], e)
+            return
+        self.write_batch(flattened, cams_features, existing_features)
+
+    def flatten(self, observations):
+        flattened = []
+        for observation in observations:
+            try:
+                inat_observation = inaturalist_reader.INatReader.flatten(observation)
+            except exceptions.InvalidObservationError:
+                logging.info(f'Ignoring invalid observation {observation.id}')
+                self.outcomes[observation.id] = (INVALID, None)
+                continue
+            if inat_observation:
+                flattened.append((inat_observation, observation))
+            else:
+                self.outcomes[observation.id] = (SKIPPED, 'nothing to sync')
+        return flattened
+
+    def write_batch(self, flattened, cams_features, existing_features):
+        writes = BatchedWrites(cams_interface.connection)
+        batched_writer = BatchedWriter(writes)
+        written = {}
+        for (_, observation), cams_feature in zip(flattened, cams_features):
+            if not cams_feature:
+                self.outcomes[observation.id] = (SKIPPED, 'not translated')
+                continue
+            # Hashed before writing, since the writer copies some values from the existing CAMS feature
+            translated_hash = feature_hashes.feature_hash(cams_feature)
+            existing_feature = existing_features.get(cams_feature.latest_weed_visit.external_id)
+            writes.inat_id = observation.id
+            try:
+                if existing_feature:
+                    global_id = batched_writer.write_observation_over(cams_feature, existing_feature)
+                    written[observation.id] = (UPDATED if global_id else UNCHANGED, translated_hash, observation.updated_at)
+                else:
+                    cams_writer.CamsWriter().write_observation_over(cams_feature, None)
+                    written[observation.id] = (CREATED, translated_hash, observation.updated_at)
+            except Exception as e:
+                logging.exception(f'Error syncing observation {observation.id}')
+                batched_writer.summaries.pop(observation.id, None)
+                self.outcomes[observation.id] = (FAILED, str(e))
+
+        failures = writes.flush()
+        batched_writer.write_summary_logs(failures)
+        for observation_id, (outcome, translated_hash, updated_at) in written.items():
+            if observation_id in failures:
+                self.outcomes[observation_id] = (FAILED, failures[observation_id])
+            else:
+                self.state.feature_hashes.record(observation_id, translated_hash, updated_at)
+                self.outcomes[observation_id] = (outcome, None)
+
+    def fail(self, observation_ids, error):
+        for observation_id in observation_ids:
+            self.outcomes[observation_id] = (FAILED, str(error))
+
+    def log_outcomes(self, outcomes):
+        logging.info('-' * 80)
+        logging.info(f'Outcomes for {len(outcomes)} observations:')
+        for observation_id, (outcome, detail) in outcomes.items():
+            logging.info(f'* {observation_id}: {outcome}' + (f' ({detail})' if detail else ''))
+        counts = collections.Counter(outcome for outcome, _ in outcomes.values())
+        logging.info(', '.join(f'{count} {outcome}' for outcome, count in counts.most_common()))
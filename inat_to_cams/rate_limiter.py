@@ -0,0 +1,56 @@
+#  ====================================================================
+#  Copyright 2026 EcoNet.NZ
+#
+#  Licensed under the Apache License, Version 2.0 (the "License");
+#  you may not use this file except in compliance with the License.
+#  You may obtain a copy of the License at
+#
+#      http://www.apache.org/licenses/LICENSE-2.0
+#
+#  Unless required by applicable law or agreed to in writing, software
+#  distributed under the License is distributed on an "AS IS" BASIS,
+#  WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+#  See the License for the specific language governing permissions and
+#  limitations under the License.
+#  ====================================================================
+
+import logging
+import threading
+import time
+
+
+class AdaptiveRateLimiter:
+    """Spaces out requests to an API, slowing down when requests fail and speeding back up when they succeed.
+
+    The interval between requests starts at initial_interval, is multiplied by backoff_factor after each failure
+    (up to max_interval) and by recovery_factor after each success (down to min_interval).
+    """
+
+    def __init__(self, name, min_interval=0.0, initial_interval=1.0, max_interval=60.0, backoff_factor=2.0, recovery_factor=0.8):
+        self.name = name
+        self.min_interval = min_interval
+        self.initial_interval = initial_interval
+        self.max_interval = max_interval
+        self.backoff_factor = backoff_factor
+        self.recovery_factor = recovery_factor
+        self.interval = initial_interval
+        self.next_request_time = 0.0
+        self.lock = threading.Lock()
+
+    def wait(self):
+        with self.lock:
+            now = time.monotonic()
+            delay = max(0.0, self.next_request_time - now)
+            self.next_request_time = max(now, self.next_request_time) + self.interval
+        if delay > 0:
+            logging.debug(f'{self.name} rate limiter waiting {delay:.2f} seconds')
+            time.sleep(delay)
+
+    def record_success(self):
+        with self.lock:
+            self.interval = max(self.min_interval, self.interval * self.recovery_factor)
+
+    def record_failure(self):
+        with self.lock:
+            self.interval = min(self.max_interval, max(self.interval, self.initial_interval) * self.backoff_factor)
+            logging.info(f'{self.name} rate limiter backing off to {self.interval:.2f} seconds between requests')
@@ -0,0 +1,80 @@
+#  ====================================================================
+#  Copyright 2026 EcoNet.NZ
+#
+#  Licensed under the Apache License, Version 2.0 (the "License");
+#  you may not use this file except in compliance with the License.
+#  You may obtain a copy of the License at
+#
+#      http://www.apache.org/licenses/LICENSE-2.0
+#
+#  Unless required by applicable law or agreed to in writing, software
+#  distributed under the License is distributed on an "AS IS" BASIS,
+#  WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+#  See the License for the specific language governing permissions and
+#  limitations under the License.
+#  ====================================================================
+
+import hashlib
+import operator
+
+
+def stable_hash(value):
+    # Unlike hash(), the same across processes, so it can be stored between runs
+    return hashlib.blake2b(repr(value).encode('utf-8'), digest_size=16).hexdigest()
+
+
+class Record:
+    """Base class for the slotted record classes of the data model.
+
+    Subclasses list their fields in __slots__. Records compare equal when all their fields other than
+    IGNORED_FIELDS are equal, and have a content hash of those fields that is stable across processes.
+    """
+
+    __slots__ = ()
+
+    # Fields left out of comparisons and the content hash, eg the CAMS ids that a translated record doesn't have
+    IGNORED_FIELDS = frozenset()
+
+    def __init_subclass__(cls, **kwargs):
+        super().__init_subclass__(**kwargs)
+        cls.FIELDS = tuple(field for klass in reversed(cls.__mro__)
+                           for field in klass.__dict__.get('__slots__', ()) if not field.startswith('_'))
+        cls.COMPARED_FIELDS = tuple(field for field in cls.FIELDS if field not in cls.IGNORED_FIELDS)
+        # attrgetter isn't a descriptor, so it's called with the record explicitly. For a single field it returns a
+        # bare value rather than a tuple, which is still fine to compare.
+        cls.get_compared_values = operator.attrgetter(*cls.COMPARED_FIELDS) if cls.COMPARED_FIELDS else staticmethod(lambda record: ())
+
+    def compared_values(self):
+        return self.get_compared_values(self)
+
+    @property
+    def content_hash(self):
+        # Worked out each time rather than cached, since records are changed by setting their fields directly
+        return stable_hash(self.compared_values())
+
+    def changed_fields(self, other, fields=None):
+        """Returns the names of the fields whose values differ from other, in field order.
+
+        By default only the compared fields are checked; pass fields to check others, such as the ignored fields.
+        """
+        fields = self.COMPARED_FIELDS if fields is None else fields
+        if type(other) is not type(self):
+            return list(fields)
+        return [field for field in fields if getattr(self, field) != getattr(other, field)]
+
+    def as_dict(self):
+        return {field: getattr(self, field) for field in self.FIELDS}
+
+    def __eq__(self, other):
+        if type(other) is type(self):
+            return self.compared_values() == other.compared_values()
+        return False
+
+    def __hash__(self):
+        return hash(self.content_hash)
+
+    def __str__(self):
+        return str(self.as_dict())
+
+    def __repr__(self):
+        return str(self.as_dict())
@@ -15,13 +15,20 @@
 #  ====================================================================
 
 import logging
+import os
+
+from inat_to_cams import summary_logger, sync_history_index
 
 
 class SetupLogging():
     def __init__(self):
-        logging.basicConfig(level=logging.INFO, format='%(asctime)s %(levelname)s %(message)s', datefmt='%Y-%m-%d %H:%M:%S', force=True)
-        handler = logging.FileHandler('sync_history.md')
+        # LOG_LEVEL=DEBUG adds per-observation details such as observation field values and the rows written to CAMS
+        level = os.environ.get('LOG_LEVEL', 'INFO').upper()
+        logging.basicConfig(level=level, format='%(asctime)s %(levelname)s %(message)s', datefmt='%Y-%m-%d %H:%M:%S', force=True)
         logger = logging.getLogger('summary')
         logger.setLevel(logging.INFO)
-        logger.addHandler(handler)
+        if not any(isinstance(handler, summary_logger.SummaryHandler) for handler in logger.handlers):
+            # Sync events are only recorded in the history index as they are logged if it is configured
+            index = sync_history_index.SyncHistoryIndex() if os.environ.get('SYNC_HISTORY_INDEX') else None
+            logger.addHandler(summary_logger.SummaryHandler(index=index))
         logger.propagate = False
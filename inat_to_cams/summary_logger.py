@@ -14,13 +14,39 @@
 #  limitations under the License.
 #  ====================================================================
 
+import datetime
+import json
 import logging
+import logging.handlers
+import os
+import re
+import sqlite3
+
+from inat_to_cams import metrics
+
+HISTORY_FILE = 'sync_history.md'
+EVENTS_FILE = 'sync_history.jsonl'
+ARCHIVE_DIRECTORY = 'sync_history_archive'
+# Bounds the memory used by a long run; the buffer is otherwise written once, when the run ends
+BUFFER_CAPACITY = 10000
+# Written at the top of each history file, so we know which month it covers once it is time to archive it
+PERIOD_MARKER = '<!-- sync history for {period} -->'
+PERIOD_MARKER_PATTERN = re.compile(r'<!-- sync history for (\d{4}-\d{2}) -->')
 
 run_details_header = None
 config_name = None
 config_name_written = False
 log_header_written = False
 
+# Descriptions of the sync events in sync_history.md
+EVENT_DESCRIPTIONS = {
+    'new_weed': 'New weed',
+    'geolocation_updated': 'Geolocation updated',
+    'weed_updated': 'Weed record updated',
+    'visit_added': 'Visit record added',
+    'visit_updated': 'Visit record updated',
+}
+
 
 def write_log_header():
     logging.getLogger('summary').info('---')  # horizontal line in GitHub Flavored Markdown
@@ -34,24 +60,146 @@ def write_log_header():
     logging.getLogger('summary').info('|----------|---------|-------|------|--------------|')
 
 
+def write_run_metrics(run_metrics):
+    # Machine-readable timings and counts for the run, collapsed when the markdown is rendered. Only written after the
+    # run's sync events, so that a run which changes nothing leaves sync_history.md unchanged.
+    if not log_header_written:
+        return
+    logging.getLogger('summary').info('')
+    logging.getLogger('summary').info('<details><summary>Run metrics</summary>')
+    logging.getLogger('summary').info('')
+    logging.getLogger('summary').info('```json')
+    logging.getLogger('summary').info(json.dumps(run_metrics, sort_keys=True))
+    logging.getLogger('summary').info('```')
+    logging.getLogger('summary').info('</details>')
+    logging.getLogger('summary').info('')
+
+
+def flush():
+    for handler in logging.getLogger('summary').handlers:
+        handler.flush()
+
+
 def write_config_name():
     if config_name:
         logging.getLogger('summary').info(f'## {config_name}')
 
 
-def write_summary_log(cams_feature, object_id, existing_feature, new_weed_visit_record, weed_geolocation_modified, weed_location_modified, weed_visit_modified):
+def sync_events(existing_feature, new_weed_visit_record, weed_geolocation_modified, weed_location_modified, weed_visit_modified):
+    # The changes written to CAMS for an observation, as (metrics event, description) pairs
     if not existing_feature:
-        description = 'New weed'
-    else:
-        updates = []
-        if weed_geolocation_modified:
-            updates.append('Geolocation updated')
-        if weed_location_modified:
-            updates.append('Weed record updated')
-        if weed_visit_modified:
-            if new_weed_visit_record:
-                updates.append('Visit record added')
-            else:
-                updates.append('Visit record updated')
-        description = ', '.join(updates)
-    logging.getLogger('summary').info(f'|{description}|**{object_id}**|{cams_feature.weed_location.species}|{cams_feature.weed_location.current_status}|[{cams_feature.latest_weed_visit.external_id}]({cams_feature.latest_weed_visit.external_url})|')
+        return [('new_weed', EVENT_DESCRIPTIONS['new_weed'])]
+    events = []
+    if weed_geolocation_modified:
+        events.append('geolocation_updated')
+    if weed_location_modified:
+        events.append('weed_updated')
+    if weed_visit_modified:
+        if new_weed_visit_record:
+            events.append('visit_added')
+        else:
+            events.append('visit_updated')
+    return [(event, EVENT_DESCRIPTIONS[event]) for event in events]
+
+
+def run_details():
+    # The run and its start time, as in the run details header, eg ('Run [18395](...)', '2026-05-13 09:57')
+    if not run_details_header:
+        return '', ''
+    lines = run_details_header.splitlines()
+    return lines[0].lstrip('# ').strip(), lines[1].strip() if len(lines) > 1 else ''
+
+
+def write_summary_log(cams_feature, object_id, existing_feature, new_weed_visit_record, weed_geolocation_modified, weed_location_modified, weed_visit_modified):
+    events = sync_events(existing_feature, new_weed_visit_record, weed_geolocation_modified, weed_location_modified, weed_visit_modified)
+    for event, _ in events:
+        metrics.increment('sync_events', event=event, config=config_name)
+    description = ', '.join(event_description for _, event_description in events)
+    run, run_started = run_details()
+    sync_event = {
+        'run': run,
+        'run_started': run_started,
+        'config': config_name,
+        'events': [event for event, _ in events],
+        'object_id': object_id,
+        'species': cams_feature.weed_location.species,
+        'status': cams_feature.weed_location.current_status,
+        'inat_id': cams_feature.latest_weed_visit.external_id,
+    }
+    logging.getLogger('summary').info(f'|{description}|**{object_id}**|{cams_feature.weed_location.species}|{cams_feature.weed_location.current_status}|[{cams_feature.latest_weed_visit.external_id}]({cams_feature.latest_weed_visit.external_url})|',
+                                      extra={'sync_event': sync_event})
+    return description
+
+
+def current_period():
+    return datetime.datetime.now(datetime.timezone.utc).strftime('%Y-%m')
+
+
+class SummaryHandler(logging.handlers.MemoryHandler):
+    """Buffers the summary log and appends it to sync_history.md in a single write when flushed, which is at the
+    end of the run (including when it fails), or when the buffer is full.
+
+    Each sync event is also written as a JSON line to sync_history.jsonl and, if given, recorded in the sync history
+    index. At the start of each month, the previous month's files are moved to the archive directory.
+    """
+
+    def __init__(self, directory='', capacity=BUFFER_CAPACITY, index=None):
+        # Only flushed on demand or when full, not by the level of a record
+        super().__init__(capacity, flushLevel=logging.CRITICAL + 1)
+        self.directory = directory
+        self.index = index
+
+    def flush(self):
+        self.acquire()
+        try:
+            if not self.buffer:
+                return
+            period = current_period()
+            history_path = os.path.join(self.directory, HISTORY_FILE)
+            self.archive_previous_period(history_path, period)
+
+            lines = [] if os.path.exists(history_path) else [PERIOD_MARKER.format(period=period)]
+            lines.extend(record.getMessage() for record in self.buffer)
+            events = [self.event_record(record) for record in self.buffer if hasattr(record, 'sync_event')]
+            with open(history_path, 'a', encoding='utf-8') as history_file:
+                history_file.write('\n'.join(lines) + '\n')
+            if events:
+                with open(os.path.join(self.directory, EVENTS_FILE), 'a', encoding='utf-8') as events_file:
+                    events_file.write('\n'.join(json.dumps(event, sort_keys=True) for event in events) + '\n')
+                if self.index:
+                    self.record_in_index(events)
+            self.buffer.clear()
+        finally:
+            self.release()
+
+    def record_in_index(self, events):
+        # The index can be rebuilt from the history files, so failing to update it mustn't fail the run
+        try:
+            self.index.record(events)
+        except sqlite3.Error as e:
+            logging.error(f'Could not record sync events in {self.index.path}: {e}')
+
+    @staticmethod
+    def event_record(record):
+        timestamp = datetime.datetime.fromtimestamp(record.created, datetime.timezone.utc)
+        return {'time': timestamp.isoformat(timespec='seconds'), **record.sync_event}
+
+    def archive_previous_period(self, history_path, period):
+        if not os.path.exists(history_path):
+            return
+        with open(history_path, encoding='utf-8') as history_file:
+            first_line = history_file.readline().strip()
+        if first_line == PERIOD_MARKER.format(period=period):
+            return
+
+        # History from before the files were archived monthly has no marker
+        marker = PERIOD_MARKER_PATTERN.fullmatch(first_line)
+        file_period = marker.group(1) if marker else f'until_{period}'
+        archive_directory = os.path.join(self.directory, ARCHIVE_DIRECTORY)
+        os.makedirs(archive_directory, exist_ok=True)
+        for current_file in (HISTORY_FILE, EVENTS_FILE):
+            current_path = os.path.join(self.directory, current_file)
+            if os.path.exists(current_path):
+                stem, extension = os.path.splitext(current_file)
+                os.replace(current_path, os.path.join(archive_directory, f'{stem}_{file_period}{extension}'))
+        logging.info(f'Archived sync history for {file_period} to {archive_directory}')
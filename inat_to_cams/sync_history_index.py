@@ -0,0 +1,217 @@
+#  ====================================================================
+#  Copyright 2026 EcoNet.NZ
+#
+#  Licensed under the Apache License, Version 2.0 (the "License");
+#  you may not use this file except in compliance with the License.
+#  You may obtain a copy of the License at
+#
+#      http://www.apache.org/licenses/LICENSE-2.0
+#
+#  Unless required by applicable law or agreed to in writing, software
+#  distributed under the License is distributed on an "AS IS" BASIS,
+#  WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+#  See the License for the specific language governing permissions and
+#  limitations under the License.
+#  ====================================================================
+
+import contextlib
+import datetime
+import hashlib
+import json
+import logging
+import os
+import re
+import sqlite3
+
+import pytz
+
+from inat_to_cams import summary_logger
+
+DEFAULT_FILE = 'sync_history.sqlite'
+# The run details header in sync_history.md is in New Zealand time
+RUN_TIMEZONE = pytz.timezone('Pacific/Auckland')
+
+COLUMNS = ('time', 'run', 'run_started', 'config', 'events', 'object_id', 'species', 'status', 'inat_id')
+SCHEMA = '''
+    CREATE TABLE IF NOT EXISTS sync_events (
+        time TEXT NOT NULL,
+        run TEXT NOT NULL,
+        run_started TEXT NOT NULL,
+        config TEXT,
+        events TEXT NOT NULL,
+        object_id INTEGER,
+        species TEXT,
+        status TEXT,
+        inat_id INTEGER
+    );
+    CREATE INDEX IF NOT EXISTS sync_events_inat_id ON sync_events (inat_id);
+    CREATE INDEX IF NOT EXISTS sync_events_object_id ON sync_events (object_id);
+    CREATE INDEX IF NOT EXISTS sync_events_species ON sync_events (species);
+    CREATE INDEX IF NOT EXISTS sync_events_time ON sync_events (time);
+    CREATE INDEX IF NOT EXISTS sync_events_run ON sync_events (run, run_started);
+    CREATE TABLE IF NOT EXISTS imported_rows (
+        row_key TEXT PRIMARY KEY
+    );
+'''
+
+RUN_HEADER_PATTERN = re.compile(r'^# (Run .*)$')
+RUN_STARTED_PATTERN = re.compile(r'^\d{4}-\d{2}-\d{2} \d{2}:\d{2}$')
+CONFIG_PATTERN = re.compile(r'^## (.+)$')
+TABLE_HEADER_PATTERN = re.compile(r'^\|(Sync Event\|.*|[-|]+)$')
+EVENT_ROW_PATTERN = re.compile(
+    r'^\|(?P<description>[^|*]*)\|\*\*(?P<object_id>\d+)\*\*\|(?P<species>[^|]*)\|(?P<status>[^|]*)\|\[(?P<inat_id>\d+)\]\([^)]*\)\|$')
+EVENTS_BY_DESCRIPTION = {description: event for event, description in summary_logger.EVENT_DESCRIPTIONS.items()}
+
+
+def index_path():
+    return os.environ.get('SYNC_HISTORY_INDEX', DEFAULT_FILE)
+
+
+def run_started_time(run_started):
+    local_time = RUN_TIMEZONE.localize(datetime.datetime.strptime(run_started, '%Y-%m-%d %H:%M'))
+    return local_time.astimezone(datetime.timezone.utc).isoformat(timespec='seconds')
+
+
+class SyncHistoryIndex:
+    """An SQLite index of the sync events in sync_history.md, for looking up when an observation was synced and
+    what changed, by iNaturalist id, OBJECTID, species or date.
+
+    Events are recorded as the summary log is written. The index is local, and can be rebuilt from the history files,
+    including those written before it existed.
+    """
+
+    def __init__(self, path=None):
+        self.path = path or index_path()
+
+    @contextlib.contextmanager
+    def connect(self):
+        connection = sqlite3.connect(self.path)
+        connection.row_factory = sqlite3.Row
+        try:
+            connection.executescript(SCHEMA)
+            # Commits on success and rolls back on failure
+            with connection:
+                yield connection
+        finally:
+            connection.close()
+
+    def record(self, events):
+        rows = [(event['time'], event['run'] or '', event.get('run_started') or '', event['config'], ','.join(event['events']),
+                 event['object_id'], event['species'], event['status'], int(event['inat_id']))
+                for event in events]
+        with self.connect() as connection:
+            connection.executemany(f'INSERT INTO sync_events ({", ".join(COLUMNS)}) VALUES ({", ".join("?" * len(COLUMNS))})', rows)
+        return len(rows)
+
+    def query(self, inat_id=None, object_id=None, species=None, since=None, until=None):
+        conditions, parameters = [], []
+        for column, value in (('inat_id', inat_id), ('object_id', object_id), ('species', species)):
+            if value is not None:
+                conditions.append(f'{column} = ?')
+                parameters.append(value)
+        if since:
+            conditions.append('time >= ?')
+            parameters.append(since)
+        if until:
+            conditions.append('time < ?')
+            parameters.append(until)
+        where = f'WHERE {" AND ".join(conditions)}' if conditions else ''
+        with self.connect() as connection:
+            rows = connection.execute(f'SELECT {", ".join(COLUMNS)} FROM sync_events {where} ORDER BY time, rowid', parameters)
+            return [dict(row) for row in rows]
+
+    def import_history(self, path):
+        """Imports the sync events from a sync_history.md or sync_history.jsonl file, skipping runs already indexed.
+
+        Events from before runs had a header can't be told apart by run, so those are keyed by the text of their row
+        and how many identical rows come before it in the file, and skipped if a row with the same key has been
+        imported before. The file can have more rows appended between imports.
+        """
+        events, skipped = self.read_events(path) if path.endswith('.jsonl') else self.parse_markdown(path)
+        if skipped:
+            logging.warning(f'Skipped {skipped} unrecognised lines in {path}')
+        row_keys = self.row_keys(events)
+        with self.connect() as connection:
+            indexed_runs = {tuple(row) for row in connection.execute('SELECT DISTINCT run, run_started FROM sync_events')}
+            imported_rows = {row_key for row_key, in connection.execute('SELECT row_key FROM imported_rows')}
+            connection.executemany('INSERT OR IGNORE INTO imported_rows (row_key) VALUES (?)',
+                                   ((row_key,) for row_key in row_keys if row_key))
+        new_events = [event for event, row_key in zip(events, row_keys)
+                      if self.is_new(event, row_key, indexed_runs, imported_rows)]
+        imported = self.record(new_events)
+        logging.info(f'Imported {imported} of {len(events)} sync events from {path}')
+        return imported
+
+    @staticmethod
+    def event_run(event):
+        return event['run'] or '', event.get('run_started') or ''
+
+    @staticmethod
+    def row_keys(events):
+        # The key of each event without a run, or None for those with one
+        row_keys, ordinals = [], {}
+        for event in events:
+            if SyncHistoryIndex.event_run(event) != ('', ''):
+                row_keys.append(None)
+                continue
+            row_hash = hashlib.sha256(event['row'].encode('utf-8')).hexdigest()
+            ordinals[row_hash] = ordinals.get(row_hash, -1) + 1
+            row_keys.append(f'{row_hash}:{ordinals[row_hash]}')
+        return row_keys
+
+    @staticmethod
+    def is_new(event, row_key, indexed_runs, imported_rows):
+        return row_key not in imported_rows if row_key else SyncHistoryIndex.event_run(event) not in indexed_runs
+
+    @staticmethod
+    def read_events(path):
+        # Returns the events and the number of lines that couldn't be read, eg one partly written when a run failed
+        events, skipped = [], 0
+        with open(path, encoding='utf-8') as events_file:
+            for line in events_file:
+                if not line.strip():
+                    continue
+                try:
+                    event = json.loads(line)
+                except json.JSONDecodeError:
+                    skipped += 1
+                    continue
+                event['row'] = line.strip()
+                events.append(event)
+        return events, skipped
+
+    @staticmethod
+    def parse_markdown(path):
+        # Returns the events and the number of table rows that aren't sync events
+        events, skipped = [], 0
+        run, run_started, config_name = '', '', None
+        with open(path, encoding='utf-8') as history_file:
+            for line in history_file:
+                line = line.strip()
+                run_header = RUN_HEADER_PATTERN.match(line)
+                config_header = CONFIG_PATTERN.match(line)
+                match = EVENT_ROW_PATTERN.match(line)
+                if run_header:
+                    run, run_started, config_name = run_header.group(1).strip(), '', None
+                elif RUN_STARTED_PATTERN.match(line) and not run_started:
+                    run_started = line
+                elif config_header:
+                    config_name = config_header.group(1)
+                elif match:
+                    # The description is empty for an observation synced without any changes to CAMS
+                    descriptions = match.group('description').split(', ') if match.group('description') else []
+                    events.append({
+                        'time': run_started_time(run_started) if run_started else '',
+                        'run': run,
+                        'run_started': run_started,
+                        'config': config_name,
+                        'events': [EVENTS_BY_DESCRIPTION.get(description, description) for description in descriptions],
+                        'object_id': int(match.group('object_id')),
+                        'species': match.group('species'),
+                        'status': match.group('status'),
+                        'inat_id': match.group('inat_id'),
+                        'row': line,
+                    })
+                elif line.startswith('|') and not TABLE_HEADER_PATTERN.match(line):
+                    skipped += 1
+        return events, skipped
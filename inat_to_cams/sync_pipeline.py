@@ -0,0 +1,233 @@
+#  ====================================================================
+#  Copyright 2026 EcoNet.NZ
+#
+#  Licensed under the Apache License, Version 2.0 (the "License");
+#  you may not use this file except in compliance with the License.
+#  You may obtain a copy of the License at
+#
+#      http://www.apache.org/licenses/LICENSE-2.0
+#
+#  Unless required by applicable law or agreed to in writing, software
+#  distributed under the License is distributed on an "AS IS" BASIS,
+#  WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+#  See the License for the specific language governing permissions and
+#  limitations under the License.
+#  ====================================================================
+
+import logging
+import os
+import queue
+import threading
+import time
+
+import func_timeout
+
+from inat_to_cams import cams_reader, cams_writer, exceptions, inaturalist_reader, metrics
+
+# The stages after fetching, in order, each fed by a bounded queue. Translation is fed a page of observations at a
+# time, and the later stages one observation at a time.
+STAGES = ('translate', 'lookup', 'write')
+# Worker threads per stage, each of which can be set with eg SYNC_LOOKUP_WORKERS. Translation is CPU bound, so
+# gains nothing from more threads, while CAMS lookups of different observations can wait on the network together.
+DEFAULT_WORKERS = {'translate': 1, 'lookup': 4, 'write': 1}
+# Observations (or pages, for translation) queued for each stage, set with SYNC_QUEUE_SIZE. The default is one page of
+# search results.
+DEFAULT_QUEUE_SIZE = 200
+# Seconds to wait for each page of observations, in case the iNaturalist request hangs
+PAGE_TIMEOUT_SECONDS = 120
+# Number of observations synced between checkpoints of the sync state
+CHECKPOINT_INTERVAL = 200
+
+# Put on a stage's queue once for each of its workers after the stage feeding it has finished
+END = object()
+
+
+def stage_workers(stage):
+    return max(1, int(os.environ.get(f'SYNC_{stage.upper()}_WORKERS', DEFAULT_WORKERS[stage])))
+
+
+def queue_size():
+    return max(1, int(os.environ.get('SYNC_QUEUE_SIZE', DEFAULT_QUEUE_SIZE)))
+
+
+class ObservationSync:
+    """An observation on its way through the pipeline, with what each stage has found out about it"""
+
+    __slots__ = ('observation', 'cams_feature', 'translated_hash', 'existing_feature')
+
+    def __init__(self, observation):
+        self.observation = observation
+        self.cams_feature = None
+        self.translated_hash = None
+        self.existing_feature = None
+
+
+class SyncPipeline:
+    """Syncs the observations updated for one sync configuration in stages: fetch, translate, CAMS lookup and CAMS
+    write. The fetch runs on the calling thread and each other stage on its own worker threads, connected by bounded
+    queues, so the network-bound stages overlap and a full queue holds up the stages feeding it.
+
+    Observations can finish in a different order from the one they were fetched in, so the time of last update must
+    only be moved on to time_of_latest_update once every observation fetched has been synced (see complete). Until
+    then, the observations synced are checkpointed through their feature hashes.
+    """
+
+    def __init__(self, synchroniser, config_name, file_prefix, seen_ids, workers=None, queue_capacity=None):
+        self.synchroniser = synchroniser
+        self.state = synchroniser.state
+        self.stopping = synchroniser.stopping
+        self.config_name = config_name
+        self.file_prefix = file_prefix
+        # The ids of the observations already synced in this run, which are not synced again for this configuration
+        self.seen_ids = seen_ids
+        self.workers = workers or {stage: stage_workers(stage) for stage in STAGES}
+        capacity = queue_capacity or queue_size()
+        self.queues = {stage: queue.Queue(capacity) for stage in STAGES}
+
+        # Guards the counts, the time of latest update and the feature hashes, which are saved with each checkpoint
+        self.lock = threading.Lock()
+        self.failed = threading.Event()
+        self.error = None
+        self.fetched = 0
+        self.unique = 0
+        self.invalid = 0
+        self.synced = 0
+        self.timed_out = False
+        self.time_of_latest_update = None
+
+    @property
+    def complete(self):
+        # Whether every observation updated since the time of last update has been synced
+        return not (self.timed_out or self.stopping.is_set() or self.failed.is_set()) and self.synced == self.unique
+
+    def run(self, paginator, time_of_previous_update):
+        self.time_of_latest_update = time_of_previous_update
+        threads = {stage: [threading.Thread(target=self.run_stage, args=(stage,), name=f'sync-{stage}-{number}', daemon=True)
+                           for number in range(self.workers[stage])]
+                   for stage in STAGES}
+        for stage_threads in threads.values():
+            for thread in stage_threads:
+                thread.start()
+
+        try:
+            self.fetch(paginator)
+        except BaseException as e:
+            self.fail(e)
+        finally:
+            for stage in STAGES:
+                for _ in threads[stage]:
+                    self.queues[stage].put(END)
+                for thread in threads[stage]:
+                    thread.join()
+
+        if self.error:
+            raise self.error
+
+    def fetch(self, paginator):
+        fetch_seconds = 0.0
+        try:
+            while not paginator.exhausted and not self.abandoned():
+                start = time.perf_counter()
+                try:
+                    page = func_timeout.func_timeout(PAGE_TIMEOUT_SECONDS, inaturalist_reader.INatReader.fetch_page, args=(paginator,))
+                except func_timeout.FunctionTimedOut:
+                    self.timed_out = True
+                    return
+                finally:
+                    fetch_seconds += time.perf_counter() - start
+
+                self.fetched += len(page)
+                items = []
+                for observation in page:
+                    # Filter out observations that have already been processed in other configs
+                    if observation.id in self.seen_ids:
+                        continue
+                    self.seen_ids.add(observation.id)
+                    items.append(ObservationSync(observation))
+                if items:
+                    with self.lock:
+                        self.unique += len(items)
+                    self.queues['translate'].put(items)
+        finally:
+            metrics.record_timing('inat_fetch', fetch_seconds, config=self.config_name)
+
+    def abandoned(self):
+        return self.stopping.is_set() or self.failed.is_set()
+
+    def run_stage(self, stage):
+        step = getattr(self, stage)
+        next_queue = self.queues[STAGES[STAGES.index(stage) + 1]] if stage != STAGES[-1] else None
+        while True:
+            item = self.queues[stage].get()
+            if item is END:
+                return
+            if self.abandoned():
+                # Dropped, and fetched again by the next run since the time of last update is not moved on
+                continue
+            try:
+                for passed_item in step(item):
+                    next_queue.put(passed_item)
+            except Exception as e:
+                self.fail(e)
+
+    # Each stage returns the observations passed on to the next stage
+
+    def translate(self, page):
+        flattened = []
+        for item in page:
+            try:
+                inat_observation = self.synchroniser.flatten_observation(item.observation)
+            except exceptions.InvalidObservationError:
+                logging.info(f'Ignoring invalid observation {item.observation.id}')
+                metrics.increment('observations_invalid', config=self.config_name)
+                self.finish(item, invalid=True)
+                continue
+            if inat_observation:
+                flattened.append((item, inat_observation))
+            else:
+                self.finish(item)
+
+        # Translated together, so that the CAMS taxon of each lineage in the page is only looked up once
+        translations = self.synchroniser.translate_observations(
+            [(inat_observation, item.observation) for item, inat_observation in flattened])
+        passed = []
+        for (item, _), translated in zip(flattened, translations):
+            if translated:
+                item.cams_feature, item.translated_hash = translated
+                if not self.synchroniser.skip_if_unchanged(item.observation, item.cams_feature, item.translated_hash):
+                    passed.append(item)
+                    continue
+            self.finish(item)
+        return passed
+
+    def lookup(self, item):
+        item.existing_feature = cams_reader.CamsReader().read_observation(item.cams_feature.latest_weed_visit.external_id)
+        return [item]
+
+    def write(self, item):
+        cams_writer.CamsWriter().write_observation_over(item.cams_feature, item.existing_feature)
+        self.finish(item, written=True)
+        return []
+
+    def finish(self, item, written=False, invalid=False):
+        with self.lock:
+            if written:
+                self.state.feature_hashes.record(item.observation.id, item.translated_hash, item.observation.updated_at)
+            if invalid:
+                self.invalid += 1
+            self.synced += 1
+            self.time_of_latest_update = max(self.time_of_latest_update, item.observation.updated_at)
+            if self.synced % CHECKPOINT_INTERVAL == 0:
+                self.checkpoint()
+
+    def checkpoint(self):
+        # The time of last update can't be moved on until all the observations have been synced, but the feature
+        # hashes of those synced so far are kept. Called with the lock held, so the hashes don't change while saved.
+        self.state.set_checkpoint(self.file_prefix, {'observations': self.unique, 'synced': self.synced})
+        self.state.commit()
+
+    def fail(self, error):
+        with self.lock:
+            if self.error is None:
+                self.error = error
+        self.failed.set()
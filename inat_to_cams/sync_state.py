@@ -0,0 +1,180 @@
+#  ====================================================================
+#  Copyright 2026 EcoNet.NZ
+#
+#  Licensed under the Apache License, Version 2.0 (the "License");
+#  you may not use this file except in compliance with the License.
+#  You may obtain a copy of the License at
+#
+#      http://www.apache.org/licenses/LICENSE-2.0
+#
+#  Unless required by applicable law or agreed to in writing, software
+#  distributed under the License is distributed on an "AS IS" BASIS,
+#  WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+#  See the License for the specific language governing permissions and
+#  limitations under the License.
+#  ====================================================================
+
+import contextlib
+import datetime
+import glob
+import json
+import logging
+import os
+
+try:
+    import fcntl
+except ImportError:  # Not available on Windows, where concurrent runs are not locked out
+    fcntl = None
+
+from inat_to_cams import feature_hashes
+
+DEFAULT_FILE = 'sync_state.json'
+VERSION = 1
+DEFAULT_TIME_OF_LAST_UPDATE = '2000-01-01T00:00:00+12:00'
+
+# State files from before the sync state was consolidated, imported on the first run
+LEGACY_TIME_OF_LAST_UPDATE_SUFFIX = '_time_of_last_update.txt'
+LEGACY_FEATURE_HASHES_FILE = 'synced_feature_hashes.json'
+
+
+def state_path():
+    return os.environ.get('SYNC_STATE_FILE', DEFAULT_FILE)
+
+
+class SyncState:
+    """The state carried between sync runs, stored in a single JSON file.
+
+    For each sync configuration, keyed by its file_prefix, this holds the time of last update, a summary of the
+    last run and, while a run is in progress, a checkpoint of how far it has got. It also holds the hash of each
+    observation's translated feature as last synced (see feature_hashes), and the fingerprint of the CAMS schema as
+    last verified (see cams_interface.CamsSchemaComparator).
+
+    Changes are only written by commit, which replaces the file atomically. Runs hold a lock on the state while
+    they use it, so concurrent runs wait for each other rather than overwriting each other's state.
+    """
+
+    def __init__(self, path=None):
+        self.path = path or state_path()
+        self.configs = {}
+        self.feature_hashes = feature_hashes.FeatureHashes()
+        self.schema_fingerprints = {}
+        self.legacy_files = []
+
+    @contextlib.contextmanager
+    def locked(self):
+        lock_path = self.path + '.lock'
+        with open(lock_path, 'w') as lock_file:
+            if fcntl:
+                try:
+                    fcntl.flock(lock_file, fcntl.LOCK_EX | fcntl.LOCK_NB)
+                except BlockingIOError:
+                    logging.warning(f'Waiting for another run to release {lock_path}')
+                    fcntl.flock(lock_file, fcntl.LOCK_EX)
+            try:
+                self.load()
+                yield self
+            finally:
+                if fcntl:
+                    fcntl.flock(lock_file, fcntl.LOCK_UN)
+
+    def load(self):
+        self.configs = {}
+        self.feature_hashes = feature_hashes.FeatureHashes()
+        self.schema_fingerprints = {}
+        self.legacy_files = []
+        if not os.path.exists(self.path):
+            self.import_legacy_files()
+            return
+
+        with open(self.path, encoding='utf-8') as state_file:
+            contents = json.load(state_file)
+        if contents.get('version') != VERSION:
+            raise ValueError(f'{self.path} has version {contents.get("version")}, but version {VERSION} is expected')
+        self.configs = contents['configs']
+        self.schema_fingerprints = contents.get('schema_fingerprints', {})
+
+        hashes = contents.get('feature_hashes', {})
+        if hashes.get('version') == feature_hashes.VERSION:
+            self.feature_hashes = feature_hashes.FeatureHashes(hashes['hashes'])
+        else:
+            logging.info(f'Ignoring feature hashes from version {hashes.get("version")}')
+        logging.info(f'Loaded sync state for {len(self.configs)} configurations and {len(self.feature_hashes.hashes)} observations from {self.path}')
+
+    def import_legacy_files(self):
+        directory = os.path.dirname(self.path)
+        for legacy_file in sorted(glob.glob(os.path.join(directory, '*' + LEGACY_TIME_OF_LAST_UPDATE_SUFFIX))):
+            file_prefix = os.path.basename(legacy_file)[:-len(LEGACY_TIME_OF_LAST_UPDATE_SUFFIX)]
+            with open(legacy_file, encoding='utf-8') as time_file:
+                self.config_state(file_prefix)['time_of_last_update'] = time_file.read().strip()
+            self.legacy_files.append(legacy_file)
+
+        legacy_hashes_file = os.path.join(directory, LEGACY_FEATURE_HASHES_FILE)
+        if os.path.exists(legacy_hashes_file):
+            with open(legacy_hashes_file, encoding='utf-8') as hashes_file:
+                hashes = json.load(hashes_file)
+            if hashes.get('version') == feature_hashes.VERSION:
+                self.feature_hashes = feature_hashes.FeatureHashes(hashes['hashes'])
+            self.legacy_files.append(legacy_hashes_file)
+
+        if self.legacy_files:
+            logging.info(f'Imported sync state from {", ".join(self.legacy_files)}; they will be removed once {self.path} is written')
+
+    def commit(self):
+        self.prune_feature_hashes()
+        contents = {
+            'version': VERSION,
+            'configs': self.configs,
+            'feature_hashes': {'version': feature_hashes.VERSION, 'hashes': self.feature_hashes.hashes},
+            'schema_fingerprints': self.schema_fingerprints,
+        }
+        # Write to a temporary file and rename it, so an interrupted run can't leave a truncated state file
+        temporary_path = self.path + '.tmp'
+        with open(temporary_path, 'w', encoding='utf-8') as state_file:
+            # One entry per line keeps the diffs small when the file is committed after each run
+            json.dump(contents, state_file, indent=0, sort_keys=True)
+            state_file.flush()
+            os.fsync(state_file.fileno())
+        os.replace(temporary_path, self.path)
+
+        for legacy_file in self.legacy_files:
+            os.remove(legacy_file)
+        self.legacy_files = []
+
+    def prune_feature_hashes(self):
+        # Measured from the latest time of last update rather than the current time, so a run that syncs nothing
+        # leaves the state file unchanged
+        times_of_last_update = [self.time_of_last_update(file_prefix) for file_prefix, values in self.configs.items()
+                                if 'time_of_last_update' in values]
+        if not times_of_last_update:
+            return
+        pruned = self.feature_hashes.prune(max(times_of_last_update) - feature_hashes.RETENTION)
+        if pruned:
+            logging.info(f'Dropped the feature hashes of {pruned} observations not updated in the last {feature_hashes.RETENTION.days} days')
+
+    def config_state(self, file_prefix):
+        return self.configs.setdefault(file_prefix, {})
+
+    def time_of_last_update(self, file_prefix):
+        timestamp = self.configs.get(file_prefix, {}).get('time_of_last_update', DEFAULT_TIME_OF_LAST_UPDATE)
+        return datetime.datetime.fromisoformat(timestamp)
+
+    def set_time_of_last_update(self, file_prefix, time_of_last_update):
+        self.config_state(file_prefix)['time_of_last_update'] = time_of_last_update.isoformat()
+
+    def checkpoint(self, file_prefix):
+        return self.configs.get(file_prefix, {}).get('checkpoint')
+
+    def set_checkpoint(self, file_prefix, checkpoint):
+        self.config_state(file_prefix)['checkpoint'] = checkpoint
+
+    def clear_checkpoint(self, file_prefix):
+        self.config_state(file_prefix).pop('checkpoint', None)
+
+    def set_last_run(self, file_prefix, last_run):
+        self.config_state(file_prefix)['last_run'] = last_run
+
+    def schema_fingerprint(self, schema_entity):
+        return self.schema_fingerprints.get(schema_entity)
+
+    def set_schema_fingerprint(self, schema_entity, fingerprint):
+        self.schema_fingerprints[schema_entity] = fingerprint
@@ -14,15 +14,28 @@
 #  limitations under the License.
 #  ====================================================================
 
-import datetime
-import func_timeout
 import logging
-import pathlib
+import threading
 
-from inat_to_cams import cams_writer, config, exceptions, inaturalist_reader, summary_logger, translator
+from inat_to_cams import cams_interface, cams_writer, config, exceptions, feature_hashes, inaturalist_reader, metrics, summary_logger, sync_pipeline, \
+    sync_state, translator
 
 
 class INatToCamsSynchroniser():
+    def __init__(self):
+        self.state = sync_state.SyncState()
+        # Set to stop a sync part way through, eg by the daemon on SIGTERM. The sync state is committed first.
+        self.stopping = threading.Event()
+
+    def check_cams_schema(self):
+        # Checks the CAMS schema is as expected before syncing, skipped while its fingerprint is unchanged
+        with self.state.locked():
+            schema_comparator = cams_interface.CamsSchemaComparator(self.state)
+            schema_comparator.compare('WeedLocations')
+            schema_comparator.compare('Visits_Table')
+            if schema_comparator.updated:
+                self.state.commit()
+
     # def sync_single_observation(inat_id):
     #     cams_interface.connection.delete_rows_between(inat_id, inat_id)
     #     observation_in_json = pyinaturalist.get_observation(inat_id)
@@ -35,7 +48,12 @@ class INatToCamsSynchroniser():
         except exceptions.InvalidObservationError:
             logging.info(f'Ignoring invalid observation {observation.id}')
 
-    def sync_updated_observations(self):
+    def sync_updated_observations(self, config_names=None):
+        # Syncs the configurations named, or all of them
+        with self.state.locked():
+            return self.sync_configurations(config_names)
+
+    def sync_configurations(self, config_names):
         new_observations_by_project = {}
         # Keep track of all observation IDs to avoid double counting
         all_processed_observation_ids = set()
@@ -54,13 +72,19 @@ class INatToCamsSynchroniser():
                     taxon_ids_by_place[place_id].update(taxon_ids)
 
         for config_name, values in config.sync_configuration.items():
-            p = pathlib.Path(
-                values['file_prefix'] + '_time_of_last_update.txt')
-
-            if p.exists():
-                timestamp = p.read_text()
-            else:
-                timestamp = '2000-01-01T00:00:00+12:00'
+            if config_names is not None and config_name not in config_names:
+                continue
+            if self.stopping.is_set():
+                break
+            file_prefix = values['file_prefix']
+            time_of_previous_update = self.state.time_of_last_update(file_prefix)
+            timestamp = time_of_previous_update.isoformat()
+
+            checkpoint = self.state.checkpoint(file_prefix)
+            if checkpoint:
+                # The feature hashes saved with the checkpoint mean the observations it synced are skipped this time
+                logging.warning(f"The last run of '{config_name}' stopped after syncing {checkpoint['synced']} "
+                                f"of {checkpoint['observations']} observations")
 
             place_ids = values['place_ids']
             is_project_based = 'project_id' in values
@@ -88,57 +112,58 @@ class INatToCamsSynchroniser():
                     f"Syncing '{config_name}' with taxon_ids '{taxon_ids}' "
                     f"and place_ids '{place_ids}' since {timestamp}")
 
-            time_of_previous_update = datetime.datetime.fromisoformat(timestamp)
             logging.info("Previous update: " + str(time_of_previous_update))
-            time_of_latest_update = time_of_previous_update
-
-            try:
-                if is_project_based:
-                    observations = func_timeout.func_timeout(
-                        120,  # seconds
-                        inaturalist_reader.INatReader().get_project_observations_updated_since,
-                        args=(place_ids, project_id, time_of_previous_update),
-                        kwargs={'not_taxon_ids': list(not_taxon_ids) if not_taxon_ids else None}
-                    )
-                else:
-                    observations = func_timeout.func_timeout(
-                        120,  # seconds
-                        inaturalist_reader.INatReader().get_matching_observations_updated_since,
-                        args=(place_ids, taxon_ids, time_of_previous_update)
-                    )
-            except func_timeout.FunctionTimedOut:
-                logging.error(f"Timed out fetching observations for {config_name}")
-                continue
+            metrics.set_gauge('watermark_timestamp_seconds', time_of_previous_update.timestamp(), config=config_name)
 
-            # Filter out observations that have already been processed in other configs
-            unique_observations = []
-            for obs in observations:
-                if obs.id not in all_processed_observation_ids:
-                    unique_observations.append(obs)
-                    all_processed_observation_ids.add(obs.id)
+            if is_project_based:
+                paginator = inaturalist_reader.INatReader.search_project_observations_updated_since(
+                    place_ids, project_id, time_of_previous_update, not_taxon_ids=list(not_taxon_ids) if not_taxon_ids else None)
+            else:
+                paginator = inaturalist_reader.INatReader.search_matching_observations_updated_since(
+                    place_ids, taxon_ids, time_of_previous_update)
+
+            self.setup_summary_log_to_print_config_name(config_name)
+            pipeline = sync_pipeline.SyncPipeline(self, config_name, file_prefix, all_processed_observation_ids)
+            pipeline.run(paginator, time_of_previous_update)
 
             logging.info(
-                f"{str(len(observations))} new or updated observations for {config_name}")
+                f"{str(pipeline.fetched)} new or updated observations for {config_name}")
             logging.info(
-                f"{str(len(unique_observations))} unique observations (not in other configs)")
-            
-            # Store only the count of unique observations
-            new_observations_by_project[config_name] = len(unique_observations)
+                f"{str(pipeline.unique)} unique observations (not in other configs)")
 
-            self.setup_summary_log_to_print_config_name(config_name)
-
-            for observation in unique_observations:
-                try:
-                    self.sync_observation(observation)
-                except exceptions.InvalidObservationError:
-                    logging.info(
-                        f'Ignoring invalid observation {observation.id}')
+            # Store only the count of unique observations
+            new_observations_by_project[config_name] = pipeline.unique
+            metrics.increment('observations_fetched', pipeline.fetched, config=config_name)
+            metrics.increment('observations_unique', pipeline.unique, config=config_name)
 
-                time_of_latest_update = max(
-                    time_of_latest_update, observation.updated_at)
+            if pipeline.timed_out:
+                logging.error(f"Timed out fetching observations for {config_name}")
+                metrics.increment('inat_fetch_timeouts', config=config_name)
+                if pipeline.synced:
+                    # The observations synced before the timeout are kept in the checkpoint
+                    pipeline.checkpoint()
+                self.state.set_last_run(file_prefix, {'error': 'Timed out fetching observations'})
+                self.state.commit()
+                continue
+            if not pipeline.complete:
+                logging.warning(f"Stopping '{config_name}' after syncing {pipeline.synced} of {pipeline.unique} observations")
+                pipeline.checkpoint()
+                break
 
+            time_of_latest_update = pipeline.time_of_latest_update
             if time_of_latest_update > time_of_previous_update:
-                p.write_text(time_of_latest_update.isoformat())
+                self.state.set_time_of_last_update(file_prefix, time_of_latest_update)
+            self.state.clear_checkpoint(file_prefix)
+            if pipeline.fetched:
+                # Only for runs that fetched observations, so that runs with nothing to sync don't change the state file
+                self.state.set_last_run(file_prefix, {
+                    'observations_fetched': pipeline.fetched,
+                    'observations_unique': pipeline.unique,
+                    'observations_invalid': pipeline.invalid,
+                    'observations_skipped_unchanged': metrics.counter_value('observations_skipped_unchanged', config=config_name),
+                })
+            self.state.commit()
+            metrics.set_gauge('watermark_timestamp_seconds', time_of_latest_update.timestamp(), config=config_name)
 
         # Add a total count of unique observations
         new_observations_by_project['TOTAL (unique observations)'] = len(all_processed_observation_ids)
@@ -149,25 +174,51 @@ class INatToCamsSynchroniser():
         summary_logger.config_name = config_name
         summary_logger.config_name_written = False
 
-    def sync_observation(self, observation):
-        logging.info('-' * 80)
-        logging.info(f'Syncing iNaturalist observation {observation}')
-        inat_observation = inaturalist_reader.INatReader.flatten(observation)
-        logging.info(f'Observed on {inat_observation.observed_on}')
-
-        if not inat_observation:
+    @metrics.timed('sync_stage', stage='sync_observation')
+    def sync_observation(self, observation, skip_unchanged=False):
+        translated = self.translate_observation(observation)
+        if not translated:
             return
+        cams_feature, translated_hash = translated
 
-        inat_to_cams_translator = translator.INatToCamsTranslator()
-        cams_feature = inat_to_cams_translator.translate(inat_observation, observation)
-
-        if not cams_feature:
-            return
+        if skip_unchanged and self.skip_if_unchanged(observation, cams_feature, translated_hash):
+            return cams_feature, None
 
-        writer = cams_writer.CamsWriter()
-        global_id = writer.write_observation(cams_feature)
+        global_id = cams_writer.CamsWriter().write_observation(cams_feature)
+        self.state.feature_hashes.record(observation.id, translated_hash, observation.updated_at)
 
         return cams_feature, global_id
 
+    def translate_observation(self, observation):
+        # Returns the translated CamsFeature and its hash, or None if there is nothing to sync
+        inat_observation = self.flatten_observation(observation)
+
+        if not inat_observation:
+            return None
+
+        return self.translate_observations([(inat_observation, observation)])[0]
+
+    @staticmethod
+    def flatten_observation(observation):
+        logging.debug('Syncing iNaturalist observation %s', observation)
+        return inaturalist_reader.INatReader.flatten(observation)
+
+    @staticmethod
+    def translate_observations(flattened):
+        # Returns the translated CamsFeature and its hash for each (iNatObservation, original observation) pair, or
+        # None for those with nothing to sync
+        cams_features = translator.INatToCamsTranslator().translate_many(flattened)
+
+        # Hashed before writing, since the writer copies some values from the existing CAMS feature
+        return [(cams_feature, feature_hashes.feature_hash(cams_feature)) if cams_feature else None
+                for cams_feature in cams_features]
+
+    def skip_if_unchanged(self, observation, cams_feature, translated_hash):
+        if not self.state.feature_hashes.is_unchanged(observation.id, translated_hash):
+            return False
+        cams_writer.CamsWriter().log_outcome(cams_feature, 'No relevant updates since last sync, so not read from CAMS', True)
+        metrics.increment('observations_skipped_unchanged', config=summary_logger.config_name)
+        return True
+
 
 synchroniser = INatToCamsSynchroniser()
@@ -55,7 +55,7 @@ class TestCamsWriter(CamsWriter):
         cams_feature = reader.read_observation(inat_id)
 
         new_layer_row = [{
-            'geometry': cams_feature.geolocation,
+            'geometry': cams_feature.geolocation.as_geometry(),
             'attributes': {}
         }]
 
@@ -73,7 +73,7 @@ class TestCamsWriter(CamsWriter):
         cams_feature = reader.read_observation(inat_id)
 
         new_layer_row = [{
-            'geometry': cams_feature.geolocation,
+            'geometry': cams_feature.geolocation.as_geometry(),
             'attributes': {}
         }]
 
@@ -18,38 +18,61 @@ from datetime import datetime
 import logging
 import re
 
-from arcgis import geometry
 from pyinaturalist import get_user_by_id
 
-from inat_to_cams import cams_feature, config
+from inat_to_cams import cams_feature, config, metrics
+
+
+# issue #86: URLs with an '=' within are not supported
+INVALID_URL_PATTERN = re.compile(r'<a\s+href="[^"]*=[^"]*".*?>.*?</a>')
 
 
 class INatToCamsTranslator:
     @staticmethod
     def sanitiseHTML(html):
         if html is not None:
-            # issue #86: URLs with an '=' within are not supported. Remove the reference and add a warning.
-            html = re.sub(
-                r'<a\s+href="[^"]*=[^"]*".*?>.*?</a>', 
-                '(INVALID URL DETECTED - see iNaturalist link for full notes)', 
-                html)
+            # Remove the reference and add a warning.
+            html = INVALID_URL_PATTERN.sub('(INVALID URL DETECTED - see iNaturalist link for full notes)', html)
 
         return html
     
+    @metrics.timed('sync_stage', stage='translate')
     def translate(self, inat_observation, original_observation):
-        geolocation = geometry.Point({'x': inat_observation.location.x,
-                                      'y': inat_observation.location.y,
-                                      'spatialReference': {'wkid': 4326}
-                                      })
+        cams_taxon = self.cams_taxon(inat_observation.taxon_lineage)
+        return self.translate_with(inat_observation, original_observation, self.as_geolocation(inat_observation.location), cams_taxon)
 
-        cams_taxon = None
-        preferred_common_name = None
-        scientific_name = None
+    @metrics.timed('sync_stage', stage='translate_many')
+    def translate_many(self, observations):
+        """Translates a page of (iNatObservation, original observation) pairs, returning a CamsFeature for each.
+
+        Quicker than calling translate for each observation, since the CAMS taxon is looked up once per distinct lineage.
+        """
+        cams_taxa = {}
+        cams_features = []
+        for inat_observation, original_observation in observations:
+            lineage = tuple(inat_observation.taxon_lineage)
+            if lineage not in cams_taxa:
+                cams_taxa[lineage] = self.cams_taxon(lineage)
+            cams_features.append(self.translate_with(inat_observation, original_observation,
+                                                     self.as_geolocation(inat_observation.location), cams_taxa[lineage]))
+        return cams_features
+
+    @staticmethod
+    def as_geolocation(location):
+        return cams_feature.Geolocation(location.x, location.y)
 
-        for taxon in reversed(inat_observation.taxon_lineage):
+    @staticmethod
+    def cams_taxon(taxon_lineage):
+        # The CAMS species of the most specific mapped taxon in the lineage, or None if none are mapped
+        for taxon in reversed(taxon_lineage):
             cams_taxon = config.taxon_mapping.get(str(taxon))
             if cams_taxon is not None:
-                break
+                return cams_taxon
+        return None
+
+    def translate_with(self, inat_observation, original_observation, geolocation, cams_taxon):
+        preferred_common_name = None
+        scientific_name = None
 
         if cams_taxon is None:
             # For unmapped taxa, use "OTHER" and store the details
@@ -260,7 +283,7 @@ class INatToCamsTranslator:
         date_controlled = inat_observation.date_controlled
         date_of_status_update = inat_observation.date_of_status_update
         
-        logging.info(f'DEBUG calculate_visit_date: date_first_observed={date_first_observed}, date_controlled={date_controlled}, date_of_status_update={date_of_status_update}')
+        logging.debug('calculate_visit_date: date_first_observed=%s, date_controlled=%s, date_of_status_update=%s', date_first_observed, date_controlled, date_of_status_update)
 
         # Determine which date to use (existing logic)
         if date_controlled and date_of_status_update:
@@ -316,5 +339,5 @@ class INatToCamsTranslator:
         # if recorded_by_user_id:
         #     recorded_by_username = self._get_username_for_user_id(recorded_by_user_id, original_observation)
 
-        logging.info(f'DEBUG calculate_visit_date result: visit_date={visit_date}, visit_status={visit_status}')
+        logging.debug('calculate_visit_date result: visit_date=%s, visit_status=%s', visit_date, visit_status)
         return visit_date, visit_status, recorded_by_user_id, recorded_by_username
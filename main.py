@@ -19,13 +19,7 @@ import logging
 import pytz
 import sys
 
-from inat_to_cams import cams_interface, synchronise_inat_to_cams, summary_logger
-
-
-def check_cams_schema():
-    schema_comparator = cams_interface.CamsSchemaComparator()
-    schema_comparator.compare('WeedLocations')
-    schema_comparator.compare('Visits_Table')
+from inat_to_cams import cams_interface, metrics, metrics_textfile, synchronise_inat_to_cams, summary_logger
 
 
 def delete_records():
@@ -46,7 +40,7 @@ def main():
         summary_logger.run_details_header = f"# Run [{sys.argv[1]}]({sys.argv[2]})\n{server_time.strftime('%Y-%m-%d %H:%M')}"
 
     # delete_records()
-    check_cams_schema()
+    synchronise_inat_to_cams.synchroniser.check_cams_schema()
     observation_counts = synchronise_inat_to_cams.synchroniser.sync_updated_observations()
 
     logging.info('Completed synchronisation: ')
@@ -66,5 +60,14 @@ def main():
     logging.info('-' * 80)
     logging.info(f'* {"TOTAL (unique observations)":<35}{total_count:>20} observations synced')
 
+    run_metrics = metrics.log_summary()
+    summary_logger.write_run_metrics(run_metrics)
+    summary_logger.flush()
+    try:
+        metrics_textfile.write_textfile(run_metrics)
+    except OSError as e:
+        # Don't fail the run, since sync_state.json and the sync history still need to be committed
+        logging.error(f'Could not write metrics textfile: {e}')
+
 
 main()
@@ -0,0 +1,97 @@
+#  ====================================================================
+#  Copyright 2026 EcoNet.NZ
+#
+#  Licensed under the Apache License, Version 2.0 (the "License");
+#  you may not use this file except in compliance with the License.
+#  You may obtain a copy of the License at
+#
+#      http://www.apache.org/licenses/LICENSE-2.0
+#
+#  Unless required by applicable law or agreed to in writing, software
+#  distributed under the License is distributed on an "AS IS" BASIS,
+#  WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+#  See the License for the specific language governing permissions and
+#  limitations under the License.
+#  ====================================================================
+
+import argparse
+import logging
+import sys
+
+from benchmark import fixtures, sync_benchmark
+
+
+def main():
+    parser = argparse.ArgumentParser(
+        description='Benchmark the synchronisation offline, replaying iNaturalist fixtures against an in-memory CAMS'
+    )
+    parser.add_argument(
+        '--scales',
+        type=lambda value: [int(scale) for scale in value.split(',')],
+        default=sync_benchmark.DEFAULT_SCALES,
+        help='Comma-separated numbers of observations to benchmark (default: 100,1000,10000,50000)'
+    )
+    parser.add_argument(
+        '--fixtures',
+        default=fixtures.DEFAULT_FIXTURE_DIRECTORY,
+        help=f'Directory holding the fixture pages (default: {fixtures.DEFAULT_FIXTURE_DIRECTORY})'
+    )
+    parser.add_argument(
+        '--record',
+        action='store_true',
+        help='Record fixtures from the live iNaturalist API for the configured taxa, rather than synthesising them'
+    )
+    parser.add_argument(
+        '--output',
+        help='Write the results as JSON to this file, eg to use as a baseline later'
+    )
+    parser.add_argument(
+        '--baseline',
+        help='Compare throughput with the JSON results of an earlier run and fail if it has regressed'
+    )
+    parser.add_argument(
+        '--tolerance',
+        type=float,
+        default=0.2,
+        help='Fractional drop in observations/second from the baseline treated as a regression (default: 0.2)'
+    )
+    parser.add_argument(
+        '--log-level',
+        default='WARNING',
+        help='Log level while syncing; INFO includes the per-observation logging of a normal run (default: WARNING)'
+    )
+    args = parser.parse_args()
+
+    logging.basicConfig(level=logging.INFO, format='%(asctime)s %(levelname)s %(message)s', datefmt='%Y-%m-%d %H:%M:%S')
+
+    largest_scale = max(args.scales)
+    if args.record:
+        fixture_directory = fixtures.recorded_directory(args.fixtures)
+        if fixtures.fixture_count(fixture_directory) < largest_scale:
+            from inat_to_cams import config
+            taxon_ids = sorted({taxon_id for values in config.sync_configuration.values() for taxon_id in values.get('taxon_ids', [])})
+            recorded = fixtures.record_fixtures(fixture_directory, largest_scale, ['6803'], taxon_ids)
+            if recorded < largest_scale:
+                logging.warning(f'Only {recorded} observations are available to record, so larger scales will sync {recorded} observations')
+    else:
+        fixture_directory = fixtures.synthesise_fixtures(fixtures.synthesised_directory(args.fixtures, largest_scale), largest_scale)
+
+    results = sync_benchmark.run(args.scales, fixture_directory, args.log_level.upper())
+    print(sync_benchmark.format_report(results))
+
+    if args.output:
+        sync_benchmark.save_results(results, args.output)
+        logging.info(f'Saved benchmark results to {args.output}')
+
+    if args.baseline:
+        regressions = sync_benchmark.compare_with_baseline(results, sync_benchmark.load_results(args.baseline), args.tolerance)
+        for regression in regressions:
+            logging.error(f'Throughput regression: {regression}')
+        if regressions:
+            sys.exit(1)
+        logging.info(f'No throughput regressions against {args.baseline}')
+
+
+# Guarded since each scale is run in a spawned process, which imports this module
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,51 @@
+#  ====================================================================
+#  Copyright 2026 EcoNet.NZ
+#
+#  Licensed under the Apache License, Version 2.0 (the "License");
+#  you may not use this file except in compliance with the License.
+#  You may obtain a copy of the License at
+#
+#      http://www.apache.org/licenses/LICENSE-2.0
+#
+#  Unless required by applicable law or agreed to in writing, software
+#  distributed under the License is distributed on an "AS IS" BASIS,
+#  WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+#  See the License for the specific language governing permissions and
+#  limitations under the License.
+#  ====================================================================
+
+import argparse
+import datetime
+import pytz
+
+from inat_to_cams import daemon, synchronise_inat_to_cams, summary_logger
+
+
+def main():
+    parser = argparse.ArgumentParser(
+        description='Keep synchronising iNaturalist to CAMS, polling each configuration more often while it has updates'
+    )
+    parser.add_argument(
+        '--min-interval',
+        type=int,
+        default=daemon.DEFAULT_MIN_INTERVAL_SECONDS,
+        help=f'Seconds between polls of a configuration whose last poll found updates (default: {daemon.DEFAULT_MIN_INTERVAL_SECONDS})'
+    )
+    parser.add_argument(
+        '--max-interval',
+        type=int,
+        default=daemon.DEFAULT_MAX_INTERVAL_SECONDS,
+        help=f'Longest interval between polls of an idle configuration (default: {daemon.DEFAULT_MAX_INTERVAL_SECONDS})'
+    )
+    args = parser.parse_args()
+
+    server_timezone = pytz.timezone("Pacific/Auckland")
+    server_time = datetime.datetime.now(server_timezone)
+    summary_logger.run_details_header = f"# Run mainDaemon\n{server_time.strftime('%Y-%m-%d %H:%M')}"
+
+    # Checked once, since the CAMS connection is kept for the life of the daemon
+    synchronise_inat_to_cams.synchroniser.check_cams_schema()
+    daemon.SyncDaemon(synchronise_inat_to_cams.synchroniser, args.min_interval, args.max_interval).run()
+
+
+main()
@@ -14,6 +14,7 @@
 #  limitations under the License.
 #  ====================================================================
 
+import argparse
 import logging
 import requests_cache
 from inat_to_cams import cams_interface
@@ -21,11 +22,24 @@ from migration import migrate
 
 
 def main():
+    parser = argparse.ArgumentParser(
+        description='Copy iNaturalist photo and location accuracy details to existing CAMS features'
+    )
+    parser.add_argument(
+        '--resume',
+        action='store_true',
+        help='Resume a previous run that did not complete, using its journal'
+    )
+    parser.add_argument(
+        '--journal',
+        help='Journal file to record progress in (default: migration_journals/copy_inat_details_to_cams.jsonl)'
+    )
+    args = parser.parse_args()
 
     logging.info('Running Migration')
     logging.info('Deleting test data with iNat ref of length 4')
     # cams_interface.CamsConnection().delete_rows_with_inat_ref_of_length(4)
-    copier = migrate.CopyiNatDetailsToCAMS()
+    copier = migrate.CopyiNatDetailsToCAMS(resume=args.resume, journal_path=args.journal)
     copy_count = copier.copyiNatDetails_to_existing_CAMS_features()
     logging.info(f'Completed update of {copy_count} records')
 
@@ -0,0 +1,84 @@
+#  ====================================================================
+#  Copyright 2026 EcoNet.NZ
+#
+#  Licensed under the Apache License, Version 2.0 (the "License");
+#  you may not use this file except in compliance with the License.
+#  You may obtain a copy of the License at
+#
+#      http://www.apache.org/licenses/LICENSE-2.0
+#
+#  Unless required by applicable law or agreed to in writing, software
+#  distributed under the License is distributed on an "AS IS" BASIS,
+#  WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+#  See the License for the specific language governing permissions and
+#  limitations under the License.
+#  ====================================================================
+
+import argparse
+import datetime
+import glob
+import logging
+import os
+
+from inat_to_cams import summary_logger, sync_history_index
+
+
+def history_files():
+    # Oldest first, so the events of each run are imported in order
+    archived = sorted(glob.glob(os.path.join(summary_logger.ARCHIVE_DIRECTORY, '*.md')))
+    current = [summary_logger.HISTORY_FILE] if os.path.exists(summary_logger.HISTORY_FILE) else []
+    return archived + current
+
+
+def import_history(index, paths):
+    for path in paths or history_files():
+        index.import_history(path)
+
+
+def query_history(index, args):
+    until = (datetime.date.fromisoformat(args.until) + datetime.timedelta(days=1)).isoformat() if args.until else None
+    events = index.query(inat_id=args.inat_id, object_id=args.object_id, species=args.species, since=args.since, until=until)
+    print('|Time (UTC)|Run|Config|Sync Events|Object Id|Species|Status|iNaturalist Id|')
+    print('|----------|---|------|-----------|---------|-------|------|--------------|')
+    for event in events:
+        print(f"|{event['time']}|{event['run']}|{event['config'] or ''}|{event['events']}|{event['object_id']}|{event['species']}|{event['status']}|{event['inat_id']}|")
+    logging.info(f'Found {len(events)} sync events')
+
+
+def main():
+    parser = argparse.ArgumentParser(
+        description='Look up when observations were synced to CAMS, and what changed, in the sync history index'
+    )
+    parser.add_argument(
+        '--index',
+        help=f'Sync history index file (default: {sync_history_index.DEFAULT_FILE}, or the SYNC_HISTORY_INDEX environment variable)'
+    )
+    commands = parser.add_subparsers(dest='command', required=True)
+
+    import_parser = commands.add_parser(
+        'import',
+        help='Import sync events from history files, skipping runs that are already indexed'
+    )
+    import_parser.add_argument(
+        'paths',
+        nargs='*',
+        help=f'sync_history .md or .jsonl files (default: {summary_logger.HISTORY_FILE} and those in {summary_logger.ARCHIVE_DIRECTORY})'
+    )
+
+    query_parser = commands.add_parser('query', help='List sync events, oldest first')
+    query_parser.add_argument('--inat-id', type=int, help='iNaturalist observation id')
+    query_parser.add_argument('--object-id', type=int, help='CAMS WeedLocations OBJECTID')
+    query_parser.add_argument('--species', help='CAMS species, eg MothPlant')
+    query_parser.add_argument('--since', help='First date (UTC) to include, as YYYY-MM-DD')
+    query_parser.add_argument('--until', help='Last date (UTC) to include, as YYYY-MM-DD')
+    args = parser.parse_args()
+
+    logging.basicConfig(level=logging.INFO, format='%(asctime)s %(levelname)s %(message)s', datefmt='%Y-%m-%d %H:%M:%S')
+    index = sync_history_index.SyncHistoryIndex(args.index)
+    if args.command == 'import':
+        import_history(index, args.paths)
+    else:
+        query_history(index, args)
+
+
+main()
@@ -14,37 +14,67 @@
 #  limitations under the License.
 #  ====================================================================
 
+import argparse
 import datetime
 import logging
-import pytz
+import re
 import sys
 
-from inat_to_cams import cams_interface, synchronise_inat_to_cams, summary_logger
+import pytz
 
+from inat_to_cams import metrics, observation_list_sync, synchronise_inat_to_cams, summary_logger
 
-def check_cams_schema():
-    schema_comparator = cams_interface.CamsSchemaComparator()
-    schema_comparator.compare('WeedLocations')
-    schema_comparator.compare('Visits_Table')
+# Up to this many ids are listed in the run details header
+IDS_IN_HEADER = 10
 
 
-def main():
-    if len(sys.argv) != 2:
-        print("Usage: python mainSyncSingle <observation_id(s)>")
-        sys.exit(1)
+def read_observation_ids(parser, args):
+    # The ids can be separated by commas, spaces or new lines
+    if args.file == '-' or (not args.observation_ids and not args.file and not sys.stdin.isatty()):
+        text = sys.stdin.read()
+    elif args.file:
+        with open(args.file, encoding='utf-8') as ids_file:
+            text = ids_file.read()
+    elif args.observation_ids:
+        text = args.observation_ids
+    else:
+        parser.error('give the observation ids, or a file or stdin to read them from')
+
+    observation_ids = [observation_id for observation_id in re.split(r'[\s,]+', text) if observation_id]
+    invalid_ids = [observation_id for observation_id in observation_ids if not observation_id.isdigit()]
+    if invalid_ids:
+        parser.error(f"invalid observation ids: {', '.join(invalid_ids[:IDS_IN_HEADER])}")
+    return [int(observation_id) for observation_id in observation_ids]
 
-    observation_ids = sys.argv[1]
+
+def main():
+    parser = argparse.ArgumentParser(description='Sync a list of iNaturalist observations to CAMS, 200 at a time')
+    parser.add_argument('observation_ids', nargs='?', help='comma separated observation ids')
+    parser.add_argument('--file', help="file of observation ids separated by commas, spaces or new lines, or '-' for stdin")
+    args = parser.parse_args()
+    observation_ids = read_observation_ids(parser, args)
 
     server_timezone = pytz.timezone("Pacific/Auckland")
     server_time = datetime.datetime.now(server_timezone)  # you could pass *tz* directly
-    summary_logger.run_details_header = f"# Run mainSyncObservationList {observation_ids} \n{server_time.strftime('%Y-%m-%d %H:%M')}"
+    listed_ids = ','.join(str(observation_id) for observation_id in observation_ids) \
+        if len(observation_ids) <= IDS_IN_HEADER else f'({len(observation_ids)} observations)'
+    summary_logger.run_details_header = f"# Run mainSyncObservationList {listed_ids} \n{server_time.strftime('%Y-%m-%d %H:%M')}"
 
-    check_cams_schema()
+    synchronise_inat_to_cams.synchroniser.check_cams_schema()
 
-    for observation_id in observation_ids.split(','):
-        logging.info(f"Attempting to sync observation {observation_id}")
-        synchronise_inat_to_cams.synchroniser.sync_single_observation(observation_id)
+    synchroniser = synchronise_inat_to_cams.synchroniser
+    list_sync = observation_list_sync.ObservationListSync(synchroniser)
+    logging.info(f"Attempting to sync {len(observation_ids)} observations")
+    with synchroniser.state.locked():
+        outcomes = list_sync.run(observation_ids)
+        synchroniser.state.commit()
+    list_sync.log_outcomes(outcomes)
     logging.info('Completed synchronisation')
+    summary_logger.write_run_metrics(metrics.log_summary())
+    summary_logger.flush()
+
+    if any(outcome == observation_list_sync.FAILED for outcome, _ in outcomes.values()):
+        sys.exit(1)
 
 
 main()
@@ -17,6 +17,8 @@
 import logging
 from inat_to_cams import cams_interface, config
 
+DEFAULT_CHUNK_SIZE = 500
+
 
 class CamsMigrationWriter:
     def __init__(self):
@@ -24,24 +26,39 @@ class CamsMigrationWriter:
 
     def write_new_feature_fields(self, cams_feature):
         logging.info(f'Updating CAMS iNaturalist Location {cams_feature.weed_location.external_url}')
-        new_layer_row = [{            
+        new_layer_row = [self.new_feature_fields_row(cams_feature)]
+        logging.info(f'Updating CAMS WeedLocations layer: {new_layer_row}')
+        cams_interface.connection.update_weed_location_layer_row(new_layer_row)
+
+        return
+
+    def write_rows_in_bulk(self, rows, chunk_size=DEFAULT_CHUNK_SIZE):
+        # Returns a (row, success, error) tuple for each WeedLocations row
+        results = []
+        for i in range(0, len(rows), chunk_size):
+            chunk = rows[i:i + chunk_size]
+            logging.info(f'Updating {len(chunk)} CAMS WeedLocations layer rows')
+            update_results = cams_interface.connection.update_weed_location_layer_rows(chunk)
+            for row, update_result in zip(chunk, update_results):
+                error = None if update_result['success'] else update_result.get('error', {}).get('description', 'Unknown error')
+                results.append((row, update_result['success'], error))
+        return results
+
+    def new_feature_fields_row(self, cams_feature):
+        new_layer_row = {
             'attributes': {
             }
-        }]
+        }
         fields = [
             ('Image URLs', cams_feature.weed_location.image_urls),
             ('Image Attribution', cams_feature.weed_location.image_attribution),
             ('Location Accuracy', cams_feature.weed_location.location_accuracy)
         ]
 
-        [self.add_field(new_layer_row[0], 'WeedLocations', field) for field in fields]
+        [self.add_field(new_layer_row, 'WeedLocations', field) for field in fields]
 
-        object_id = cams_feature.weed_location.object_id
-        new_layer_row[0]['attributes']['objectId'] = object_id
-        logging.info(f'Updating CAMS WeedLocations layer: {new_layer_row}')
-        cams_interface.connection.update_weed_location_layer_row(new_layer_row)
-
-        return
+        new_layer_row['attributes']['objectId'] = cams_feature.weed_location.object_id
+        return new_layer_row
 
     def get_entry(self, table_name, field_name, field_value):
         cams_schema_config = config.cams_schema_config
@@ -18,14 +18,17 @@ import logging
 import datetime
 import func_timeout
 import re
-import pyinaturalist
 from pyinaturalist.exceptions import ObservationNotFound
-from migration import migration_reader, cams_migration_writer
+from migration import migration_reader, migration_runner, cams_migration_writer
 from inat_to_cams import inaturalist_reader, config
 
 
 class CopyiNatDetailsToCAMS():
 
+    def __init__(self, resume=False, journal_path=None):
+        self.runner = migration_runner.MigrationRunner('copy_inat_details_to_cams', resume=resume, journal_path=journal_path)
+        self.features_by_inat_id = None
+
     def extract_observation_id(self, url):
         observation_id = None
        
@@ -40,8 +43,7 @@ class CopyiNatDetailsToCAMS():
     def get_observation_from_id(self, observation_id):
         try:
             # observation = pyinaturalist.get_observation(observation_id)
-            client = pyinaturalist.iNatClient()
-            observation = client.observations(observation_id)
+            observation = inaturalist_reader.INatReader.client().observations(observation_id)
 
         except ObservationNotFound:
             return None
@@ -50,57 +52,120 @@ class CopyiNatDetailsToCAMS():
     
     def copyiNatDetails_to_existing_CAMS_features(self):
         update_count = 0
+        writer = cams_migration_writer.CamsMigrationWriter()
 
         for config_name, values in config.sync_configuration.items():
+            if self.runner.is_completed(f'config:{config_name}'):
+                logging.info(f"Skipping '{config_name}' since it was completed by a previous run")
+                continue
 
-            # pull in all observations by setting year 2000 timestamp
-            timestamp = '2000-01-01T00:00:00+12:00'
-
-            taxon_ids = values['taxon_ids']
-            place_ids = values['place_ids']
-
-            logging.info('=' * 80)
-            logging.info(f"Finding '{config_name}' with taxon_ids '{taxon_ids}' and place_ids '{place_ids}' since {timestamp}")
-
-            time_of_previous_update = datetime.datetime.fromisoformat(timestamp)
+            planned_rows = self.runner.plan_for(config_name)
+            if planned_rows is None:
+                planned_rows = self.plan_config(config_name, values, writer)
+            else:
+                logging.info(f"Resuming '{config_name}' from the {len(planned_rows)} changes planned by a previous run")
 
-            taxonObservations = func_timeout.func_timeout(
-                120,  # seconds
-                inaturalist_reader.INatReader().get_matching_observations_updated_since,
-                args=(place_ids, taxon_ids, time_of_previous_update)
-            )
+            remaining_rows = self.runner.remaining(planned_rows, key=lambda planned_row: planned_row['inat_id'])
+            update_count += self.write_changed_rows(remaining_rows, writer)
 
-            logging.info(f"Found '{len(taxonObservations)}' observations from '{config_name}' with taxon_ids '{taxon_ids}' and place_ids '{place_ids}' since {timestamp}")
-            for observation in taxonObservations:
-                update_count += self.update_cams_feature_from(observation)
+            self.runner.record_outcome(f'config:{config_name}', migration_runner.UPDATED)
 
         print(f"Updated {update_count} CAMS features successfully")
         print("*************** REPORT ENDS *******************")
+        self.runner.print_summary()
 
         return update_count
 
-    def update_cams_feature_from(self, observation):
-        feature = migration_reader.CamsMigrationReader().get_feature_by_inat_id(observation.id)
-        if feature:
-            # print(observation)
-            # print('---')
-            feature.weed_location.location_accuracy = observation.positional_accuracy
-            logging.info(f"Updating location accuracy for CAMS object_id {feature.weed_location.object_id} with iNat id {observation.id} to {feature.weed_location.location_accuracy}")
-            if observation.photos:
-                # print(f"CAMS Feature: object_id:{feature.weed_location.object_id},  URL: {feature.weed_location.external_url}")
-                # Get the URLs and attribution
-                photo_urls = []
-                for i in range(min(5, len(observation.photos))):
-                    photo_url = observation.photos[i].url.replace("square.", "large.")
-                    photo_urls.append(photo_url)
-                feature.weed_location.image_urls = ",".join(photo_urls)
-                feature.weed_location.image_attribution = observation.photos[0].attribution
-
-                logging.info(f"Updating photos for CAMS object_id {feature.weed_location.object_id} with iNat id {observation.id} to {feature.weed_location.image_urls}")
+    def cams_features_by_inat_id(self):
+        # Read all synchronised CAMS features once and join them to the observations in memory, rather than querying
+        # CAMS for each observation. Not read at all by a resumed run whose remaining configurations are all planned.
+        if self.features_by_inat_id is None:
+            self.features_by_inat_id = migration_reader.CamsMigrationReader().get_features_by_inat_id()
+        return self.features_by_inat_id
+
+    def plan_config(self, config_name, values, writer):
+        # Returns the CAMS rows to write for the configuration, which are journalled so that a resumed run doesn't
+        # need to query iNaturalist or CAMS again
+        # pull in all observations by setting year 2000 timestamp
+        timestamp = '2000-01-01T00:00:00+12:00'
+
+        taxon_ids = values['taxon_ids']
+        place_ids = values['place_ids']
+
+        logging.info('=' * 80)
+        logging.info(f"Finding '{config_name}' with taxon_ids '{taxon_ids}' and place_ids '{place_ids}' since {timestamp}")
+
+        time_of_previous_update = datetime.datetime.fromisoformat(timestamp)
+
+        taxonObservations = func_timeout.func_timeout(
+            120,  # seconds
+            inaturalist_reader.INatReader().get_matching_observations_updated_since,
+            args=(place_ids, taxon_ids, time_of_previous_update)
+        )
+
+        logging.info(f"Found '{len(taxonObservations)}' observations from '{config_name}' with taxon_ids '{taxon_ids}' and place_ids '{place_ids}' since {timestamp}")
+        remaining_observations = self.runner.remaining(taxonObservations, key=lambda observation: observation.id)
+        logging.info(f"{len(taxonObservations) - len(remaining_observations)} observations were already updated by a previous run")
+
+        features_by_inat_id = self.cams_features_by_inat_id()
+        planned_rows = []
+        for observation in remaining_observations:
+            features = features_by_inat_id.get(str(observation.id))
+            if not features:
+                logging.info(f"Feature not found for inat id {observation.id}")
+                self.runner.record_outcome(observation.id, migration_runner.SKIPPED, 'feature not found')
+                continue
+
+            changed = [feature for feature in features if self.update_cams_feature_from(feature, observation, writer)]
+            if changed:
+                planned_rows.extend({'inat_id': observation.id, 'row': writer.new_feature_fields_row(feature)} for feature in changed)
             else:
-                logging.info(f"No photo for inat id {observation.id}")
-            cams_migration_writer.CamsMigrationWriter().write_new_feature_fields(feature)
-            return 1
+                self.runner.record_outcome(observation.id, migration_runner.UNCHANGED)
+
+        logging.info(f"{len(planned_rows)} CAMS features for '{config_name}' have changed photo or location accuracy details")
+        self.runner.record_plan(planned_rows, name=config_name)
+        return planned_rows
+
+    def update_cams_feature_from(self, feature, observation, writer):
+        # Returns whether the fields written by the migration have changed
+        original_row = writer.new_feature_fields_row(feature)
+
+        feature.weed_location.location_accuracy = observation.positional_accuracy
+        if observation.photos:
+            # Get the URLs and attribution
+            photo_urls = []
+            for i in range(min(5, len(observation.photos))):
+                photo_url = observation.photos[i].url.replace("square.", "large.")
+                photo_urls.append(photo_url)
+            feature.weed_location.image_urls = ",".join(photo_urls)
+            feature.weed_location.image_attribution = observation.photos[0].attribution
         else:
-            logging.info(f"Feature not found for inat id {observation.id}")
+            logging.info(f"No photo for inat id {observation.id}")
+
+        changed = writer.new_feature_fields_row(feature) != original_row
+        if changed:
+            logging.info(f"Updating CAMS object_id {feature.weed_location.object_id} with iNat id {observation.id} to location accuracy "
+                         f"{feature.weed_location.location_accuracy} and photos {feature.weed_location.image_urls}")
+        return changed
+
+    def write_changed_rows(self, planned_rows, writer):
+        if not planned_rows:
             return 0
+
+        inat_ids = list(dict.fromkeys(planned_row['inat_id'] for planned_row in planned_rows))
+        self.runner.record_pending(inat_ids)
+
+        failed_inat_ids = {}
+        update_count = 0
+        results = writer.write_rows_in_bulk([planned_row['row'] for planned_row in planned_rows])
+        for planned_row, (row, success, error) in zip(planned_rows, results):
+            if success:
+                update_count += 1
+            else:
+                logging.error(f"Failed to update CAMS object_id {row['attributes']['objectId']} with iNat id {planned_row['inat_id']}: {error}")
+                failed_inat_ids[planned_row['inat_id']] = error
+
+        self.runner.record_outcomes(
+            (inat_id, migration_runner.ERROR, failed_inat_ids[inat_id]) if inat_id in failed_inat_ids else (inat_id, migration_runner.UPDATED, None)
+            for inat_id in inat_ids)
+        return update_count
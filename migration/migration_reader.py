@@ -14,30 +14,51 @@
 #  limitations under the License.
 #  ====================================================================
 
+import itertools
 import logging
 from inat_to_cams import cams_interface, cams_feature
 
+INATURALIST_OBSERVATION_URL_PREFIX = 'https://www.inaturalist.org/observations/'
+MIGRATION_FIELDS = 'OBJECTID,iNatURL,ImageURLs,ImageAttribution,LocationAccuracy'
+
 
 class CamsMigrationReader:
 
     def read_observations( self, query_layer, max_record_count):
 
-        rows = cams_interface.connection.query_weed_location_layer_limit_records(query_layer, max_record_count)
+        rows = cams_interface.connection.scan_weed_location_layer(query_layer, MIGRATION_FIELDS, page_size=max_record_count)
         cams_items = []
 
         logging.info("++++CAMS ROWS----------------------")
-        for featureRow in rows.features:
-            logging.info(f"{featureRow}")
+        for attributes in itertools.islice(rows, max_record_count):
+            logging.info(f"{attributes}")
             logging.info("----------------------")
-            location = cams_feature.WeedLocation()
-            location.object_id = featureRow.attributes['OBJECTID']
-            location.image_urls = featureRow.attributes['ImageURLs']
-            location.image_attribution = featureRow.attributes['ImageAttribution']
-            location.location_accuracy = featureRow.attributes['LocationAccuracy']
-            location.external_url = featureRow.attributes['iNatURL']
-            cams_items.append(cams_feature.CamsFeature(featureRow.geometry, location,{}))
+            location = self.as_weed_location(attributes)
+            cams_items.append(cams_feature.CamsFeature(None, location,{}))
         return cams_items
 
+    def as_weed_location(self, attributes):
+        location = cams_feature.WeedLocation()
+        location.object_id = attributes['OBJECTID']
+        location.image_urls = attributes['ImageURLs']
+        location.image_attribution = attributes['ImageAttribution']
+        location.location_accuracy = attributes['LocationAccuracy']
+        location.external_url = attributes['iNatURL']
+        return location
+
+    def get_features_by_inat_id(self):
+        # A single scan of the layer, returning only the fields the migration needs, for joining to observations in memory
+        query = f"iNatURL LIKE '{INATURALIST_OBSERVATION_URL_PREFIX}%'"
+        features_by_inat_id = {}
+        feature_count = 0
+        for attributes in cams_interface.connection.scan_weed_location_layer(query, MIGRATION_FIELDS):
+            location = self.as_weed_location(attributes)
+            inat_id = location.external_url[len(INATURALIST_OBSERVATION_URL_PREFIX):]
+            features_by_inat_id.setdefault(inat_id, []).append(cams_feature.CamsFeature(None, location, {}))
+            feature_count += 1
+        logging.info(f"Found {feature_count} CAMS features for {len(features_by_inat_id)} iNaturalist observations")
+        return features_by_inat_id
+
     def get_features_without_iNat_photo(self, max_record_count):
         query = f"(ImageURL='' OR ImageURL is null) AND (iNatURL LIKE 'https://www.inaturalist.org/observations%')"
         existing_CAMS_feature = self.read_observations( query, max_record_count )
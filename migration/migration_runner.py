@@ -0,0 +1,183 @@
+#  ====================================================================
+#  Copyright 2026 EcoNet.NZ
+#
+#  Licensed under the Apache License, Version 2.0 (the "License");
+#  you may not use this file except in compliance with the License.
+#  You may obtain a copy of the License at
+#
+#      http://www.apache.org/licenses/LICENSE-2.0
+#
+#  Unless required by applicable law or agreed to in writing, software
+#  distributed under the License is distributed on an "AS IS" BASIS,
+#  WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+#  See the License for the specific language governing permissions and
+#  limitations under the License.
+#  ====================================================================
+
+"""
+Support for resumable migrations.
+
+A migration records what it is about to do, and the outcome for each record, in a write-ahead journal
+(one JSON object per line). If a run dies part way through, re-running with --resume reads the journal
+back, reuses the recorded plans rather than re-querying CAMS and iNaturalist, and skips records that have
+already completed. A migration made up of several parts, eg one for each sync configuration, can record a
+named plan for each part as it is reached.
+Records that were pending or failed when the run died are re-applied, so migrations must only write
+absolute values (never increments) to be safe to re-apply.
+"""
+
+import collections
+import datetime
+import json
+import logging
+import os
+import threading
+from typing import Any, Dict, Iterable, List, Optional
+
+DEFAULT_JOURNAL_DIRECTORY = 'migration_journals'
+
+PENDING = 'pending'
+UPDATED = 'updated'
+UNCHANGED = 'unchanged'
+SKIPPED = 'skipped'
+ERROR = 'error'
+
+COMPLETED_OUTCOMES = {UPDATED, UNCHANGED, SKIPPED}
+
+
+class MigrationJournal:
+    """Append-only JSONL journal of a migration's plan and per-record outcomes"""
+
+    def __init__(self, path: str):
+        self.path = path
+
+    def exists(self) -> bool:
+        return os.path.exists(self.path)
+
+    def read(self) -> List[Dict[str, Any]]:
+        if not self.exists():
+            return []
+        entries = []
+        with open(self.path, encoding='utf-8') as journal_file:
+            for line_number, line in enumerate(journal_file, start=1):
+                line = line.strip()
+                if not line:
+                    continue
+                try:
+                    entries.append(json.loads(line))
+                except json.JSONDecodeError:
+                    # A run that died mid-write can leave a partial last line
+                    logging.warning(f"Ignoring unreadable line {line_number} of migration journal {self.path}")
+        return entries
+
+    def reset(self):
+        directory = os.path.dirname(self.path)
+        if directory:
+            os.makedirs(directory, exist_ok=True)
+        open(self.path, 'w', encoding='utf-8').close()
+
+    def append(self, entries: Iterable[Dict[str, Any]]):
+        timestamp = datetime.datetime.now().isoformat(timespec='seconds')
+        with open(self.path, 'a', encoding='utf-8') as journal_file:
+            for entry in entries:
+                journal_file.write(json.dumps({'time': timestamp, **entry}, default=str) + '\n')
+            journal_file.flush()
+            os.fsync(journal_file.fileno())
+
+
+class MigrationRunner:
+    """Tracks the progress of a migration in a journal so that it can be resumed and safely re-applied"""
+
+    def __init__(self, name: str, resume: bool = False, dry_run: bool = False, journal_path: Optional[str] = None):
+        self.name = name
+        self.dry_run = dry_run
+        self.journal = MigrationJournal(journal_path or os.path.join(DEFAULT_JOURNAL_DIRECTORY, f'{name}.jsonl'))
+        self.plans = {}
+        self.outcomes = {}
+        self.previously_completed = set()
+        self.counts = collections.Counter()
+        self.lock = threading.Lock()
+
+        if self.dry_run:
+            # Dry runs never write to CAMS, so they neither read nor update the journal
+            logging.info(f"Dry run of migration '{name}': progress journal disabled")
+        elif resume and self.journal.exists():
+            self.load_journal()
+        else:
+            if resume:
+                logging.info(f"No journal found at {self.journal.path}, starting migration '{name}' from the beginning")
+            self.journal.reset()
+
+    def load_journal(self):
+        for entry in self.journal.read():
+            if entry.get('type') == 'plan':
+                self.plans[entry.get('name')] = entry['items']
+            elif entry.get('type') == 'outcome':
+                self.outcomes[str(entry['key'])] = entry['outcome']
+        self.previously_completed = {key for key, outcome in self.outcomes.items() if outcome in COMPLETED_OUTCOMES}
+        pending = [key for key, outcome in self.outcomes.items() if outcome not in COMPLETED_OUTCOMES]
+        logging.info(f"Resuming migration '{self.name}' from {self.journal.path}: "
+                     f"{len(self.previously_completed)} records already completed, "
+                     f"{len(pending)} pending or failed records will be re-applied")
+
+    @property
+    def plan(self) -> Optional[List[Any]]:
+        return self.plans.get(None)
+
+    def has_plan(self, name: Optional[str] = None) -> bool:
+        return name in self.plans
+
+    def plan_for(self, name: str) -> Optional[List[Any]]:
+        return self.plans.get(name)
+
+    def record_plan(self, items: List[Any], name: Optional[str] = None):
+        self.plans[name] = items
+        if not self.dry_run:
+            entry = {'type': 'plan', 'items': items}
+            if name is not None:
+                entry['name'] = name
+            self.journal.append([entry])
+
+    def is_completed(self, key) -> bool:
+        return str(key) in self.previously_completed
+
+    def remaining(self, items: Iterable[Any], key, limit: Optional[int] = None) -> List[Any]:
+        """Return the items whose key (given by the key function) has not already been completed, at most limit of them"""
+        remaining = [item for item in items if not self.is_completed(key(item))]
+        return remaining[:limit] if limit else remaining
+
+    def record_pending(self, keys: Iterable[Any]):
+        """Write-ahead: record that edits are about to be applied for these keys"""
+        self.record_outcomes((key, PENDING, None) for key in keys)
+
+    def record_outcome(self, key, outcome: str, detail: Optional[str] = None):
+        self.record_outcomes([(key, outcome, detail)])
+
+    def record_outcomes(self, outcomes: Iterable[tuple]):
+        # Safe to call from several threads at once
+        with self.lock:
+            entries = []
+            for key, outcome, detail in outcomes:
+                self.outcomes[str(key)] = outcome
+                if outcome != PENDING:
+                    self.counts[outcome] += 1
+                entry = {'type': 'outcome', 'key': str(key), 'outcome': outcome}
+                if detail:
+                    entry['detail'] = detail
+                entries.append(entry)
+            if entries and not self.dry_run:
+                self.journal.append(entries)
+
+    def print_summary(self):
+        logging.info("=" * 60)
+        logging.info(f"MIGRATION JOURNAL SUMMARY: {self.name}")
+        logging.info("=" * 60)
+        if not self.dry_run:
+            logging.info(f"Journal: {self.journal.path}")
+        logging.info(f"Completed in previous runs: {len(self.previously_completed)}")
+        for outcome in (UPDATED, UNCHANGED, SKIPPED, ERROR):
+            logging.info(f"{outcome.capitalize()} in this run: {self.counts[outcome]}")
+        still_pending = sum(1 for outcome in self.outcomes.values() if outcome not in COMPLETED_OUTCOMES)
+        if still_pending and not self.dry_run:
+            logging.info(f"{still_pending} records are pending or failed; re-run with --resume to retry them")
+        logging.info("=" * 60)
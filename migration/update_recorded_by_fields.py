@@ -35,32 +35,43 @@ For each weed instance (iNaturalist observation):
 The RecordedDate is set to the observation's updated_at or created_at timestamp.
 
 Usage:
-    python migration/update_recorded_by_fields.py [--dry-run] [--batch-size N] [--limit N]
+    python migration/update_recorded_by_fields.py [--dry-run] [--batch-size N] [--limit N] [--workers N] [--resume] [--journal PATH]
 
 Options:
     --dry-run       Show what would be updated without making changes
-    --batch-size N  Process N records at a time (default: 50)
+    --batch-size N  Process N records at a time (default: 200). The observations for each batch are fetched from
+                    iNaturalist in a single request and the updates are written to CAMS in a single edit.
     --limit N       Limit to N total records (for testing)
+    --workers N     Process N batches concurrently (default: 1). All records for an iNaturalist observation are
+                    in the same batch, so they are still updated in order.
+    --resume        Resume a previous run that did not complete, using its journal
+    --journal PATH  Journal file to record progress in (default: migration_journals/update_recorded_by_fields.jsonl)
 """
 
 import argparse
+import concurrent.futures
+import itertools
 import logging
-import time
+import threading
 from datetime import datetime
-from typing import List, Optional, Tuple
+from typing import Dict, List, Optional, Tuple
 
-from inat_to_cams import cams_interface, inaturalist_reader, setup_logging
+from inat_to_cams import cams_interface, inaturalist_reader, rate_limiter, setup_logging
+from migration import migration_runner
 
 
 class UpdateRecordedByMigration:
     """Migration class to update existing CAMS records with RecordedByUserId and RecordedByUserName information"""
     
-    def __init__(self, dry_run: bool = False):
+    def __init__(self, dry_run: bool = False, resume: bool = False, journal_path: Optional[str] = None):
         self.dry_run = dry_run
         self.cams = cams_interface.connection
         self.updated_count = 0
         self.error_count = 0
         self.skipped_count = 0
+        self.counter_lock = threading.Lock()
+        self.inat_rate_limiter = rate_limiter.AdaptiveRateLimiter('iNaturalist', min_interval=1.0, initial_interval=1.0)
+        self.cams_rate_limiter = rate_limiter.AdaptiveRateLimiter('CAMS', min_interval=0.0, initial_interval=0.5)
         
         setup_logging.SetupLogging()
         logging.basicConfig(
@@ -69,63 +80,159 @@ class UpdateRecordedByMigration:
             datefmt='%Y-%m-%d %H:%M:%S', 
             force=True
         )
+        self.runner = migration_runner.MigrationRunner('update_recorded_by_fields', resume=resume, dry_run=dry_run, journal_path=journal_path)
     
-    def migrate_existing_records(self, batch_size: int = 50, limit: Optional[int] = None):
+    def migrate_existing_records(self, batch_size: int = 200, limit: Optional[int] = None, workers: int = 1):
         """Update existing CAMS records with RecordedBy information"""
         
         logging.info("Starting migration to update RecordedBy and RecordedDate fields")
         logging.info(f"Dry run mode: {self.dry_run}")
         logging.info(f"Batch size: {batch_size}")
+        logging.info(f"Workers: {workers}")
         if limit:
             logging.info(f"Limiting to {limit} records")
         
-        # Get all CAMS records that don't have RecordedBy populated
-        records_to_update = self.get_records_missing_recorded_by(limit)
+        if self.runner.has_plan():
+            # Resuming: reuse the records selected by the previous run rather than re-querying CAMS, since records
+            # updated by that run no longer appear to be missing RecordedBy and would change which records are selected
+            records_to_update = self.runner.plan
+            logging.info(f"Resuming with the {len(records_to_update)} records selected by the previous run")
+        else:
+            # Get all CAMS records that don't have RecordedBy populated
+            records_to_update = self.get_records_missing_recorded_by(limit)
         
-        if not records_to_update:
-            logging.info("No records found that need updating")
-            return
+            if not records_to_update:
+                logging.info("No records found that need updating")
+                return
+
+            self.runner.record_plan(records_to_update)
         
+        # The limit also applies when resuming, to the records not yet completed
+        records_to_update = self.runner.remaining(records_to_update, key=lambda record: record.get('OBJECTID'), limit=limit)
         logging.info(f"Found {len(records_to_update)} records to update")
         
-        for i in range(0, len(records_to_update), batch_size):
-            batch = records_to_update[i:i+batch_size]
-            batch_num = (i // batch_size) + 1
-            total_batches = (len(records_to_update) + batch_size - 1) // batch_size
-            
-            logging.info(f"Processing batch {batch_num}/{total_batches} ({len(batch)} records)")
-            
-            for record in batch:
-                try:
-                    self.process_record(record)
-                except Exception as e:
-                    logging.error(f"Failed to process record {record.get('OBJECTID', 'unknown')}: {e}")
-                    self.error_count += 1
-            
-            # Add delay between batches to respect API limits
-            if i + batch_size < len(records_to_update):
-                logging.info("Waiting 2 seconds before next batch...")
-                time.sleep(2)
+        batches = self.batch_records(records_to_update, batch_size)
+        if workers > 1:
+            self.process_batches_concurrently(batches, workers)
+        else:
+            for batch_num, batch in enumerate(batches, start=1):
+                logging.info(f"Processing batch {batch_num}/{len(batches)} ({len(batch)} records)")
+                self.process_batch(batch)
         
         # Print final statistics
         self.print_migration_summary()
+        self.runner.print_summary()
+
+    def batch_records(self, records: List[dict], batch_size: int) -> List[List[dict]]:
+        """Split records into batches of up to batch_size records, keeping all records for an iNatRef in the same batch"""
+
+        batches = []
+        batch = []
+        for _, group in itertools.groupby(records, key=lambda record: record.get('iNatRef')):
+            group = list(group)
+            if batch and len(batch) + len(group) > batch_size:
+                batches.append(batch)
+                batch = []
+            batch.extend(group)
+        if batch:
+            batches.append(batch)
+        return batches
+
+    def process_batches_concurrently(self, batches: List[List[dict]], workers: int):
+        """Process batches on a pool of worker threads, with at most two batches per worker queued or in flight
+
+        The workers share the iNaturalist and CAMS rate limiters, so adding workers overlaps network latency
+        without exceeding the request rate either API will accept.
+        """
+
+        in_flight = threading.BoundedSemaphore(workers * 2)
+        with concurrent.futures.ThreadPoolExecutor(max_workers=workers, thread_name_prefix='migration') as executor:
+            futures = []
+            for batch_num, batch in enumerate(batches, start=1):
+                in_flight.acquire()
+                logging.info(f"Queueing batch {batch_num}/{len(batches)} ({len(batch)} records)")
+                future = executor.submit(self.process_batch, batch)
+                future.add_done_callback(lambda _: in_flight.release())
+                futures.append(future)
+            for future in futures:
+                # process_batch records its own errors, so this only re-raises unexpected failures
+                future.result()
+
+    def increment(self, counter: str, amount: int = 1):
+        """Thread-safe increment of one of updated_count, error_count or skipped_count"""
+        with self.counter_lock:
+            setattr(self, counter, getattr(self, counter) + amount)
+
+    def process_batch(self, batch: List[dict]):
+        """Fetch the observations for a batch in bulk, then write all updates for the batch in a single edit"""
+
+        try:
+            observations = self.fetch_observations(batch)
+        except Exception as e:
+            logging.error(f"Failed to fetch iNaturalist observations for batch: {e}")
+            self.increment('error_count', len(batch))
+            self.runner.record_outcomes((record.get('OBJECTID'), migration_runner.ERROR, str(e)) for record in batch)
+            return
+
+        updates = []
+        for record in batch:
+            try:
+                update = self.process_record(record, observations)
+                if update:
+                    updates.append(update)
+            except Exception as e:
+                logging.error(f"Failed to process record {record.get('OBJECTID', 'unknown')}: {e}")
+                self.increment('error_count')
+                self.runner.record_outcome(record.get('OBJECTID'), migration_runner.ERROR, str(e))
+
+        if not updates:
+            return
+
+        if self.dry_run:
+            self.increment('updated_count', len(updates))
+            self.runner.record_outcomes((update[0], migration_runner.UPDATED, None) for update in updates)
+        else:
+            self.update_cams_records(updates)
+
+    def fetch_observations(self, batch: List[dict]) -> Dict[str, object]:
+        """Fetch the iNaturalist observations for all iNatRefs in a batch, returning them keyed by iNatRef"""
+
+        inat_refs = list(dict.fromkeys(record.get('iNatRef') for record in batch if record.get('iNatRef')))
+        if not inat_refs:
+            return {}
+
+        logging.info(f"Fetching {len(inat_refs)} observations from iNaturalist")
+        self.inat_rate_limiter.wait()
+        try:
+            observations = inaturalist_reader.INatReader.get_observations_with_ids(inat_refs)
+        except Exception:
+            self.inat_rate_limiter.record_failure()
+            raise
+        self.inat_rate_limiter.record_success()
+
+        return {str(observation.id): observation for observation in observations}
     
-    def process_record(self, record: dict):
-        """Process a single CAMS record based on update rules"""
+    def process_record(self, record: dict, observations: Dict[str, object]) -> Optional[Tuple[int, int, str, datetime]]:
+        """Work out the RecordedBy update for a single CAMS record based on update rules
+
+        Returns a tuple of (object_id, user_id, username, recorded_date), or None if the record should be skipped
+        """
         object_id = record.get('OBJECTID')
         inat_ref = record.get('iNatRef')
         update_rule = record.get('_update_rule', 'unknown')
         
         if not inat_ref:
             logging.warning(f"Record {object_id} has no iNatRef, skipping")
-            self.skipped_count += 1
-            return
+            self.increment('skipped_count')
+            self.runner.record_outcome(object_id, migration_runner.SKIPPED, 'no iNatRef')
+            return None
         
         logging.debug(f"Processing record {object_id} with iNaturalist ID {inat_ref} using rule '{update_rule}'")
         
         try:
-            # Fetch fresh observation data from iNaturalist
-            observation = inaturalist_reader.INatReader.get_observation_with_id(inat_ref)
+            observation = observations.get(str(inat_ref))
+            if not observation:
+                raise ValueError(f'Observation with id {inat_ref} not found')
             
             # Get recorded_date from observation (same for both rules)
             if hasattr(observation, 'updated_at') and observation.updated_at:
@@ -153,21 +260,19 @@ class UpdateRecordedByMigration:
                 
             else:
                 logging.warning(f"Unknown update rule '{update_rule}' for record {object_id}, skipping")
-                self.skipped_count += 1
-                return
+                self.increment('skipped_count')
+                self.runner.record_outcome(object_id, migration_runner.SKIPPED, f"unknown update rule '{update_rule}'")
+                return None
             
             if user_id and username and recorded_date:
-                # Update the CAMS record
                 if self.dry_run:
                     logging.info(f"[DRY RUN] Would update record {object_id} ({update_rule}) with RecordedByUserId: {user_id}, RecordedByUserName: {username}, RecordedDate: {recorded_date}")
-                else:
-                    self.update_cams_record(object_id, user_id, username, recorded_date)
-                    logging.info(f"Updated record {object_id} ({update_rule}) with RecordedByUserId: {user_id}, RecordedByUserName: {username}")
-                
-                self.updated_count += 1
+                return object_id, user_id, username, recorded_date
             else:
                 logging.info(f"Missing user_id ({user_id}), username ({username}), or recorded_date ({recorded_date}) for record {object_id}, skipping")
-                self.skipped_count += 1
+                self.increment('skipped_count')
+                self.runner.record_outcome(object_id, migration_runner.SKIPPED, 'missing user or recorded date')
+                return None
                 
         except Exception as e:
             logging.error(f"Error processing iNaturalist observation {inat_ref}: {e}")
@@ -180,33 +285,30 @@ class UpdateRecordedByMigration:
         
         try:
             # Get all visits that are missing the new fields and have a valid iNatRef
-            visits_layer = self.cams.item.tables[0]  # Assuming visits table is the first table
             where_clause = "(RecordedByUserId IS NULL OR RecordedByUserId = '' OR RecordedByUserName IS NULL OR RecordedByUserName = '') AND iNatRef IS NOT NULL AND iNatRef <> ''"
             
-            query_result = visits_layer.query(
-                where=where_clause, 
-                out_fields=['OBJECTID', 'iNatRef', 'RecordedByUserId', 'RecordedByUserName', 'RecordedDate', 'WeedVisitStatus'],
-                order_by_fields='iNatRef, OBJECTID'  # Group by observation, then by creation order
+            rows = self.cams.scan_weed_visits_table(
+                where_clause, 
+                out_fields=['OBJECTID', 'iNatRef', 'RecordedByUserId', 'RecordedByUserName', 'RecordedDate', 'WeedVisitStatus']
             )
             
-            all_records = []
-            for feature in query_result.features:
-                all_records.append(feature.attributes)
-            
-            logging.info(f"Found {len(all_records)} total records missing RecordedBy information")
-            
             # Group records by iNatRef (observation ID)
+            record_count = 0
             records_by_observation = {}
-            for record in all_records:
+            for record in rows:
+                record_count += 1
                 inat_ref = record.get('iNatRef')
                 if inat_ref:
                     if inat_ref not in records_by_observation:
                         records_by_observation[inat_ref] = []
                     records_by_observation[inat_ref].append(record)
             
+            logging.info(f"Found {record_count} total records missing RecordedBy information")
+            
             # Select specific records to update for each observation
             records_to_update = []
-            for inat_ref, observation_records in records_by_observation.items():
+            for inat_ref in sorted(records_by_observation):
+                observation_records = records_by_observation[inat_ref]
                 # Sort by OBJECTID to get chronological order
                 observation_records.sort(key=lambda x: x.get('OBJECTID', 0))
                 
@@ -246,33 +348,44 @@ class UpdateRecordedByMigration:
             logging.error(f"Error querying CAMS for records: {e}")
             raise
     
-    def update_cams_record(self, object_id: int, user_id: int, username: str, recorded_date: datetime):
-        """Update a specific CAMS record with RecordedByUserId, RecordedByUserName and RecordedDate information"""
+    def update_cams_records(self, updates: List[Tuple[int, int, str, datetime]]):
+        """Update a batch of CAMS records with RecordedByUserId, RecordedByUserName and RecordedDate information in a single edit"""
         
+        # Prepare the update data
+        update_data = [{
+            'attributes': {
+                'OBJECTID': object_id,
+                'RecordedByUserId': str(user_id),
+                'RecordedByUserName': username,
+                'RecordedDate': int(recorded_date.timestamp() * 1000)  # Convert to milliseconds for ArcGIS
+            }
+        } for object_id, user_id, username, recorded_date in updates]
+        
+        # Update the visits table
+        visits_layer = self.cams.item.tables[0]  # Assuming visits table is the first table
+        self.runner.record_pending(update[0] for update in updates)
+        self.cams_rate_limiter.wait()
         try:
-            # Prepare the update data
-            update_data = [{
-                'attributes': {
-                    'OBJECTID': object_id,
-                    'RecordedByUserId': str(user_id),
-                    'RecordedByUserName': username,
-                    'RecordedDate': int(recorded_date.timestamp() * 1000)  # Convert to milliseconds for ArcGIS
-                }
-            }]
-            
-            # Update the visits table
-            visits_layer = self.cams.item.tables[0]  # Assuming visits table is the first table
             result = visits_layer.edit_features(updates=update_data)
-            
-            if result['updateResults'] and result['updateResults'][0]['success']:
-                logging.debug(f"Successfully updated CAMS record {object_id}")
-            else:
-                error_msg = result['updateResults'][0].get('error', {}).get('description', 'Unknown error')
-                raise Exception(f"CAMS update failed: {error_msg}")
-                
         except Exception as e:
-            logging.error(f"Error updating CAMS record {object_id}: {e}")
-            raise
+            self.cams_rate_limiter.record_failure()
+            logging.error(f"Error updating {len(updates)} CAMS records: {e}")
+            self.increment('error_count', len(updates))
+            self.runner.record_outcomes((update[0], migration_runner.ERROR, str(e)) for update in updates)
+            return
+        self.cams_rate_limiter.record_success()
+
+        for update, update_result in zip(updates, result['updateResults']):
+            object_id, user_id, username, recorded_date = update
+            if update_result['success']:
+                logging.info(f"Updated record {object_id} with RecordedByUserId: {user_id}, RecordedByUserName: {username}")
+                self.increment('updated_count')
+                self.runner.record_outcome(object_id, migration_runner.UPDATED)
+            else:
+                error_msg = update_result.get('error', {}).get('description', 'Unknown error')
+                logging.error(f"Error updating CAMS record {object_id}: CAMS update failed: {error_msg}")
+                self.increment('error_count')
+                self.runner.record_outcome(object_id, migration_runner.ERROR, error_msg)
     
     def print_migration_summary(self):
         """Print summary of migration results"""
@@ -306,14 +419,29 @@ def main():
     parser.add_argument(
         '--batch-size', 
         type=int, 
-        default=50, 
-        help="Process N records at a time (default: 50)"
+        default=200, 
+        help="Process N records at a time (default: 200)"
     )
     parser.add_argument(
         '--limit', 
         type=int, 
         help="Limit to N total records (for testing)"
     )
+    parser.add_argument(
+        '--workers',
+        type=int,
+        default=1,
+        help="Process N batches concurrently (default: 1)"
+    )
+    parser.add_argument(
+        '--resume',
+        action='store_true',
+        help="Resume a previous run that did not complete, using its journal"
+    )
+    parser.add_argument(
+        '--journal',
+        help="Journal file to record progress in (default: migration_journals/update_recorded_by_fields.jsonl)"
+    )
     
     args = parser.parse_args()
     
@@ -323,12 +451,16 @@ def main():
     
     if args.limit is not None and args.limit <= 0:
         parser.error("limit must be greater than 0")
+
+    if args.workers <= 0:
+        parser.error("workers must be greater than 0")
     
     # Run the migration
-    migration = UpdateRecordedByMigration(dry_run=args.dry_run)
+    migration = UpdateRecordedByMigration(dry_run=args.dry_run, resume=args.resume, journal_path=args.journal)
     migration.migrate_existing_records(
         batch_size=args.batch_size,
-        limit=args.limit
+        limit=args.limit,
+        workers=args.workers
     )
 
 
@@ -53,38 +53,12 @@ class MockTaxon:
         self.preferred_common_name = "Test plant"
 
 
-def test_field_registry_completeness():
-    """Test that all observation fields used in the code are in the tracked registry"""
-    
-    print("Testing field registry completeness...")
-    print("-" * 40)
-    
-    # Test the validation method
-    is_complete, missing_fields, extra_fields = inaturalist_reader.INatReader.validate_tracked_fields()
-    
-    if missing_fields:
-        print(f"❌ Missing fields in TRACKED_OBSERVATION_FIELDS: {missing_fields}")
-    if extra_fields:
-        print(f"⚠️  Extra fields in TRACKED_OBSERVATION_FIELDS: {extra_fields}")
-    if is_complete and not extra_fields:
-        print("✅ All observation fields are properly tracked")
-    
-    return is_complete
-
-
 def test_recorded_by_implementation():
     """Test the RecordedBy and RecordedDate implementation"""
     
     print("Testing RecordedBy and RecordedDate implementation...")
     print("=" * 60)
     
-    # First test field registry completeness
-    print("0. Testing field registry completeness...")
-    field_test_passed = test_field_registry_completeness()
-    if not field_test_passed:
-        print("   ⚠️  Field registry has issues but continuing with other tests...")
-    print()
-    
     # Create a mock observation with observation field values
     observation = MockObservation()
     
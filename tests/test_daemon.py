@@ -0,0 +1,76 @@
+#  ====================================================================
+#  Copyright 2026 EcoNet.NZ
+#
+#  Licensed under the Apache License, Version 2.0 (the "License");
+#  you may not use this file except in compliance with the License.
+#  You may obtain a copy of the License at
+#
+#      http://www.apache.org/licenses/LICENSE-2.0
+#
+#  Unless required by applicable law or agreed to in writing, software
+#  distributed under the License is distributed on an "AS IS" BASIS,
+#  WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+#  See the License for the specific language governing permissions and
+#  limitations under the License.
+#  ====================================================================
+
+import threading
+
+import pytest
+
+from inat_to_cams import daemon, metrics, metrics_textfile, summary_logger
+
+
+class StubSynchroniser:
+
+    def __init__(self, results):
+        self.stopping = threading.Event()
+        self.results = list(results)
+        self.polled = []
+
+    def sync_updated_observations(self, config_names):
+        self.polled.append(config_names)
+        result = self.results.pop(0)
+        if isinstance(result, Exception):
+            raise result
+        return result
+
+
+@pytest.fixture
+def textfiles(monkeypatch):
+    written = []
+    monkeypatch.setattr(daemon.config, 'sync_configuration', {'omb_nz': {}, 'moth_plant_nz': {}})
+    monkeypatch.setattr(metrics_textfile, 'write_textfile', written.append)
+    monkeypatch.setattr(summary_logger, 'flush', lambda: None)
+    return written
+
+
+def test_failed_poll_is_counted_backed_off_and_retried(textfiles):
+    synchroniser = StubSynchroniser([ConnectionError('CAMS unavailable'), {'omb_nz': 3}])
+    sync_daemon = daemon.SyncDaemon(synchroniser, min_interval=10, max_interval=100)
+
+    sync_daemon.poll(sync_daemon.schedules)
+
+    assert [schedule.interval for schedule in sync_daemon.schedules] == [20, 20]
+    assert metrics.counter_value('poll_errors', config='omb_nz') == 1
+    assert len(textfiles) == 1
+
+    sync_daemon.poll(sync_daemon.schedules)
+
+    assert synchroniser.polled == [['omb_nz', 'moth_plant_nz']] * 2
+    assert [schedule.interval for schedule in sync_daemon.schedules] == [10, 40]
+    assert metrics.counter_value('poll_errors', config='omb_nz') == 0
+
+
+def test_observations_skipped_as_unchanged_do_not_count_as_activity(textfiles):
+    synchroniser = StubSynchroniser([{'omb_nz': 2}])
+    sync_daemon = daemon.SyncDaemon(synchroniser, min_interval=10, max_interval=15)
+    sync_updated_observations = synchroniser.sync_updated_observations
+
+    def skip_unchanged(config_names):
+        metrics.increment('observations_skipped_unchanged', 2, config='omb_nz')
+        return sync_updated_observations(config_names)
+    synchroniser.sync_updated_observations = skip_unchanged
+    sync_daemon.poll(sync_daemon.schedules)
+
+    assert [schedule.interval for schedule in sync_daemon.schedules] == [15, 15]
@@ -0,0 +1,110 @@
+#  ====================================================================
+#  Copyright 2026 EcoNet.NZ
+#
+#  Licensed under the Apache License, Version 2.0 (the "License");
+#  you may not use this file except in compliance with the License.
+#  You may obtain a copy of the License at
+#
+#      http://www.apache.org/licenses/LICENSE-2.0
+#
+#  Unless required by applicable law or agreed to in writing, software
+#  distributed under the License is distributed on an "AS IS" BASIS,
+#  WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+#  See the License for the specific language governing permissions and
+#  limitations under the License.
+#  ====================================================================
+
+import datetime
+
+from inat_to_cams import cams_feature, feature_hashes
+
+
+def translated_feature(**visit_values):
+    weed_location = cams_feature.WeedLocation()
+    weed_location.species = 'MothPlant'
+    weed_location.current_status = 'RedGrowth'
+    weed_location.iNaturalist_longitude = 174.78
+    weed_location.iNaturalist_latitude = -41.29
+    weed_location.effort_to_control = 3
+    weed_visit = cams_feature.WeedVisit()
+    weed_visit.external_id = '358226118'
+    weed_visit.date_visit_made = datetime.datetime(2026, 8, 1, 10, 30)
+    weed_visit.notes = 'By the stream'
+    weed_visit.recorded_date = datetime.datetime(2026, 8, 2, 9, 0)
+    for field, value in visit_values.items():
+        setattr(weed_visit, field, value)
+    return cams_feature.CamsFeature(cams_feature.Geolocation(174.78, -41.29), weed_location, weed_visit)
+
+
+def test_same_translation_has_the_same_hash():
+    assert feature_hashes.feature_hash(translated_feature()) == feature_hashes.feature_hash(translated_feature())
+
+
+def test_recorded_date_is_left_out_of_the_hash():
+    # Changes with every update to the observation, even when nothing we map has changed
+    updated = translated_feature(recorded_date=datetime.datetime(2026, 9, 1, 12, 0))
+
+    assert feature_hashes.feature_hash(updated) == feature_hashes.feature_hash(translated_feature())
+
+
+def test_visit_changes_change_the_hash():
+    changed = translated_feature(notes='Cut down')
+
+    assert feature_hashes.feature_hash(changed) != feature_hashes.feature_hash(translated_feature())
+
+
+def test_fields_not_compared_with_cams_change_the_hash():
+    # A status or effort to control change is still written with a new visit
+    changed = translated_feature()
+    changed.weed_location.current_status = 'DeadHeadingSeed'
+
+    assert feature_hashes.feature_hash(changed) != feature_hashes.feature_hash(translated_feature())
+
+
+def test_geolocation_is_left_out_of_the_hash():
+    moved = translated_feature()
+    moved.geolocation = cams_feature.Geolocation(0.0, 0.0)
+
+    assert feature_hashes.feature_hash(moved) == feature_hashes.feature_hash(translated_feature())
+
+
+UPDATED_AT = datetime.datetime(2026, 8, 3, 9, 0, tzinfo=datetime.timezone(datetime.timedelta(hours=12)))
+
+
+def test_recorded_hashes_are_unchanged_by_id():
+    hashes = feature_hashes.FeatureHashes()
+    content_hash = feature_hashes.feature_hash(translated_feature())
+
+    hashes.record(358226118, content_hash, UPDATED_AT)
+
+    assert hashes.is_unchanged('358226118', content_hash)
+    assert not hashes.is_unchanged(358226118, feature_hashes.feature_hash(translated_feature(notes='Cut down')))
+    assert not hashes.is_unchanged(1, content_hash)
+
+
+def test_forgotten_hashes_are_changed():
+    content_hash = feature_hashes.feature_hash(translated_feature())
+    hashes = feature_hashes.FeatureHashes({'358226118': [content_hash, '2026-08-02T21:00:00+00:00']})
+
+    hashes.forget(358226118)
+    hashes.forget(1)
+
+    assert not hashes.is_unchanged(358226118, content_hash)
+
+
+def test_hashes_are_stored_with_the_update_time_in_utc():
+    hashes = feature_hashes.FeatureHashes()
+
+    hashes.record(358226118, 'abc', UPDATED_AT)
+
+    assert hashes.hashes == {'358226118': ['abc', '2026-08-02T21:00:00+00:00']}
+
+
+def test_prune_drops_the_hashes_of_observations_updated_before_the_cutoff():
+    hashes = feature_hashes.FeatureHashes()
+    hashes.record(1, 'old', UPDATED_AT - datetime.timedelta(days=1))
+    hashes.record(2, 'cutoff', UPDATED_AT)
+    hashes.record(3, 'new', UPDATED_AT + datetime.timedelta(seconds=1))
+
+    assert hashes.prune(UPDATED_AT.astimezone(datetime.timezone.utc)) == 1
+    assert sorted(hashes.hashes) == ['2', '3']
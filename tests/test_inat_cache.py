@@ -0,0 +1,133 @@
+#  ====================================================================
+#  Copyright 2026 EcoNet.NZ
+#
+#  Licensed under the Apache License, Version 2.0 (the "License");
+#  you may not use this file except in compliance with the License.
+#  You may obtain a copy of the License at
+#
+#      http://www.apache.org/licenses/LICENSE-2.0
+#
+#  Unless required by applicable law or agreed to in writing, software
+#  distributed under the License is distributed on an "AS IS" BASIS,
+#  WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+#  See the License for the specific language governing permissions and
+#  limitations under the License.
+#  ====================================================================
+
+import io
+import itertools
+import json
+import time
+
+import pyrate_limiter
+import pytest
+import requests
+import urllib3
+
+from inat_to_cams import inat_cache, metrics
+
+OBSERVATIONS_URL = 'https://api.inaturalist.org/v1/observations'
+
+
+class FakeAdapter(requests.adapters.HTTPAdapter):
+    """Answers every request with a page of one observation, and total_results for revalidation requests"""
+
+    def __init__(self):
+        super().__init__()
+        self.urls = []
+        self.total_results = 0
+
+    def send(self, request, **kwargs):
+        self.urls.append(request.url)
+        body = json.dumps({'total_results': self.total_results, 'results': [{'id': len(self.urls)}]}).encode()
+        raw = urllib3.HTTPResponse(body=io.BytesIO(body), headers={'Content-Type': 'application/json'}, status=200,
+                                   preload_content=False, request_url=request.url)
+        return self.build_response(request, raw)
+
+    def revalidations(self):
+        return [url for url in self.urls if 'updated_since' in url]
+
+
+@pytest.fixture
+def adapter():
+    return FakeAdapter()
+
+
+@pytest.fixture
+def session(tmp_path, adapter):
+    metrics.reset()
+    session = inat_cache.INatCacheSession(cache_file=str(tmp_path / 'inat_cache.sqlite'), per_second=100, per_minute=1000,
+                                          per_day=100000, bucket_class=pyrate_limiter.MemoryListBucket)
+    session.mount('https://', adapter)
+    return session
+
+
+def key(url):
+    return inat_cache.create_key(requests.Request('GET', url).prepare())
+
+
+def test_key_ignores_the_order_of_ids_and_taxa():
+    assert key(f'{OBSERVATIONS_URL}?taxon_id=2,1&place_id=5&page=1') == \
+        key(f'{OBSERVATIONS_URL}?page=1&place_id=5&taxon_id=1,2')
+
+
+def test_key_depends_on_the_values_of_other_parameters():
+    assert key(f'{OBSERVATIONS_URL}?taxon_id=1,2&page=1') != key(f'{OBSERVATIONS_URL}?taxon_id=1,2&page=2')
+    assert key(f'{OBSERVATIONS_URL}?q=a,b') != key(f'{OBSERVATIONS_URL}?q=b,a')
+
+
+def test_revalidation_params_select_the_observations_without_paging():
+    params = inat_cache.revalidation_params(f'{OBSERVATIONS_URL}?taxon_id=2,1&place_id=5&page=3&per_page=200&id_above=10')
+
+    assert params == {'taxon_id': '1,2', 'place_id': '5'}
+
+
+def test_revalidation_params_include_the_ids_requested_in_the_path():
+    assert inat_cache.revalidation_params(f'{OBSERVATIONS_URL}/9,8?locale=en') == {'id': '8,9', 'locale': 'en'}
+
+
+def test_other_endpoints_are_not_revalidated():
+    assert inat_cache.revalidation_params('https://api.inaturalist.org/v1/taxa/48627') is None
+
+
+def test_cached_observations_are_used_once_revalidated(session, adapter):
+    session.get(f'{OBSERVATIONS_URL}?taxon_id=2,1')
+    response = session.get(f'{OBSERVATIONS_URL}?taxon_id=1,2')
+
+    assert response.from_cache
+    assert len(adapter.revalidations()) == 1
+    assert metrics.counter_value('inat_cache', result='revalidated') == 1
+
+
+def test_stale_observations_are_fetched_again(session, adapter):
+    session.get(f'{OBSERVATIONS_URL}?taxon_id=1')
+    adapter.total_results = 1
+    response = session.get(f'{OBSERVATIONS_URL}?taxon_id=1')
+
+    assert not response.from_cache
+    assert response.json()['results'] == [{'id': 3}]
+    assert metrics.counter_value('inat_cache', result='stale') == 1
+
+
+def test_other_pages_of_a_revalidated_search_are_not_revalidated_again(session, adapter):
+    for taxon_ids, page in (('1,2', 1), ('1,2', 2), ('1,2', 1), ('2,1', 2)):
+        session.get(f'{OBSERVATIONS_URL}?taxon_id={taxon_ids}&page={page}')
+
+    assert len(adapter.revalidations()) == 1
+    assert metrics.counter_value('inat_cache', result='hit') == 2
+
+
+def test_least_recently_used_responses_are_evicted(session, monkeypatch):
+    clock = itertools.count(time.time())
+    monkeypatch.setattr(inat_cache.time, 'time', lambda: next(clock))
+    for place_id in (1, 2, 3):
+        session.get(f'https://api.inaturalist.org/v1/taxa?place_id={place_id}')
+    session.get('https://api.inaturalist.org/v1/taxa?place_id=1')
+    with session.cache.responses.connection() as connection:
+        sizes = [size for size, in connection.execute('SELECT LENGTH(value) FROM responses')]
+
+    session.max_size = sum(sizes) - 1
+    session.trim()
+
+    assert session.get('https://api.inaturalist.org/v1/taxa?place_id=1').from_cache
+    assert not session.get('https://api.inaturalist.org/v1/taxa?place_id=2').from_cache
@@ -0,0 +1,61 @@
+#  ====================================================================
+#  Copyright 2026 EcoNet.NZ
+#
+#  Licensed under the Apache License, Version 2.0 (the "License");
+#  you may not use this file except in compliance with the License.
+#  You may obtain a copy of the License at
+#
+#      http://www.apache.org/licenses/LICENSE-2.0
+#
+#  Unless required by applicable law or agreed to in writing, software
+#  distributed under the License is distributed on an "AS IS" BASIS,
+#  WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+#  See the License for the specific language governing permissions and
+#  limitations under the License.
+#  ====================================================================
+
+import datetime
+import types
+
+import pytest
+
+from inat_to_cams import inaturalist_reader
+
+OBSERVED_ON = datetime.datetime(2026, 8, 1, 10, 30, tzinfo=datetime.timezone(datetime.timedelta(hours=12)))
+
+
+def observation(**field_values):
+    return types.SimpleNamespace(
+        id=358226118, location=[-41.29, 174.78], positional_accuracy=10, observed_on=OBSERVED_ON, created_at=OBSERVED_ON,
+        updated_at=OBSERVED_ON,
+        taxon=types.SimpleNamespace(ancestor_ids=[47126], name='Araujia hortorum', preferred_common_name='moth plant'),
+        description=None, quality_grade='research', photos=[],
+        ofvs=[types.SimpleNamespace(name=name, value=value) for name, value in field_values.items()])
+
+
+def test_follow_up_date_is_read_from_the_date_for_next_visit():
+    flattened = inaturalist_reader.INatReader.flatten(observation(**{'Date for next visit': '2026-11-01'}))
+
+    assert flattened.follow_up_date == '2026-11-01'
+
+
+def test_legacy_follow_up_month_is_read_when_there_is_no_date_for_next_visit():
+    flattened = inaturalist_reader.INatReader.flatten(observation(**{'Follow-up (YYYY-MM)': '2026-11'}))
+
+    assert flattened.follow_up_date == datetime.datetime(2026, 11, 1)
+
+
+@pytest.mark.parametrize('field_values', [
+    {},
+    {'Date for next visit': ''},
+    {'Date for next visit': '', 'Follow-up (YYYY-MM)': ''},
+    {'Follow-up (YYYY-MM)': '(undef.)'},
+])
+def test_absent_or_empty_follow_up_date_is_none(field_values):
+    assert inaturalist_reader.INatReader.flatten(observation(**field_values)).follow_up_date is None
+
+
+def test_legacy_area_replaces_an_empty_area():
+    assert inaturalist_reader.INatReader.flatten(observation(**{'Area in square meters': ''})).area is None
+    assert inaturalist_reader.INatReader.flatten(
+        observation(**{'Area in square meters': '', 'area of infestation (m2)': '20'})).area == '20'
@@ -0,0 +1,104 @@
+#  ====================================================================
+#  Copyright 2026 EcoNet.NZ
+#
+#  Licensed under the Apache License, Version 2.0 (the "License");
+#  you may not use this file except in compliance with the License.
+#  You may obtain a copy of the License at
+#
+#      http://www.apache.org/licenses/LICENSE-2.0
+#
+#  Unless required by applicable law or agreed to in writing, software
+#  distributed under the License is distributed on an "AS IS" BASIS,
+#  WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+#  See the License for the specific language governing permissions and
+#  limitations under the License.
+#  ====================================================================
+
+import types
+
+import pytest
+
+from inat_to_cams import cams_feature, cams_interface, config, inaturalist_reader
+from migration import migrate, migration_reader, migration_runner
+
+# The observation ids found for each sync configuration
+OBSERVATION_IDS = {'omb_nz': [1, 2], 'moth_plant_nz': [3, 4]}
+
+
+class StubCams:
+    """Counts the CAMS reads and writes, failing the writes while unavailable is set"""
+
+    def __init__(self):
+        self.scans = 0
+        self.written = []
+        self.unavailable = False
+
+    def get_features_by_inat_id(self, reader):
+        self.scans += 1
+        features = {}
+        for inat_id in sum(OBSERVATION_IDS.values(), []):
+            location = cams_feature.WeedLocation()
+            location.object_id = 100 + inat_id
+            location.location_accuracy = 10
+            features[str(inat_id)] = [cams_feature.CamsFeature(None, location, {})]
+        return features
+
+    def update_weed_location_layer_rows(self, rows):
+        if self.unavailable:
+            raise ConnectionError('CAMS unavailable')
+        self.written.extend(row['attributes']['objectId'] for row in rows)
+        return [{'success': True} for _ in rows]
+
+
+@pytest.fixture
+def cams(monkeypatch):
+    cams = StubCams()
+    monkeypatch.setitem(vars(cams_interface), 'connection', cams)
+    monkeypatch.setattr(migration_reader.CamsMigrationReader, 'get_features_by_inat_id',
+                        lambda reader: cams.get_features_by_inat_id(reader))
+    return cams
+
+
+@pytest.fixture
+def searches(monkeypatch):
+    # The configurations whose observations were fetched from iNaturalist, identified by their first taxon id
+    searches = []
+    monkeypatch.setattr(config, 'sync_configuration', {
+        config_name: {'taxon_ids': [config_name], 'place_ids': [6803]} for config_name in OBSERVATION_IDS})
+
+    def get_matching_observations_updated_since(reader, place_ids, taxon_ids, time_of_previous_update):
+        searches.append(taxon_ids[0])
+        return [types.SimpleNamespace(id=inat_id, positional_accuracy=5, photos=[])
+                for inat_id in OBSERVATION_IDS[taxon_ids[0]]]
+    monkeypatch.setattr(inaturalist_reader.INatReader, 'get_matching_observations_updated_since',
+                        get_matching_observations_updated_since)
+    return searches
+
+
+def test_resumed_run_only_queries_for_configurations_not_yet_planned(tmp_path, cams, searches):
+    journal_path = str(tmp_path / 'journal.jsonl')
+    cams.unavailable = True
+    with pytest.raises(ConnectionError):
+        migrate.CopyiNatDetailsToCAMS(journal_path=journal_path).copyiNatDetails_to_existing_CAMS_features()
+    assert (searches, cams.scans) == (['omb_nz'], 1)
+
+    cams.unavailable = False
+    resumed = migrate.CopyiNatDetailsToCAMS(resume=True, journal_path=journal_path)
+
+    assert resumed.copyiNatDetails_to_existing_CAMS_features() == 4
+    assert searches == ['omb_nz', 'moth_plant_nz']
+    assert cams.scans == 2
+    assert cams.written == [101, 102, 103, 104]
+    assert resumed.runner.counts[migration_runner.UPDATED] == 6
+
+
+def test_resumed_run_after_every_configuration_was_planned_does_not_read_cams(tmp_path, cams, searches):
+    journal_path = str(tmp_path / 'journal.jsonl')
+    copier = migrate.CopyiNatDetailsToCAMS(journal_path=journal_path)
+    for config_name, values in config.sync_configuration.items():
+        copier.plan_config(config_name, values, migrate.cams_migration_writer.CamsMigrationWriter())
+
+    resumed = migrate.CopyiNatDetailsToCAMS(resume=True, journal_path=journal_path)
+
+    assert resumed.copyiNatDetails_to_existing_CAMS_features() == 4
+    assert (len(searches), cams.scans) == (2, 1)
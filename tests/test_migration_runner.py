@@ -0,0 +1,132 @@
+#  ====================================================================
+#  Copyright 2026 EcoNet.NZ
+#
+#  Licensed under the Apache License, Version 2.0 (the "License");
+#  you may not use this file except in compliance with the License.
+#  You may obtain a copy of the License at
+#
+#      http://www.apache.org/licenses/LICENSE-2.0
+#
+#  Unless required by applicable law or agreed to in writing, software
+#  distributed under the License is distributed on an "AS IS" BASIS,
+#  WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+#  See the License for the specific language governing permissions and
+#  limitations under the License.
+#  ====================================================================
+
+import json
+
+from migration import migration_runner
+
+
+def new_runner(tmp_path, **kwargs):
+    return migration_runner.MigrationRunner('test', journal_path=str(tmp_path / 'journal' / 'test.jsonl'), **kwargs)
+
+
+def interrupted_run(tmp_path):
+    # A run that planned five records and died after completing two, with one failed and one mid-write
+    runner = new_runner(tmp_path)
+    runner.record_plan([{'OBJECTID': key} for key in range(1, 6)])
+    runner.record_pending([1, 2, 3, 4])
+    runner.record_outcome(1, migration_runner.UPDATED)
+    runner.record_outcome(2, migration_runner.SKIPPED, 'no iNatRef')
+    runner.record_outcome(3, migration_runner.ERROR, 'timed out')
+    return runner
+
+
+def test_new_run_starts_an_empty_journal(tmp_path):
+    interrupted_run(tmp_path)
+
+    runner = new_runner(tmp_path)
+
+    assert not runner.has_plan()
+    assert runner.journal.read() == []
+
+
+def test_outcomes_are_journalled_and_counted(tmp_path):
+    runner = interrupted_run(tmp_path)
+
+    entries = runner.journal.read()
+    assert entries[0]['type'] == 'plan'
+    assert [(entry['key'], entry['outcome']) for entry in entries[5:]] == [
+        ('1', migration_runner.UPDATED), ('2', migration_runner.SKIPPED), ('3', migration_runner.ERROR)]
+    assert entries[-1]['detail'] == 'timed out'
+    assert runner.counts == {migration_runner.UPDATED: 1, migration_runner.SKIPPED: 1, migration_runner.ERROR: 1}
+
+
+def test_resume_reuses_the_plan(tmp_path):
+    interrupted_run(tmp_path)
+
+    runner = new_runner(tmp_path, resume=True)
+
+    assert runner.plan == [{'OBJECTID': key} for key in range(1, 6)]
+
+
+def test_resume_skips_completed_records_and_reapplies_the_rest(tmp_path):
+    interrupted_run(tmp_path)
+
+    runner = new_runner(tmp_path, resume=True)
+
+    assert runner.is_completed(1) and runner.is_completed('2')
+    remaining = runner.remaining(runner.plan, key=lambda record: record['OBJECTID'])
+    # 3 failed, 4 was pending and 5 was never started
+    assert [record['OBJECTID'] for record in remaining] == [3, 4, 5]
+
+
+def test_limit_applies_to_the_remaining_records_when_resuming(tmp_path):
+    interrupted_run(tmp_path)
+
+    runner = new_runner(tmp_path, resume=True)
+
+    remaining = runner.remaining(runner.plan, key=lambda record: record['OBJECTID'], limit=2)
+    assert [record['OBJECTID'] for record in remaining] == [3, 4]
+
+
+def test_resume_without_a_journal_starts_from_the_beginning(tmp_path):
+    runner = new_runner(tmp_path, resume=True)
+
+    assert not runner.has_plan()
+    assert runner.journal.exists()
+
+
+def test_resume_ignores_a_partly_written_last_line(tmp_path):
+    runner = interrupted_run(tmp_path)
+    with open(runner.journal.path, 'a', encoding='utf-8') as journal_file:
+        journal_file.write(json.dumps({'type': 'outcome', 'key': '4', 'outcome': migration_runner.UPDATED})[:20])
+
+    resumed = new_runner(tmp_path, resume=True)
+
+    assert not resumed.is_completed(4)
+    assert resumed.outcomes['3'] == migration_runner.ERROR
+
+
+def test_later_outcomes_replace_earlier_ones(tmp_path):
+    runner = interrupted_run(tmp_path)
+    runner.record_outcome(3, migration_runner.UPDATED)
+
+    resumed = new_runner(tmp_path, resume=True)
+
+    assert resumed.is_completed(3)
+
+
+def test_dry_run_does_not_touch_the_journal(tmp_path):
+    interrupted_run(tmp_path)
+    journal = (tmp_path / 'journal' / 'test.jsonl').read_text()
+
+    runner = new_runner(tmp_path, resume=True, dry_run=True)
+    runner.record_plan([{'OBJECTID': 6}])
+    runner.record_outcome(6, migration_runner.UPDATED)
+
+    assert not runner.is_completed(1)
+    assert (tmp_path / 'journal' / 'test.jsonl').read_text() == journal
+
+
+def test_named_plans_are_reused_when_resuming(tmp_path):
+    runner = new_runner(tmp_path)
+    runner.record_plan([{'inat_id': 1}], name='omb_nz')
+
+    resumed = new_runner(tmp_path, resume=True)
+
+    assert resumed.plan_for('omb_nz') == [{'inat_id': 1}]
+    assert resumed.has_plan('omb_nz')
+    assert not resumed.has_plan('moth_plant_nz') and not resumed.has_plan()
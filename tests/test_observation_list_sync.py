@@ -0,0 +1,120 @@
+#  ====================================================================
+#  Copyright 2026 EcoNet.NZ
+#
+#  Licensed under the Apache License, Version 2.0 (the "License");
+#  you may not use this file except in compliance with the License.
+#  You may obtain a copy of the License at
+#
+#      http://www.apache.org/licenses/LICENSE-2.0
+#
+#  Unless required by applicable law or agreed to in writing, software
+#  distributed under the License is distributed on an "AS IS" BASIS,
+#  WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+#  See the License for the specific language governing permissions and
+#  limitations under the License.
+#  ====================================================================
+
+import copy
+import logging
+import types
+
+import pytest
+
+from benchmark import fixtures, local_cams
+from inat_to_cams import cams_interface, cams_reader, inaturalist_reader, observation_list_sync, sync_state
+
+OBSERVATION_COUNT = 4
+
+
+class SummaryRows(logging.Handler):
+
+    def __init__(self):
+        super().__init__()
+        self.inat_ids = []
+
+    def emit(self, record):
+        if hasattr(record, 'sync_event'):
+            self.inat_ids.append(int(record.sync_event['inat_id']))
+
+
+@pytest.fixture
+def observations(tmp_path, monkeypatch):
+    observations = fixtures.replay_observations(fixtures.synthesise_fixtures(str(tmp_path / 'fixtures'), OBSERVATION_COUNT))
+    by_id = {observation.id: observation for observation in observations}
+    monkeypatch.setattr(inaturalist_reader.INatReader, 'get_observations_with_ids',
+                        staticmethod(lambda ids: [copy.deepcopy(by_id[inat_id]) for inat_id in ids if inat_id in by_id]))
+    return observations
+
+
+@pytest.fixture
+def connection(monkeypatch):
+    connection = local_cams.LocalCamsConnection()
+    # Set in the module's namespace, since getting cams_interface.connection would connect to CAMS
+    monkeypatch.setitem(vars(cams_interface), 'connection', connection)
+    return connection
+
+
+@pytest.fixture
+def summary_rows():
+    handler = SummaryRows()
+    logger = logging.getLogger('summary')
+    level = logger.level
+    logger.setLevel(logging.INFO)
+    logger.addHandler(handler)
+    yield handler
+    logger.removeHandler(handler)
+    logger.setLevel(level)
+
+
+@pytest.fixture
+def state(tmp_path):
+    state = sync_state.SyncState(str(tmp_path / 'sync_state.json'))
+    with state.locked():
+        yield state
+
+
+def sync(state, observations):
+    list_sync = observation_list_sync.ObservationListSync(types.SimpleNamespace(state=state))
+    return list_sync.run([observation.id for observation in observations])
+
+
+def test_summary_rows_are_only_logged_for_observations_written(state, observations, connection, summary_rows,
+                                                               monkeypatch):
+    sync(state, observations)
+    summary_rows.inat_ids = []
+    for observation in observations:
+        observation.description = f'{observation.description or ""} changed'
+
+    edit_rows = connection.edit_rows
+
+    def fail_first_row(entity_name, operation, rows):
+        results = edit_rows(entity_name, operation, rows)
+        results[0] = {'success': False, 'error': 'Timed out'}
+        return results
+    monkeypatch.setattr(connection, 'edit_rows', fail_first_row)
+    outcomes = sync(state, observations)
+
+    failed_id = observations[0].id
+    assert outcomes[failed_id] == (observation_list_sync.FAILED, 'update Visits_Table row: Timed out')
+    assert summary_rows.inat_ids == [observation.id for observation in observations[1:]]
+
+
+def test_batch_that_cannot_be_read_from_cams_fails_without_stopping_the_sync(state, observations, connection,
+                                                                             summary_rows, monkeypatch):
+    monkeypatch.setattr(observation_list_sync, 'BATCH_SIZE', 2)
+    read_observations = cams_reader.CamsReader.read_observations
+    calls = []
+
+    def fail_first_batch(self, inat_ids):
+        calls.append(inat_ids)
+        if len(calls) == 1:
+            raise ConnectionError('CAMS unavailable')
+        return read_observations(self, inat_ids)
+    monkeypatch.setattr(cams_reader.CamsReader, 'read_observations', fail_first_batch)
+
+    outcomes = sync(state, observations)
+
+    assert [outcome for outcome, _ in outcomes.values()] == [observation_list_sync.FAILED] * 2 + \
+        [observation_list_sync.CREATED] * 2
+    assert outcomes[observations[0].id][1] == 'CAMS unavailable'
+    assert summary_rows.inat_ids == [observation.id for observation in observations[2:]]
@@ -0,0 +1,126 @@
+#  ====================================================================
+#  Copyright 2026 EcoNet.NZ
+#
+#  Licensed under the Apache License, Version 2.0 (the "License");
+#  you may not use this file except in compliance with the License.
+#  You may obtain a copy of the License at
+#
+#      http://www.apache.org/licenses/LICENSE-2.0
+#
+#  Unless required by applicable law or agreed to in writing, software
+#  distributed under the License is distributed on an "AS IS" BASIS,
+#  WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+#  See the License for the specific language governing permissions and
+#  limitations under the License.
+#  ====================================================================
+
+from inat_to_cams import cams_feature
+from inat_to_cams.record import Record, stable_hash
+
+
+class Point(Record):
+    __slots__ = ('object_id', 'x', 'y')
+    IGNORED_FIELDS = frozenset({'object_id'})
+
+    def __init__(self, x=None, y=None, object_id=None):
+        self.object_id = object_id
+        self.x = x
+        self.y = y
+
+
+class LabelledPoint(Point):
+    __slots__ = ('label',)
+
+    def __init__(self, x=None, y=None, label=None, object_id=None):
+        super().__init__(x, y, object_id)
+        self.label = label
+
+
+class Single(Record):
+    __slots__ = ('ignored', 'value')
+    IGNORED_FIELDS = frozenset({'ignored'})
+
+
+def test_fields_are_the_public_slots_in_class_order():
+    assert Point.FIELDS == ('object_id', 'x', 'y')
+    assert LabelledPoint.FIELDS == ('object_id', 'x', 'y', 'label')
+
+
+def test_compared_fields_leave_out_the_ignored_fields():
+    assert Point.COMPARED_FIELDS == ('x', 'y')
+    assert LabelledPoint.COMPARED_FIELDS == ('x', 'y', 'label')
+
+
+def test_records_with_a_single_compared_field_can_be_compared():
+    first, second = Single(), Single()
+    first.ignored, first.value = 1, 'a'
+    second.ignored, second.value = 2, 'a'
+
+    assert first == second
+    second.value = 'b'
+    assert first != second
+
+
+def test_ignored_fields_are_left_out_of_equality_and_the_content_hash():
+    translated = Point(1.0, 2.0)
+    from_cams = Point(1.0, 2.0, object_id=94018)
+
+    assert translated == from_cams
+    assert translated.content_hash == from_cams.content_hash
+    assert hash(translated) == hash(from_cams)
+
+
+def test_records_of_different_types_are_not_equal():
+    assert Point(1.0, 2.0) != LabelledPoint(1.0, 2.0)
+
+
+def test_content_hash_is_stable_across_processes():
+    assert Point(1.0, 2.0).content_hash == stable_hash((1.0, 2.0))
+
+
+def test_setting_a_field_changes_the_content_hash():
+    point = Point(1.0, 2.0)
+    original_hash = point.content_hash
+
+    point.y = 3.0
+
+    assert point.content_hash != original_hash
+    assert point.content_hash == Point(1.0, 3.0).content_hash
+
+
+def test_setting_an_ignored_field_keeps_the_content_hash():
+    point = Point(1.0, 2.0)
+    original_hash = point.content_hash
+
+    point.object_id = 94018
+
+    assert point.content_hash == original_hash
+
+
+def test_changed_fields_are_the_compared_fields_that_differ_in_field_order():
+    point = LabelledPoint(1.0, 2.0, 'old', object_id=1)
+    other = LabelledPoint(1.0, 3.0, 'new', object_id=2)
+
+    assert point.changed_fields(other) == ['y', 'label']
+    assert point.changed_fields(LabelledPoint(1.0, 2.0, 'old')) == []
+
+
+def test_changed_fields_can_check_the_ignored_fields():
+    point = Point(1.0, 2.0, object_id=1)
+
+    assert point.changed_fields(Point(1.0, 2.0, object_id=2), fields=Point.FIELDS) == ['object_id']
+
+
+def test_every_field_changed_for_a_different_type():
+    assert Point(1.0, 2.0).changed_fields(None) == ['x', 'y']
+
+
+def test_as_dict_includes_the_ignored_fields():
+    assert Point(1.0, 2.0, object_id=5).as_dict() == {'object_id': 5, 'x': 1.0, 'y': 2.0}
+
+
+def test_cams_ids_and_values_kept_from_cams_are_not_compared():
+    kept_from_cams = {'object_id', 'global_id', 'audit_log', 'current_status', 'effort_to_control'}
+    assert not kept_from_cams & set(cams_feature.WeedLocation.COMPARED_FIELDS)
+    assert 'object_id' not in cams_feature.WeedVisit.COMPARED_FIELDS
+    assert cams_feature.WeedVisit.FIELDS[-1] == 'recorded_date'
@@ -0,0 +1,113 @@
+#  ====================================================================
+#  Copyright 2026 EcoNet.NZ
+#
+#  Licensed under the Apache License, Version 2.0 (the "License");
+#  you may not use this file except in compliance with the License.
+#  You may obtain a copy of the License at
+#
+#      http://www.apache.org/licenses/LICENSE-2.0
+#
+#  Unless required by applicable law or agreed to in writing, software
+#  distributed under the License is distributed on an "AS IS" BASIS,
+#  WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+#  See the License for the specific language governing permissions and
+#  limitations under the License.
+#  ====================================================================
+
+import logging
+
+import pytest
+
+from inat_to_cams import summary_logger
+
+HISTORY_ROW = '|New weed|**90932**|Pampas|PURPLE|[337013747](https://www.inaturalist.org/observations/337013747)|'
+
+
+@pytest.fixture
+def handler(tmp_path, monkeypatch):
+    monkeypatch.setattr(summary_logger, 'current_period', lambda: '2026-10')
+    return summary_logger.SummaryHandler(str(tmp_path))
+
+
+def log(handler, message):
+    handler.handle(logging.makeLogRecord({'msg': message, 'levelno': logging.INFO}))
+    handler.flush()
+
+
+def archived_files(tmp_path):
+    archive_directory = tmp_path / summary_logger.ARCHIVE_DIRECTORY
+    return sorted(path.name for path in archive_directory.iterdir()) if archive_directory.exists() else []
+
+
+def test_new_history_file_is_marked_with_the_period(handler, tmp_path):
+    log(handler, HISTORY_ROW)
+
+    assert (tmp_path / summary_logger.HISTORY_FILE).read_text().splitlines() == [
+        '<!-- sync history for 2026-10 -->', HISTORY_ROW]
+    assert archived_files(tmp_path) == []
+
+
+def test_history_of_the_same_month_is_appended_to(handler, tmp_path):
+    log(handler, HISTORY_ROW)
+    log(handler, '---')
+
+    assert (tmp_path / summary_logger.HISTORY_FILE).read_text().splitlines()[1:] == [HISTORY_ROW, '---']
+    assert archived_files(tmp_path) == []
+
+
+def test_history_of_a_previous_month_is_archived(handler, tmp_path, monkeypatch):
+    monkeypatch.setattr(summary_logger, 'current_period', lambda: '2026-09')
+    log(handler, HISTORY_ROW)
+    (tmp_path / summary_logger.EVENTS_FILE).write_text('{}\n')
+
+    monkeypatch.setattr(summary_logger, 'current_period', lambda: '2026-10')
+    log(handler, '---')
+
+    assert archived_files(tmp_path) == ['sync_history_2026-09.jsonl', 'sync_history_2026-09.md']
+    assert (tmp_path / summary_logger.ARCHIVE_DIRECTORY / 'sync_history_2026-09.md').read_text().splitlines()[1] == \
+        HISTORY_ROW
+    assert (tmp_path / summary_logger.HISTORY_FILE).read_text().splitlines() == ['<!-- sync history for 2026-10 -->', '---']
+    assert not (tmp_path / summary_logger.EVENTS_FILE).exists()
+
+
+def test_history_without_a_marker_is_archived_as_until_the_current_month(handler, tmp_path):
+    (tmp_path / summary_logger.HISTORY_FILE).write_text('---\n\n' + HISTORY_ROW + '\n')
+
+    log(handler, '---')
+
+    assert archived_files(tmp_path) == ['sync_history_until_2026-10.md']
+    assert (tmp_path / summary_logger.HISTORY_FILE).read_text().splitlines()[0] == '<!-- sync history for 2026-10 -->'
+
+
+def test_nothing_is_written_or_archived_without_anything_logged(handler, tmp_path):
+    (tmp_path / summary_logger.HISTORY_FILE).write_text('---\n')
+
+    handler.flush()
+
+    assert (tmp_path / summary_logger.HISTORY_FILE).read_text() == '---\n'
+    assert archived_files(tmp_path) == []
+
+
+@pytest.fixture
+def summary_messages(monkeypatch):
+    messages = []
+    monkeypatch.setattr(logging.getLogger('summary'), 'info', messages.append)
+    return messages
+
+
+def test_run_metrics_are_not_written_for_a_run_without_sync_events(summary_messages, monkeypatch):
+    monkeypatch.setattr(summary_logger, 'log_header_written', False)
+
+    summary_logger.write_run_metrics({'observations_read': 0})
+
+    assert summary_messages == []
+
+
+def test_run_metrics_are_written_as_json_after_the_sync_events(summary_messages, monkeypatch):
+    monkeypatch.setattr(summary_logger, 'log_header_written', True)
+
+    summary_logger.write_run_metrics({'observations_read': 2, 'cams_writes': 1})
+
+    assert '```json' in summary_messages
+    assert '{"cams_writes": 1, "observations_read": 2}' in summary_messages
+    assert summary_messages[-2] == '</details>'
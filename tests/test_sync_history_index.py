@@ -0,0 +1,113 @@
+#  ====================================================================
+#  Copyright 2026 EcoNet.NZ
+#
+#  Licensed under the Apache License, Version 2.0 (the "License");
+#  you may not use this file except in compliance with the License.
+#  You may obtain a copy of the License at
+#
+#      http://www.apache.org/licenses/LICENSE-2.0
+#
+#  Unless required by applicable law or agreed to in writing, software
+#  distributed under the License is distributed on an "AS IS" BASIS,
+#  WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+#  See the License for the specific language governing permissions and
+#  limitations under the License.
+#  ====================================================================
+
+import json
+import os
+
+import pytest
+
+from inat_to_cams import sync_history_index
+
+# Runs 18395, 18489 and 18491 from sync_history.md, after an empty table written without a run header
+HISTORY_EXCERPT = os.path.join(os.path.dirname(__file__), 'fixtures', 'sync_history_excerpt.md')
+RUN_18489 = 'Run [18489](https://github.com/EcoNet-NZ/inaturalist-to-cams/commit/1fd4cfa9f2edb2a896a06f21f5df78806b9a5614' \
+            '/checks/26220300964)'
+LEGACY_ROW = '|Visit record updated|**94018**|BlueMorningGlory|RED|' \
+             '[358226118](https://www.inaturalist.org/observations/358226118)|'
+
+
+@pytest.fixture
+def index(tmp_path):
+    return sync_history_index.SyncHistoryIndex(str(tmp_path / 'sync_history.sqlite'))
+
+
+def test_every_row_of_the_history_is_parsed():
+    events, skipped = sync_history_index.SyncHistoryIndex.parse_markdown(HISTORY_EXCERPT)
+
+    assert skipped == 0
+    assert [event['object_id'] for event in events] == [
+        94018, 94020, 94022, 94085, 94497, 94496, 94523, 94524, 87266, 90932, 94523]
+
+
+def test_run_details_and_events_are_parsed():
+    events, _ = sync_history_index.SyncHistoryIndex.parse_markdown(HISTORY_EXCERPT)
+
+    assert events[6] == {
+        'time': '2026-05-21T10:26:00+00:00',
+        'run': RUN_18489,
+        'run_started': '2026-05-21 22:26',
+        'config': None,
+        'events': ['new_weed'],
+        'object_id': 94523,
+        'species': 'BananaPassionfruit',
+        'status': 'RED',
+        'inat_id': '363580915',
+        'row': '|New weed|**94523**|BananaPassionfruit|RED|[363580915](https://www.inaturalist.org/observations/363580915)|',
+    }
+
+
+def test_row_without_a_sync_event_description_is_parsed():
+    events, _ = sync_history_index.SyncHistoryIndex.parse_markdown(HISTORY_EXCERPT)
+
+    assert (events[9]['object_id'], events[9]['events'], events[9]['status'], events[9]['inat_id']) == \
+        (90932, [], 'PURPLE', '337013747')
+
+
+def test_unrecognised_rows_are_counted(tmp_path):
+    history = tmp_path / 'sync_history.md'
+    history.write_text(LEGACY_ROW + '\n|Visit record updated|94020|WoollyNightshade|RED|358227923|\n')
+
+    events, skipped = sync_history_index.SyncHistoryIndex.parse_markdown(str(history))
+
+    assert (len(events), skipped) == (1, 1)
+
+
+def test_reimporting_a_history_file_skips_the_runs_already_indexed(index):
+    assert index.import_history(HISTORY_EXCERPT) == 11
+    assert index.import_history(HISTORY_EXCERPT) == 0
+
+    assert [event['inat_id'] for event in index.query(object_id=94523)] == [363580915, 363580915]
+
+
+def test_each_history_file_without_run_headers_is_imported_once(index, tmp_path):
+    for name, row in (('first.md', LEGACY_ROW), ('second.md', LEGACY_ROW.replace('94018', '94019'))):
+        (tmp_path / name).write_text(row + '\n')
+
+    assert index.import_history(str(tmp_path / 'first.md')) == 1
+    assert index.import_history(str(tmp_path / 'second.md')) == 1
+    assert index.import_history(str(tmp_path / 'first.md')) == 0
+
+
+def test_rows_appended_to_a_history_file_without_run_headers_are_imported(index, tmp_path):
+    history = tmp_path / 'sync_history.md'
+    history.write_text(LEGACY_ROW + '\n')
+    assert index.import_history(str(history)) == 1
+
+    with history.open('a') as history_file:
+        history_file.write(LEGACY_ROW.replace('94018', '94019') + '\n' + LEGACY_ROW + '\n')
+
+    assert index.import_history(str(history)) == 2
+    assert index.import_history(str(history)) == 0
+    assert [event['object_id'] for event in index.query(inat_id=358226118)] == [94018, 94019, 94018]
+
+
+def test_unreadable_event_lines_are_skipped(index, tmp_path):
+    events_path = tmp_path / 'sync_history.jsonl'
+    event = {'time': '2026-05-13T00:00:00+00:00', 'run': 'Run 1', 'run_started': '2026-05-13 12:00', 'config': 'omb_nz',
+             'events': ['new_weed'], 'object_id': 1, 'species': 'OldMansBeard', 'status': 'RED', 'inat_id': '2'}
+    events_path.write_text(json.dumps(event) + '\n' + json.dumps(event)[:20])
+
+    assert index.import_history(str(events_path)) == 1
@@ -0,0 +1,185 @@
+#  ====================================================================
+#  Copyright 2026 EcoNet.NZ
+#
+#  Licensed under the Apache License, Version 2.0 (the "License");
+#  you may not use this file except in compliance with the License.
+#  You may obtain a copy of the License at
+#
+#      http://www.apache.org/licenses/LICENSE-2.0
+#
+#  Unless required by applicable law or agreed to in writing, software
+#  distributed under the License is distributed on an "AS IS" BASIS,
+#  WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+#  See the License for the specific language governing permissions and
+#  limitations under the License.
+#  ====================================================================
+
+import datetime
+import json
+import threading
+import types
+
+import pytest
+
+from inat_to_cams import exceptions, metrics, sync_pipeline, sync_state
+
+TIME_OF_PREVIOUS_UPDATE = datetime.datetime(2026, 8, 1, tzinfo=datetime.timezone.utc)
+SEVERAL_WORKERS = {'translate': 2, 'lookup': 3, 'write': 2}
+
+
+def observation(inat_id):
+    return types.SimpleNamespace(id=inat_id, updated_at=TIME_OF_PREVIOUS_UPDATE + datetime.timedelta(minutes=inat_id))
+
+
+class StubPaginator:
+
+    def __init__(self, *pages):
+        self.pages = [[observation(inat_id) for inat_id in page] for page in pages]
+
+    @property
+    def exhausted(self):
+        return not self.pages
+
+    def next_page(self):
+        return self.pages.pop(0)
+
+
+class StubSynchroniser:
+    """Translates each observation to a feature with its iNaturalist id, or raises for the ids in invalid_ids"""
+
+    def __init__(self, state, invalid_ids=()):
+        self.state = state
+        self.stopping = threading.Event()
+        self.invalid_ids = invalid_ids
+
+    def flatten_observation(self, observation):
+        if observation.id in self.invalid_ids:
+            raise exceptions.InvalidObservationError(f'Observation {observation.id} has no location')
+        return observation
+
+    def translate_observations(self, flattened):
+        return [(types.SimpleNamespace(latest_weed_visit=types.SimpleNamespace(external_id=str(inat_observation.id))),
+                 f'hash {inat_observation.id}')
+                for inat_observation, _ in flattened]
+
+    def skip_if_unchanged(self, inat_observation, cams_feature, translated_hash):
+        return False
+
+
+class StubCamsReader:
+
+    def read_observation(self, inat_id):
+        return None
+
+
+class FailingCamsReader:
+
+    def read_observation(self, inat_id):
+        raise ConnectionError('CAMS unavailable')
+
+
+@pytest.fixture
+def written(monkeypatch):
+    # The iNaturalist ids written to CAMS
+    written = []
+    lock = threading.Lock()
+
+    class StubCamsWriter:
+
+        def write_observation_over(self, cams_feature, existing_feature):
+            with lock:
+                written.append(int(cams_feature.latest_weed_visit.external_id))
+
+    monkeypatch.setattr(sync_pipeline.cams_reader, 'CamsReader', StubCamsReader)
+    monkeypatch.setattr(sync_pipeline.cams_writer, 'CamsWriter', StubCamsWriter)
+    return written
+
+
+@pytest.fixture
+def state(tmp_path):
+    state = sync_state.SyncState(str(tmp_path / 'sync_state.json'))
+    with state.locked():
+        yield state
+
+
+def new_pipeline(synchroniser, seen_ids=None, workers=None):
+    return sync_pipeline.SyncPipeline(synchroniser, 'omb_nz', 'omb_nz', set() if seen_ids is None else seen_ids,
+                                      workers=workers or SEVERAL_WORKERS, queue_capacity=2)
+
+
+def test_every_observation_is_synced_by_several_workers_per_stage(state, written):
+    pipeline = new_pipeline(StubSynchroniser(state))
+
+    pipeline.run(StubPaginator(range(1, 11), range(11, 21), range(21, 26)), TIME_OF_PREVIOUS_UPDATE)
+
+    assert sorted(written) == list(range(1, 26))
+    assert (pipeline.fetched, pipeline.unique, pipeline.synced) == (25, 25, 25)
+    assert pipeline.complete
+    assert pipeline.time_of_latest_update == observation(25).updated_at
+    assert state.feature_hashes.is_unchanged(25, 'hash 25')
+
+
+def test_observations_synced_for_another_configuration_are_not_synced_again(state, written):
+    pipeline = new_pipeline(StubSynchroniser(state), seen_ids={2, 3})
+
+    pipeline.run(StubPaginator([1, 2, 3, 4]), TIME_OF_PREVIOUS_UPDATE)
+
+    assert sorted(written) == [1, 4]
+    assert (pipeline.fetched, pipeline.unique, pipeline.synced) == (4, 2, 2)
+    assert pipeline.complete
+
+
+def test_stopped_pipeline_is_not_complete(state, written):
+    synchroniser = StubSynchroniser(state)
+    synchroniser.stopping.set()
+    pipeline = new_pipeline(synchroniser)
+
+    pipeline.run(StubPaginator([1, 2]), TIME_OF_PREVIOUS_UPDATE)
+
+    assert written == []
+    assert not pipeline.complete
+    assert pipeline.time_of_latest_update == TIME_OF_PREVIOUS_UPDATE
+
+
+def test_writing_error_is_raised_by_run_and_leaves_the_pipeline_incomplete(state, written, monkeypatch):
+    monkeypatch.setattr(sync_pipeline.cams_reader, 'CamsReader', FailingCamsReader)
+    pipeline = new_pipeline(StubSynchroniser(state))
+
+    with pytest.raises(ConnectionError):
+        pipeline.run(StubPaginator(range(1, 11), range(11, 21)), TIME_OF_PREVIOUS_UPDATE)
+
+    assert written == []
+    assert pipeline.synced < pipeline.unique
+    assert not pipeline.complete
+
+
+def test_synced_observations_are_checkpointed(state, written, monkeypatch):
+    monkeypatch.setattr(sync_pipeline, 'CHECKPOINT_INTERVAL', 2)
+    pipeline = new_pipeline(StubSynchroniser(state), workers={'translate': 1, 'lookup': 1, 'write': 1})
+    checkpoints = []
+    commit = state.commit
+
+    def checkpoint():
+        commit()
+        with open(state.path, encoding='utf-8') as state_file:
+            checkpoints.append(json.load(state_file))
+    monkeypatch.setattr(state, 'commit', checkpoint)
+
+    pipeline.run(StubPaginator([1, 2, 3, 4, 5]), TIME_OF_PREVIOUS_UPDATE)
+
+    assert [saved['configs']['omb_nz']['checkpoint']['synced'] for saved in checkpoints] == [2, 4]
+    assert sorted(checkpoints[-1]['feature_hashes']['hashes']) == ['1', '2', '3', '4']
+    assert 'time_of_last_update' not in checkpoints[-1]['configs']['omb_nz']
+
+
+def test_invalid_observations_count_as_synced(state, written):
+    metrics.reset()
+    pipeline = new_pipeline(StubSynchroniser(state, invalid_ids={2}))
+
+    pipeline.run(StubPaginator([1, 2, 3]), TIME_OF_PREVIOUS_UPDATE)
+
+    assert sorted(written) == [1, 3]
+    assert (pipeline.invalid, pipeline.synced) == (1, 3)
+    assert pipeline.complete
+    assert metrics.counter_value('observations_invalid', config='omb_nz') == 1
+    assert not state.feature_hashes.is_unchanged(2, 'hash 2')
@@ -0,0 +1,170 @@
+#  ====================================================================
+#  Copyright 2026 EcoNet.NZ
+#
+#  Licensed under the Apache License, Version 2.0 (the "License");
+#  you may not use this file except in compliance with the License.
+#  You may obtain a copy of the License at
+#
+#      http://www.apache.org/licenses/LICENSE-2.0
+#
+#  Unless required by applicable law or agreed to in writing, software
+#  distributed under the License is distributed on an "AS IS" BASIS,
+#  WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+#  See the License for the specific language governing permissions and
+#  limitations under the License.
+#  ====================================================================
+
+import datetime
+import json
+import os
+
+import pytest
+
+from inat_to_cams import feature_hashes, sync_state
+
+NZST = datetime.timezone(datetime.timedelta(hours=12))
+TIME_OF_LAST_UPDATE = datetime.datetime(2026, 8, 22, 16, 46, 51, tzinfo=NZST)
+
+
+@pytest.fixture
+def state(tmp_path):
+    return sync_state.SyncState(str(tmp_path / 'sync_state.json'))
+
+
+def saved_state(state):
+    with open(state.path, encoding='utf-8') as state_file:
+        return json.load(state_file)
+
+
+def test_missing_state_starts_from_the_default_time_of_last_update(state):
+    with state.locked():
+        assert state.configs == {}
+        default_time = datetime.datetime.fromisoformat(sync_state.DEFAULT_TIME_OF_LAST_UPDATE)
+        assert state.time_of_last_update('moth_plant_nz') == default_time
+
+
+def test_committed_state_is_loaded_by_the_next_run(state, tmp_path):
+    with state.locked():
+        state.set_time_of_last_update('moth_plant_nz', TIME_OF_LAST_UPDATE)
+        state.feature_hashes.record(358226118, 'abc', TIME_OF_LAST_UPDATE)
+        state.set_schema_fingerprint('WeedLocations', 'fingerprint')
+        state.set_checkpoint('moth_plant_nz', {'observations': 400, 'synced': 200})
+        state.commit()
+
+    next_run = sync_state.SyncState(state.path)
+    with next_run.locked():
+        assert next_run.time_of_last_update('moth_plant_nz') == TIME_OF_LAST_UPDATE
+        assert next_run.feature_hashes.is_unchanged(358226118, 'abc')
+        assert next_run.schema_fingerprint('WeedLocations') == 'fingerprint'
+        assert next_run.checkpoint('moth_plant_nz') == {'observations': 400, 'synced': 200}
+
+
+def test_uncommitted_changes_are_discarded(state):
+    with state.locked():
+        state.set_time_of_last_update('moth_plant_nz', TIME_OF_LAST_UPDATE)
+        state.commit()
+    with state.locked():
+        state.set_time_of_last_update('moth_plant_nz', TIME_OF_LAST_UPDATE + datetime.timedelta(days=1))
+
+    with state.locked():
+        assert state.time_of_last_update('moth_plant_nz') == TIME_OF_LAST_UPDATE
+
+
+def test_commit_replaces_the_file_without_leaving_a_temporary_file(state):
+    with open(state.path, 'w', encoding='utf-8') as state_file:
+        json.dump({'version': sync_state.VERSION, 'configs': {'omb_nz': {}}}, state_file)
+
+    with state.locked():
+        state.set_time_of_last_update('moth_plant_nz', TIME_OF_LAST_UPDATE)
+        state.commit()
+
+    assert not os.path.exists(state.path + '.tmp')
+    assert set(saved_state(state)['configs']) == {'omb_nz', 'moth_plant_nz'}
+
+
+def test_failed_commit_leaves_the_previous_state(state, monkeypatch):
+    with state.locked():
+        state.set_time_of_last_update('moth_plant_nz', TIME_OF_LAST_UPDATE)
+        state.commit()
+    previous = saved_state(state)
+
+    def fail_to_write(*args, **kwargs):
+        raise OSError('No space left on device')
+
+    with state.locked():
+        state.set_time_of_last_update('moth_plant_nz', TIME_OF_LAST_UPDATE + datetime.timedelta(days=1))
+        monkeypatch.setattr(sync_state.json, 'dump', fail_to_write)
+        with pytest.raises(OSError):
+            state.commit()
+
+    assert saved_state(state) == previous
+
+
+def test_committing_unchanged_state_leaves_the_file_unchanged(state):
+    with state.locked():
+        state.set_time_of_last_update('moth_plant_nz', TIME_OF_LAST_UPDATE)
+        state.commit()
+    with open(state.path, encoding='utf-8') as state_file:
+        contents = state_file.read()
+
+    with state.locked():
+        state.commit()
+
+    with open(state.path, encoding='utf-8') as state_file:
+        assert state_file.read() == contents
+
+
+def test_state_of_another_version_is_not_loaded(state):
+    with open(state.path, 'w', encoding='utf-8') as state_file:
+        json.dump({'version': sync_state.VERSION + 1, 'configs': {}}, state_file)
+
+    with pytest.raises(ValueError):
+        with state.locked():
+            pass
+
+
+def test_feature_hashes_of_another_version_are_ignored(state):
+    with open(state.path, 'w', encoding='utf-8') as state_file:
+        json.dump({'version': sync_state.VERSION,
+                   'configs': {'omb_nz': {'time_of_last_update': TIME_OF_LAST_UPDATE.isoformat()}},
+                   'feature_hashes': {'version': feature_hashes.VERSION - 1, 'hashes': {'358226118': 'abc'}}}, state_file)
+
+    with state.locked():
+        assert state.feature_hashes.hashes == {}
+        assert state.time_of_last_update('omb_nz') == TIME_OF_LAST_UPDATE
+
+
+def test_legacy_files_are_imported_and_removed_once_committed(state, tmp_path):
+    (tmp_path / 'omb_nz_time_of_last_update.txt').write_text(TIME_OF_LAST_UPDATE.isoformat() + '\n')
+    hashes = {'version': feature_hashes.VERSION, 'hashes': {'358226118': ['abc', '2026-08-22T04:46:51+00:00']}}
+    (tmp_path / sync_state.LEGACY_FEATURE_HASHES_FILE).write_text(json.dumps(hashes))
+
+    with state.locked():
+        assert state.time_of_last_update('omb_nz') == TIME_OF_LAST_UPDATE
+        assert state.feature_hashes.is_unchanged(358226118, 'abc')
+        assert (tmp_path / 'omb_nz_time_of_last_update.txt').exists()
+        state.commit()
+
+    assert not (tmp_path / 'omb_nz_time_of_last_update.txt').exists()
+    assert not (tmp_path / sync_state.LEGACY_FEATURE_HASHES_FILE).exists()
+    assert saved_state(state)['configs']['omb_nz']['time_of_last_update'] == TIME_OF_LAST_UPDATE.isoformat()
+
+
+def test_legacy_files_are_ignored_once_the_state_file_exists(state, tmp_path):
+    with state.locked():
+        state.commit()
+    (tmp_path / 'omb_nz_time_of_last_update.txt').write_text(TIME_OF_LAST_UPDATE.isoformat())
+
+    with state.locked():
+        assert state.configs == {}
+
+
+def test_commit_prunes_hashes_older_than_the_retention_before_the_latest_time_of_last_update(state):
+    with state.locked():
+        state.set_time_of_last_update('omb_nz', TIME_OF_LAST_UPDATE - datetime.timedelta(days=400))
+        state.set_time_of_last_update('moth_plant_nz', TIME_OF_LAST_UPDATE)
+        state.feature_hashes.record(1, 'old', TIME_OF_LAST_UPDATE - feature_hashes.RETENTION - datetime.timedelta(days=1))
+        state.feature_hashes.record(2, 'recent', TIME_OF_LAST_UPDATE - feature_hashes.RETENTION + datetime.timedelta(days=1))
+        state.commit()
+
+    assert list(saved_state(state)['feature_hashes']['hashes']) == ['2']
@@ -0,0 +1,54 @@
+#  ====================================================================
+#  Copyright 2026 EcoNet.NZ
+#
+#  Licensed under the Apache License, Version 2.0 (the "License");
+#  you may not use this file except in compliance with the License.
+#  You may obtain a copy of the License at
+#
+#      http://www.apache.org/licenses/LICENSE-2.0
+#
+#  Unless required by applicable law or agreed to in writing, software
+#  distributed under the License is distributed on an "AS IS" BASIS,
+#  WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+#  See the License for the specific language governing permissions and
+#  limitations under the License.
+#  ====================================================================
+
+from benchmark import fixtures
+from inat_to_cams import inaturalist_reader, translator
+
+UNMAPPED_TAXON_ID = 999999999
+
+
+def flattened_observations(tmp_path, count=40):
+    observations = fixtures.replay_observations(fixtures.synthesise_fixtures(str(tmp_path / 'fixtures'), count))
+    return [(inaturalist_reader.INatReader.flatten(observation), observation) for observation in observations]
+
+
+def test_translate_many_is_the_same_as_translating_each_observation(tmp_path):
+    pairs = flattened_observations(tmp_path)
+    # An unmapped taxon with names, and one without, which are both translated to OTHER
+    pairs[0][0].taxon_lineage = [UNMAPPED_TAXON_ID]
+    pairs[0][0].taxon_name = 'Unmappedia example'
+    pairs[1][0].taxon_lineage = [UNMAPPED_TAXON_ID]
+    pairs[1][0].taxon_name = None
+    pairs[1][0].taxon_preferred_common_name = None
+    # A lineage shared with a previous observation, whose CAMS taxon is looked up once
+    pairs[2][0].taxon_lineage = list(pairs[3][0].taxon_lineage)
+    # No follow-up date or treatment, which are translated to None
+    pairs[4][0].follow_up_date = None
+    pairs[4][0].treatment_substance = 'None'
+    inat_to_cams_translator = translator.INatToCamsTranslator()
+
+    translated = inat_to_cams_translator.translate_many(pairs)
+
+    assert translated == [inat_to_cams_translator.translate(*pair) for pair in pairs]
+    assert [cams_feature.weed_location.species for cams_feature in translated[:2]] == ['OTHER', 'OTHER']
+    assert translated[0].weed_location.other_weed_details == 'benchmark weed (Unmappedia example)'
+    assert translated[1].weed_location.other_weed_details == 'Unknown species from iNaturalist'
+    assert translated[4].latest_weed_visit.follow_up_date is None
+    assert translated[4].latest_weed_visit.treatment_substance is None
+
+
+def test_translate_many_of_an_empty_page():
+    assert translator.INatToCamsTranslator().translate_many([]) == []